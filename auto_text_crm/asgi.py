@@ -1,3 +1,7 @@
+"""
+ASGI entrypoint – served by gunicorn + UvicornWorker so long-lived
+responses like the /api/events/ SSE stream don't pin a worker thread.
+"""
 import os
 from django.core.asgi import get_asgi_application
 
@@ -5,8 +5,10 @@ Celery application for the Auto-Text CRM.
 Key additions
 ─────────────
 • Explicit TIME_ZONE pick-up (for send-window math)
-• Beat schedule “ai-follow-up-dispatch” – fires every 15 min and
-  calls dashboard.queue_ai_followups_task
+• Beat schedule “ai-follow-up-dispatch” – fires every minute and
+  calls dashboard.tasks.queue_ai_followups_task
+• Beat schedule “lead-score-decay” (hourly → dashboard.tasks.rescore_time_decay)
+  and “lead-score-refresh” (nightly at 02:00 → dashboard.tasks.score_leads)
 """
 
 from __future__ import absolute_import, unicode_literals
@@ -35,12 +37,22 @@ app.conf.timezone = settings.TIME_ZONE
 app.conf.enable_utc = False
 
 # ────────────────────────────────────────────────────────────────────────────
-#  Beat schedule – AI follow-up dispatcher
+#  Beat schedule – AI follow-up dispatcher & lead scoring
 # ────────────────────────────────────────────────────────────────────────────
 app.conf.beat_schedule = {
     "ai-follow-up-dispatch": {
-        "task": "dashboard.queue_ai_followups_task",      # ← updated name
-        "schedule": crontab(minute="*/15"),               # every 15 minutes
+        "task": "dashboard.tasks.queue_ai_followups_task",
+        "schedule": crontab(),                            # every minute
+        "options": {"queue": "default"},
+    },
+    "lead-score-decay": {
+        "task": "dashboard.tasks.rescore_time_decay",
+        "schedule": crontab(minute=5),                    # hourly
+        "options": {"queue": "default"},
+    },
+    "lead-score-refresh": {
+        "task": "dashboard.tasks.score_leads",
+        "schedule": crontab(hour=2, minute=0),            # nightly
         "options": {"queue": "default"},
     },
 }
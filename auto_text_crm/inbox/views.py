@@ -13,6 +13,8 @@ from django.views.decorators.http import require_http_methods
 from twilio.request_validator import RequestValidator
 
 from dashboard.models import Lead, MessageLog  # Lead + log live in dashboard app
+from dashboard.services.realtime import publish
+from dashboard.utils.phone import normalize_phone
 
 
 # ------------------------------------------------------------------
@@ -42,30 +44,33 @@ def twilio_sms_webhook(request):
     body        = (request.POST.get("Body") or "").strip()
     msid        = request.POST.get("MessageSid")
 
-    # Strip +1, keep last 10 digits for matching
-    normalized = from_number.replace("+", "").lstrip("1")[-10:]
+    # E.164 so the lookup is an exact match on Lead.phone_e164
+    normalized = normalize_phone(from_number)
+    if not normalized:
+        return HttpResponse("<Response></Response>", content_type="text/xml")
 
     # ── 3.  Find/create Lead ───────────────────────────────────────
     lead = (
-        Lead.objects.filter(cellphone__endswith=normalized).first()
+        Lead.objects.filter(phone_e164=normalized).first()
         or Lead.objects.create(
             cellphone=normalized,
             name="Unknown",
-            lead_source="SMS",  # adjust to your schema
+            source="SMS",
         )
     )
 
     # ── 4.  Save in MessageLog / InboxMessage ──────────────────────
-    MessageLog.objects.create(
+    log = MessageLog.objects.create(
         lead=lead,
         from_number=from_number,
         content=body,
         direction="IN",
-        channel="SMS",
+        source="IN",
         delivery_status="Received",
         read=False,
         timestamp=timezone.now(),
     )
+    publish("message.inbound", {"lead_id": lead.id, "message_id": log.id})
 
     # ── 5.  Auto‑pause AI + flag unread ────────────────────────────
     lead.has_replied = True
@@ -105,6 +105,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOWED_ORIGINS = ["http://localhost:3000"]
 CORS_ALLOW_CREDENTIALS = True
 
+# Redis (Celery broker + realtime pub/sub for /api/events/)
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+REALTIME_CHANNEL = "crm-events"
+
 # Celery
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_ACCEPT_CONTENT = ["json"]
@@ -112,6 +116,12 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 
+# Background export artifacts (dashboard.tasks.export_jobs)
+EXPORT_ROOT = BASE_DIR / "exports"
+
+# Uploaded CSVs waiting for / being processed by dashboard.tasks.import_jobs
+IMPORT_ROOT = BASE_DIR / "imports"
+
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 # END auto_text_crm/settings.py
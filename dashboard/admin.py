@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Lead, MessageLog
+from .models import DuplicateCandidate, ImportProfile, Lead, MessageLog
+from .services.search import search_lead_ids
+
+# Admin search is capped – refine the query rather than page past this
+ADMIN_SEARCH_LIMIT = 500
 
 @admin.register(Lead)
 class LeadAdmin(admin.ModelAdmin):
@@ -14,7 +18,38 @@ class LeadAdmin(admin.ModelAdmin):
     )
     ordering = ('-id',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index instead of icontains over every search field."""
+        if not search_term.strip():
+            return queryset, False
+        ids = search_lead_ids(search_term, limit=ADMIN_SEARCH_LIMIT)
+        return queryset.filter(id__in=ids), False
+
 @admin.register(MessageLog)
 class MessageLogAdmin(admin.ModelAdmin):
     list_display = ('lead', 'source', 'timestamp')
     ordering = ('-timestamp',)
+
+@admin.register(ImportProfile)
+class ImportProfileAdmin(admin.ModelAdmin):
+    """Fix a CRM export's column mapping here; the next upload picks it up."""
+    list_display = ('__str__', 'header_signature', 'auto_generated', 'updated_at')
+    readonly_fields = ('header_signature', 'headers', 'created_at', 'updated_at')
+    ordering = ('-updated_at',)
+
+    def save_model(self, request, obj, form, change):
+        obj.auto_generated = False
+        super().save_model(request, obj, form, change)
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    """Review queue for fuzzy duplicates found by `manage.py find_duplicates`."""
+    list_display = ('__str__', 'lead_a', 'lead_b', 'score', 'reasons', 'status')
+    list_filter = ('status',)
+    raw_id_fields = ('lead_a', 'lead_b')
+    readonly_fields = ('score', 'reasons', 'created_at', 'updated_at')
+    actions = ('dismiss',)
+
+    @admin.action(description="Mark as not a duplicate")
+    def dismiss(self, request, queryset):
+        queryset.update(status=DuplicateCandidate.Status.DISMISSED)
@@ -1,8 +1,9 @@
 """
 Celery application bootstrap for Auto-Text CRM.
 
-Adds two periodic tasks via Celery Beat:
- • ai-follow-up-dispatch – every 15 min → dashboard.tasks.queue_ai_followups_task
+Adds three periodic tasks via Celery Beat:
+ • ai-follow-up-dispatch – every minute → dashboard.tasks.queue_ai_followups_task
+ • lead-score-decay       – hourly       → dashboard.tasks.rescore_time_decay
  • lead-score-refresh     – nightly at 02:00 → dashboard.tasks.score_leads
 """
 
@@ -35,7 +36,12 @@ app.conf.enable_utc = False
 app.conf.beat_schedule = {
     "ai-follow-up-dispatch": {
         "task": "dashboard.tasks.queue_ai_followups_task",
-        "schedule": crontab(minute="*/15"),
+        "schedule": crontab(),
+        "options": {"queue": "default"},
+    },
+    "lead-score-decay": {
+        "task": "dashboard.tasks.rescore_time_decay",
+        "schedule": crontab(minute=5),
         "options": {"queue": "default"},
     },
     "lead-score-refresh": {
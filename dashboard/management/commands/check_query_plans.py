@@ -0,0 +1,85 @@
+# dashboard/management/commands/check_query_plans.py
+"""
+EXPLAIN every hot-path production query and fail if one falls back to a
+full table scan.
+
+Run it in CI after `migrate`, or against a prod snapshot:
+
+    python manage.py check_query_plans
+    python manage.py check_query_plans --verbose   # print each plan
+
+The querysets come from the same LeadQuerySet / MessageLogQuerySet methods
+the views and tasks call, so an edited filter is checked automatically.
+"""
+
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from dashboard.models import Lead, MessageLog
+from dashboard.tasks import DISPATCH_BATCH_SIZE, DISPATCH_LOOKAHEAD
+
+
+def production_queries():
+    """(label, queryset) for every query we expect to hit an index."""
+    now = timezone.now()
+    return [
+        ("send_scheduled_ai_messages", Lead.objects.due_for_ai(now)),
+        ("queue_ai_followups_task", Lead.objects.due_by(now + DISPATCH_LOOKAHEAD)[:DISPATCH_BATCH_SIZE]),
+        ("get_unread_messages", MessageLog.objects.unread_inbound()[:20]),
+        ("get_message_thread", MessageLog.objects.thread(lead_id=1).filter(id__lt=100).order_by("-id")[:51]),
+        (
+            "get_inbox_summary",
+            Lead.objects.filter(last_message_at__isnull=False).order_by("-last_message_at", "-id")[:100],
+        ),
+        (
+            "rescore_time_decay",
+            Lead.objects.crossed_decay(now - timedelta(hours=1), now).values_list("id", flat=True),
+        ),
+    ]
+
+
+# SQLite: "SCAN dashboard_lead" with no "USING … INDEX"; Postgres: "Seq Scan on …"
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (?!.*\bUSING\b)\S+"),
+    "postgresql": re.compile(r"\bSeq Scan on\b"),
+}
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot-path queries and fail if any does a full table scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose", action="store_true", help="Print every query plan.")
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"No full-scan rule for database vendor {connection.vendor!r}.")
+
+        failures = []
+        for label, queryset in production_queries():
+            plan = self._explain(queryset)
+            if options["verbose"]:
+                self.stdout.write(f"── {label}\n{plan}\n")
+
+            if pattern.search(plan):
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"✗ {label}: full table scan"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {label}"))
+
+        if failures:
+            raise CommandError(f"Full table scan in: {', '.join(failures)}")
+
+    def _explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # tiny dev tables make seq scans look cheap – ask whether an
+                # index *can* serve the query, not whether it's worth it today
+                with connection.cursor() as cur:
+                    cur.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
@@ -22,4 +22,13 @@ class Command(BaseCommand):
             },
         )
 
+        PeriodicTask.objects.update_or_create(
+            name='Refresh Duplicate Candidates',
+            defaults={
+                'interval': schedule,
+                'task': 'dashboard.tasks.dedupe.refresh_duplicate_candidates',
+                'args': json.dumps([]),
+            },
+        )
+
         self.stdout.write(self.style.SUCCESS("✅ Scheduled task created or updated."))
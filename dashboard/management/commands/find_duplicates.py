@@ -0,0 +1,40 @@
+# dashboard/management/commands/find_duplicates.py
+"""
+Find fuzzy duplicate leads (same email, VIN, sound-alike name, phone tail).
+
+    python manage.py find_duplicates                  # leads changed since last run
+    python manage.py find_duplicates --rebuild        # every lead
+    python manage.py find_duplicates --auto-merge 0.95 --dry-run
+
+Candidates land in DuplicateCandidate for review in the admin; see
+dashboard.services.lead_dedupe for the keys and the scoring.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.services.lead_dedupe import auto_merge, refresh_candidates
+
+
+class Command(BaseCommand):
+    help = "Refresh fuzzy duplicate-lead candidates and optionally merge the surest ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Re-key and re-compare every lead.")
+        parser.add_argument(
+            "--auto-merge", type=float, metavar="SCORE", help="Merge pending pairs scoring at least SCORE."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="With --auto-merge: report only.")
+
+    def handle(self, *args, **options):
+        min_score = options["auto_merge"]
+        if min_score is not None and not 0 < min_score <= 1:
+            raise CommandError("--auto-merge must be between 0 and 1.")
+
+        result = refresh_candidates(rebuild=options["rebuild"])
+        self.stdout.write(f"Checked {result['leads']} leads, {result['candidates']} candidate pairs.")
+
+        if min_score is not None:
+            report = auto_merge(min_score, dry_run=options["dry_run"])
+            verb = "Would merge" if options["dry_run"] else "Merged"
+            self.stdout.write(f"{verb} {report['losers']} duplicates into {report['groups']} leads.")
+        self.stdout.write(self.style.SUCCESS("Done."))
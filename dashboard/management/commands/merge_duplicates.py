@@ -1,10 +1,43 @@
+# dashboard/management/commands/merge_duplicates.py
+"""
+Merge duplicate leads that share the same phone number.
+
+    python manage.py merge_duplicates --dry-run     # counts + sample groups
+    python manage.py merge_duplicates
+
+The work is set-based (see dashboard.services.lead_merge): messages, events
+and inbox rows of the duplicates are moved to the surviving lead, never
+cascade-deleted.
+"""
+
 from django.core.management.base import BaseCommand
-from django.db.models import Count
-from dashboard.models import Lead
+
+from dashboard.services.lead_merge import DELETE_CHUNK, merge_duplicates
+
 
 class Command(BaseCommand):
     help = "Merge duplicate leads that share the same phone number."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be merged; write nothing.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=DELETE_CHUNK, help="Duplicates deleted per DELETE statement."
+        )
+
     def handle(self, *args, **options):
-        ...
-        # merging logic
+        dry_run = options["dry_run"]
+        report = merge_duplicates(dry_run=dry_run, chunk_size=options["chunk_size"])
+
+        if not report["losers"]:
+            self.stdout.write(self.style.SUCCESS("No duplicate leads found."))
+            return
+
+        verb = "Would merge" if dry_run else "Merged"
+        self.stdout.write(f"{verb} {report['losers']} duplicates into {report['groups']} leads.")
+        for table, count in report["repoint"].items():
+            self.stdout.write(f"  {table}: {count} rows re-pointed")
+        if dry_run:
+            for group in report["sample"]:
+                self.stdout.write(f"  {group['phone']}: keep #{group['winner']}, merge {group['losers']}")
+        else:
+            self.stdout.write(self.style.SUCCESS("Done."))
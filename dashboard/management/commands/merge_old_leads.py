@@ -1,7 +1,33 @@
 # dashboard/management/commands/merge_old_leads.py
+"""
+Copy rows from the legacy leads_lead table into dashboard_lead.
+
+    python manage.py merge_old_leads                    # resume where the last run stopped
+    python manage.py merge_old_leads --chunk-size 5000
+    python manage.py merge_old_leads --restart          # from the first row again
+
+Legacy rows are streamed in id order through a server-side cursor
+(``fetchmany``) and bulk-upserted on phone_e164 a chunk at a time – the
+same upsert the CSV importer uses. Each chunk commits on its own together
+with the high-water mark (the "merge_old_leads" SyncSequence holds the last
+legacy id done), so no write lock is held for long and an interrupted run
+picks up after the last committed chunk.
+"""
+
+import time
+
 from django.core.management.base import BaseCommand, CommandError
 from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
 from dashboard.models import Lead as NewLead
+from dashboard.models import SyncSequence
+from dashboard.services.lead_import import upsert_batch
+from dashboard.utils.phone import normalize_phone
+
+CHUNK_SIZE = 2000
+WATERMARK = "merge_old_leads"
 
 
 class Command(BaseCommand):
@@ -10,13 +36,24 @@ class Command(BaseCommand):
         "keyed by cellphone/phone."
     )
 
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Legacy rows per transaction.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the saved high-water mark.")
+
     def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
         # Check that the table exists
         if "leads_lead" not in connection.introspection.table_names():
             raise CommandError("Table leads_lead does not exist in this database.")
 
         # Build a column‑name map so we can handle different schemas gracefully
-        col_names = {c.name for c in connection.introspection.get_table_description(connection.cursor(), "leads_lead")}
+        with connection.cursor() as cur:
+            col_names = {c.name for c in connection.introspection.get_table_description(cur, "leads_lead")}
+        if "id" not in col_names:
+            raise CommandError("leads_lead has no id column to order and checkpoint on.")
 
         # Choose the best available phone & email column names
         phone_col  = "cellphone" if "cellphone" in col_names else "phone"
@@ -24,43 +61,89 @@ class Command(BaseCommand):
         source_col = "lead_source" if "lead_source" in col_names else None
         created_col = "created_at" if "created_at" in col_names else None
 
-        select_cols = ["name", phone_col]
+        select_cols = ["id", "name", phone_col]
         if email_col:   select_cols.append(email_col)
         if source_col:  select_cols.append(source_col)
         if created_col: select_cols.append(created_col)
 
-        sql = f'SELECT {", ".join(select_cols)} FROM leads_lead'
-
-        created = updated = skipped = 0
-
-        with transaction.atomic(), connection.cursor() as cur:
-            cur.execute(sql)
-            for row in cur.fetchall():
-                data = dict(zip(select_cols, row))
-                phone = data.pop(phone_col)
-                if not phone:
-                    skipped += 1
-                    continue
-
-                defaults = {
-                    "name": data.get("name") or "",
-                    "cellphone": phone,
-                    "email": data.get(email_col, "") if email_col else "",
-                    "source": data.get(source_col, "") if source_col else "",
-                    "created_at": data.get(created_col) if created_col else None,
-                }
-
-                _, is_created = NewLead.objects.update_or_create(
-                    cellphone=phone,
-                    defaults=defaults,
+        mark, _ = SyncSequence.objects.get_or_create(name=WATERMARK)
+        start = 0 if options["restart"] else mark.value
+        if start:
+            self.stdout.write(f"Resuming after legacy id {start}.")
+
+        sql = f'SELECT {", ".join(select_cols)} FROM leads_lead WHERE id > %s ORDER BY id'
+
+        def transform(data):
+            phone = data[phone_col]
+            phone_e164 = normalize_phone(phone)
+            if not phone_e164:
+                raise ValueError(f"invalid phone {phone!r}")
+            return {
+                "phone_e164": phone_e164,
+                "name": data.get("name") or "",
+                "cellphone": phone,
+                "email": (data.get(email_col) or "") if email_col else "",
+                "source": (data.get(source_col) or "") if source_col else "",
+            }
+
+        created = updated = skipped = done = 0
+        started = time.monotonic()
+
+        # outside a transaction the read cursor is held open across the
+        # per-chunk commits (WITH HOLD on PostgreSQL)
+        with connection.chunked_cursor() as read:
+            read.execute(sql, [start])
+            while True:
+                chunk_started = time.monotonic()
+                rows = read.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batch = [(row[0], dict(zip(select_cols, row))) for row in rows]
+
+                with transaction.atomic():
+                    new, changed, rejects = upsert_batch(batch, transform)
+                    if created_col:
+                        self._copy_created_at(batch, created_col, transform)
+                    SyncSequence.objects.filter(name=WATERMARK).update(value=batch[-1][0])
+
+                created, updated, skipped = created + new, updated + changed, skipped + len(rejects)
+                done += len(rows)
+                if options["verbosity"] > 1:
+                    for legacy_id, reason in rejects:
+                        self.stdout.write(f"  skipped legacy id {legacy_id}: {reason}")
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{done} rows (up to id {batch[-1][0]}) – "
+                    f"{len(rows) / max(time.monotonic() - chunk_started, 1e-6):.0f} rows/s this chunk, "
+                    f"{done / max(elapsed, 1e-6):.0f} rows/s overall"
                 )
-                if is_created:
-                    created += 1
-                else:
-                    updated += 1
 
+        elapsed = time.monotonic() - started
         self.stdout.write(
             self.style.SUCCESS(
-                f"Merged {created} new, {updated} updated, {skipped} skipped."
+                f"Merged {created} new, {updated} updated, {skipped} skipped "
+                f"in {elapsed:.1f}s ({done / max(elapsed, 1e-6):.0f} rows/s)."
             )
         )
+
+    @staticmethod
+    def _copy_created_at(batch, created_col, transform):
+        """Keep the legacy created_at (auto_now_add stamps upserted rows with now)."""
+        created_at = {}
+        for _, data in batch:
+            try:
+                phone = transform(data)["phone_e164"]
+            except ValueError:
+                continue
+            value = data[created_col]
+            if isinstance(value, str):
+                value = parse_datetime(value)
+            if value:
+                created_at[phone] = timezone.make_aware(value) if timezone.is_naive(value) else value
+
+        leads = list(NewLead.objects.filter(phone_e164__in=list(created_at)).only("id", "phone_e164"))
+        for lead in leads:
+            lead.created_at = created_at[lead.phone_e164]
+        if leads:
+            NewLead.objects.bulk_update(leads, ["created_at"])
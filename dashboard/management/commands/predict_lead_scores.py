@@ -0,0 +1,40 @@
+# dashboard/management/commands/predict_lead_scores.py
+"""
+Batch-score every lead with the active lead models.
+
+    python manage.py predict_lead_scores --workers 4
+
+Writes Lead.reply_likelihood / Lead.sale_likelihood (0–100), only where the
+value changes. See dashboard.services.lead_model.
+"""
+
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models import ScoringModel
+from dashboard.services.lead_model import CHUNK_SIZE, predict_all
+
+
+class Command(BaseCommand):
+    help = "Rescore all leads with the trained reply / sale models (process pool)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Leads per matrix multiply.")
+        parser.add_argument("--target", choices=ScoringModel.Target.values, action="append",
+                            help="Only this outcome (repeatable; default: every active model).")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            result = predict_all(
+                workers=max(options["workers"], 1), chunk_size=options["chunk_size"], targets=options["target"]
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from None
+
+        elapsed = time.monotonic() - started
+        changed = ", ".join(f"{target}: {rows} changed" for target, rows in result.items())
+        self.stdout.write(self.style.SUCCESS(f"Scored leads in {elapsed:.1f}s ({changed})."))
@@ -0,0 +1,74 @@
+# dashboard/management/commands/run_send_scheduler.py
+"""
+Pop loop for the Redis AI follow-up timing wheel.
+
+    python manage.py run_send_scheduler                   # run until stopped
+    python manage.py run_send_scheduler --poll 0.5 --batch-size 200
+    python manage.py run_send_scheduler --once            # one reconcile + one turn
+
+Rebuilds the wheel from the Lead table on startup (and every
+--reconcile-every seconds), then queues due leads as they come due –
+sleeping until the next member is due, never longer than --poll. While
+the send window is closed it sleeps until the window opens. See
+dashboard.services.send_schedule.
+"""
+
+import time
+
+import redis
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dashboard.services import send_schedule
+from dashboard.tasks import DISPATCH_BATCH_SIZE, dispatch_from_wheel, send_window_opens
+
+
+class Command(BaseCommand):
+    help = "Queue AI follow-ups from the Redis timing wheel as they fall due."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=DISPATCH_BATCH_SIZE, help="Leads claimed per turn.")
+        parser.add_argument("--poll", type=float, default=1.0, help="Longest sleep between turns, in seconds.")
+        parser.add_argument(
+            "--reconcile-every", type=float, default=3600, help="Rebuild the wheel from the DB this often (seconds)."
+        )
+        parser.add_argument("--once", action="store_true", help="Reconcile, run one turn and exit.")
+
+    def handle(self, *args, **options):
+        batch_size, poll = options["batch_size"], options["poll"]
+        if batch_size < 1 or poll <= 0:
+            raise CommandError("--batch-size and --poll must be positive.")
+
+        reconciled_at = None
+        try:
+            while True:
+                if reconciled_at is None or time.monotonic() - reconciled_at >= options["reconcile_every"]:
+                    members = send_schedule.reconcile()
+                    reconciled_at = time.monotonic()
+                    self.stdout.write(f"Reconciled timing wheel: {members} leads scheduled.")
+
+                report = dispatch_from_wheel(batch_size)
+                if report["queued"] or report["stale"]:
+                    self.stdout.write(
+                        f"Queued {report['queued']} ({report['stale']} stale), "
+                        f"max lag {report['max_lag_seconds']:.1f}s"
+                    )
+                if options["once"]:
+                    return
+                if report["queued"] + report["stale"] >= batch_size:
+                    continue  # more may be due already
+
+                now = timezone.now()
+                opens = send_window_opens(now)
+                if opens > now:
+                    # nothing is sent now – an overdue head would otherwise spin the loop
+                    time.sleep((opens - now).total_seconds())
+                    continue
+
+                head = send_schedule.next_due()
+                wait = poll if head is None else (head - now).total_seconds()
+                time.sleep(min(max(wait, 0.05), poll))
+        except redis.RedisError as exc:
+            raise CommandError(f"Redis unavailable: {exc}") from None
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
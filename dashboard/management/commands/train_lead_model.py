@@ -0,0 +1,47 @@
+# dashboard/management/commands/train_lead_model.py
+"""
+Train the reply / sale likelihood models (pure NumPy, no services).
+
+    python manage.py train_lead_model                 # both targets
+    python manage.py train_lead_model --target sale --l2 5
+    python manage.py train_lead_model --no-activate   # store, keep the current model live
+
+Then score every lead with `manage.py predict_lead_scores`.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models import ScoringModel
+from dashboard.services.lead_model import CHUNK_SIZE, L2, train
+
+
+class Command(BaseCommand):
+    help = "Fit logistic-regression lead models and store their coefficients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=ScoringModel.Target.values, action="append",
+                            help="Outcome to model (repeatable; default: all).")
+        parser.add_argument("--l2", type=float, default=L2, help="L2 penalty on the standardised weights.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Leads read per query.")
+        parser.add_argument("--no-activate", action="store_true", help="Store the model without switching to it.")
+
+    def handle(self, *args, **options):
+        for target in options["target"] or ScoringModel.Target.values:
+            try:
+                model = train(
+                    target, l2=options["l2"], activate=not options["no_activate"], chunk_size=options["chunk_size"]
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc)) from None
+
+            m = model.metrics
+            auc = "n/a" if m["auc"] is None else f"{m['auc']:.3f}"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model}: {m['rows']} leads, {m['positives']} positive, "
+                    f"log loss {m['log_loss']:.4f}, AUC {auc}"
+                )
+            )
+            if options["verbosity"] > 1:
+                for name, weight in zip(model.features, model.coefficients):
+                    self.stdout.write(f"  {name:<18} {weight:+.4f}")
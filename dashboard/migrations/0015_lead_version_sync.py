@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+def seed_lead_versions(apps, schema_editor):
+    """Existing rows start at version 1 so a since=0 sync returns them."""
+    Lead = apps.get_model("dashboard", "Lead")
+    SyncSequence = apps.get_model("dashboard", "SyncSequence")
+    Lead.objects.update(version=1)
+    SyncSequence.objects.update_or_create(name="lead", defaults={"value": 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_lead_manual_next_ai_send_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_id', models.BigIntegerField()),
+                ('version', models.PositiveBigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['version'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Message (proxy)',
+                'verbose_name_plural': 'Messages (proxy)',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('dashboard.messagelog',),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='version',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='messagelog',
+            name='direction',
+            field=models.CharField(choices=[('OUT', 'Outgoing'), ('IN', 'Incoming')], default='OUT', max_length=10),
+        ),
+        migrations.RunPython(seed_lead_versions, migrations.RunPython.noop),
+    ]
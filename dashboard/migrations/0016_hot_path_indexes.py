@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_lead_version_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('has_replied', False), ('opted_in_for_ai', True), ('opted_out', False)), fields=['next_ai_send_at'], name='lead_ai_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['last_texted'], name='lead_last_texted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['lead', 'timestamp'], name='msg_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(condition=models.Q(('direction', 'IN'), ('read', False)), fields=['-timestamp'], name='msg_unread_in_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Frozen copy of dashboard.utils.phone.normalize_phone as of this migration,
+# so later changes to the helper can't change what the backfill does.
+DEFAULT_COUNTRY_CODE = getattr(settings, "PHONE_DEFAULT_COUNTRY_CODE", "1")
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw):
+    if not raw:
+        return None
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        return f"+{digits}" if 8 <= len(digits) <= 15 else None
+    if len(digits) == 10:
+        return f"+{DEFAULT_COUNTRY_CODE}{digits}"
+    if len(digits) == 11 and digits.startswith(DEFAULT_COUNTRY_CODE):
+        return f"+{digits}"
+    return None
+
+
+def backfill_phone_e164(apps, schema_editor):
+    """
+    Normalise every cellphone. When two legacy rows normalise to the same
+    number the oldest keeps it and the rest stay NULL until merged.
+    """
+    Lead = apps.get_model("dashboard", "Lead")
+    seen, batch = set(), []
+
+    for lead in Lead.objects.order_by("id").only("id", "cellphone").iterator(chunk_size=BATCH_SIZE):
+        e164 = normalize_phone(lead.cellphone)
+        if not e164 or e164 in seen:
+            continue
+        seen.add(e164)
+        lead.phone_e164 = e164
+        batch.append(lead)
+        if len(batch) >= BATCH_SIZE:
+            Lead.objects.bulk_update(batch, ["phone_e164"])
+            batch = []
+
+    if batch:
+        Lead.objects.bulk_update(batch, ["phone_e164"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+    ]
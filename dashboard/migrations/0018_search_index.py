@@ -0,0 +1,101 @@
+# Search index for dashboard.services.search – FTS5 on SQLite, pg_trgm on Postgres.
+
+from django.db import migrations
+
+LEAD_COLUMNS = (
+    "name",
+    "firstname",
+    "lastname",
+    "cellphone",
+    "phone_e164",
+    "email",
+    "VehicleVIN",
+    "VehicleStockNumber",
+    "vehicle_interest",
+)
+
+
+def _cols(prefix=""):
+    return ", ".join(f'{prefix}"{c}"' for c in LEAD_COLUMNS)
+
+
+SQLITE_FORWARD = [
+    # ---- leads -------------------------------------------------------
+    f"""CREATE VIRTUAL TABLE dashboard_lead_fts USING fts5(
+            {_cols()}, content='dashboard_lead', content_rowid='id', tokenize='trigram')""",
+    f"""CREATE TRIGGER dashboard_lead_fts_ai AFTER INSERT ON dashboard_lead BEGIN
+            INSERT INTO dashboard_lead_fts(rowid, {_cols()}) VALUES (new.id, {_cols('new.')});
+        END""",
+    f"""CREATE TRIGGER dashboard_lead_fts_ad AFTER DELETE ON dashboard_lead BEGIN
+            INSERT INTO dashboard_lead_fts(dashboard_lead_fts, rowid, {_cols()})
+            VALUES ('delete', old.id, {_cols('old.')});
+        END""",
+    f"""CREATE TRIGGER dashboard_lead_fts_au AFTER UPDATE OF {_cols()} ON dashboard_lead BEGIN
+            INSERT INTO dashboard_lead_fts(dashboard_lead_fts, rowid, {_cols()})
+            VALUES ('delete', old.id, {_cols('old.')});
+            INSERT INTO dashboard_lead_fts(rowid, {_cols()}) VALUES (new.id, {_cols('new.')});
+        END""",
+    "INSERT INTO dashboard_lead_fts(dashboard_lead_fts) VALUES ('rebuild')",
+    # ---- messages ----------------------------------------------------
+    """CREATE VIRTUAL TABLE dashboard_message_fts USING fts5(
+            content, content='dashboard_messagelog', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER dashboard_message_fts_ai AFTER INSERT ON dashboard_messagelog BEGIN
+            INSERT INTO dashboard_message_fts(rowid, content) VALUES (new.id, new.content);
+        END""",
+    """CREATE TRIGGER dashboard_message_fts_ad AFTER DELETE ON dashboard_messagelog BEGIN
+            INSERT INTO dashboard_message_fts(dashboard_message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END""",
+    """CREATE TRIGGER dashboard_message_fts_au AFTER UPDATE OF content ON dashboard_messagelog BEGIN
+            INSERT INTO dashboard_message_fts(dashboard_message_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO dashboard_message_fts(rowid, content) VALUES (new.id, new.content);
+        END""",
+    "INSERT INTO dashboard_message_fts(dashboard_message_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS dashboard_lead_fts_ai",
+    "DROP TRIGGER IF EXISTS dashboard_lead_fts_ad",
+    "DROP TRIGGER IF EXISTS dashboard_lead_fts_au",
+    "DROP TABLE IF EXISTS dashboard_lead_fts",
+    "DROP TRIGGER IF EXISTS dashboard_message_fts_ai",
+    "DROP TRIGGER IF EXISTS dashboard_message_fts_ad",
+    "DROP TRIGGER IF EXISTS dashboard_message_fts_au",
+    "DROP TABLE IF EXISTS dashboard_message_fts",
+]
+
+# Must match dashboard.services.search.LEAD_SEARCH_EXPR exactly
+LEAD_SEARCH_EXPR = " || ' ' || ".join(f'coalesce("{c}", \'\')' for c in LEAD_COLUMNS)
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX dashboard_lead_search_trgm ON dashboard_lead USING gin (({LEAD_SEARCH_EXPR}) gin_trgm_ops)",
+    "CREATE INDEX dashboard_messagelog_content_trgm ON dashboard_messagelog USING gin (content gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS dashboard_lead_search_trgm",
+    "DROP INDEX IF EXISTS dashboard_messagelog_content_trgm",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_lead_phone_e164'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
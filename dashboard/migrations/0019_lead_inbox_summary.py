@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def backfill_inbox_summary(apps, schema_editor):
+    """One set-based UPDATE per column; System rows never count."""
+    Lead = apps.get_model("dashboard", "Lead")
+    MessageLog = apps.get_model("dashboard", "MessageLog")
+
+    last = (
+        MessageLog.objects.filter(lead=OuterRef("pk"))
+        .exclude(source="System")
+        .order_by("-timestamp", "-id")
+    )
+    unread = (
+        MessageLog.objects.filter(lead=OuterRef("pk"), direction="IN", read=False)
+        .order_by()
+        .values("lead")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    Lead.objects.update(
+        last_message_at=Subquery(last.values("timestamp")[:1]),
+        last_message_snippet=Coalesce(Substr(Subquery(last.values("content")[:1]), 1, 160), Value("")),
+        last_message_direction=Coalesce(Subquery(last.values("direction")[:1]), Value("")),
+        unread_inbound_count=Coalesce(Subquery(unread), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0018_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='last_message_direction',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='last_message_snippet',
+            field=models.CharField(blank=True, max_length=160),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='unread_inbound_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('last_message_at__isnull', False)), fields=['-last_message_at', '-id'], name='lead_inbox_idx'),
+        ),
+        migrations.RunPython(backfill_inbox_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0019_lead_inbox_summary'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='messagelog',
+            name='msg_thread_idx',
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['lead', 'id'], name='msg_thread_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0022_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('header_signature', models.CharField(max_length=16, unique=True)),
+                ('headers', models.JSONField(default=list)),
+                ('mapping', models.JSONField(blank=True, default=dict)),
+                ('transforms', models.JSONField(blank=True, default=dict)),
+                ('date_columns', models.JSONField(blank=True, default=list)),
+                ('auto_generated', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0023_import_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadBlockKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=64)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_keys', to='dashboard.lead')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('dismissed', 'Not a duplicate')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lead_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.lead')),
+                ('lead_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.lead')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicate_review_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lead_a', 'lead_b'), name='duplicate_pair_unique')],
+            },
+        ),
+    ]
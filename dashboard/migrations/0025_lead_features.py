@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_features(apps, schema_editor):
+    """Replay the message history once; record_features() keeps it current from here."""
+    from dashboard.models import fold_message  # pure – reads/writes attributes only
+
+    LeadFeatures = apps.get_model("dashboard", "LeadFeatures")
+    MessageLog = apps.get_model("dashboard", "MessageLog")
+
+    rows = {}
+    history = (
+        MessageLog.objects.exclude(source="System")
+        .order_by("timestamp", "id")
+        .only("lead_id", "direction", "timestamp", "follow_up_stage")
+    )
+    for msg in history.iterator(chunk_size=2000):
+        fold_message(rows.setdefault(msg.lead_id, LeadFeatures(lead_id=msg.lead_id)), msg)
+    LeadFeatures.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0024_duplicate_candidates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadFeatures',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='features', serialize=False, to='dashboard.lead')),
+                ('messages_out', models.PositiveIntegerField(default=0)),
+                ('messages_in', models.PositiveIntegerField(default=0)),
+                ('last_outbound_at', models.DateTimeField(blank=True, null=True)),
+                ('last_inbound_at', models.DateTimeField(blank=True, null=True)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('avg_reply_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('last_stage', models.CharField(blank=True, max_length=50)),
+                ('stages_completed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_features, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0025_lead_features'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_at'], name='lead_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadfeatures',
+            index=models.Index(fields=['last_inbound_at'], name='features_last_in_idx'),
+        ),
+    ]
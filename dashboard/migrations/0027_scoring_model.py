@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0026_score_decay_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('reply', 'Replies'), ('sale', 'Buys')], max_length=10)),
+                ('features', models.JSONField(default=list)),
+                ('coefficients', models.JSONField(default=list)),
+                ('intercept', models.FloatField(default=0.0)),
+                ('mean', models.JSONField(default=list)),
+                ('scale', models.JSONField(default=list)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('active', models.BooleanField(default=True)),
+                ('trained_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-trained_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='reply_likelihood',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='sale_likelihood',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0027_scoring_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importprofile',
+            name='unsampled_columns',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
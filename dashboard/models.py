@@ -1,6 +1,183 @@
 # ✅ LOCKED: 2025-04-23 — Models verified working with AI messaging, regenerate prompt, and Celery task system.
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
+from django.utils import timezone
+
+from dashboard.services.lead_scoring import SCORE_INPUTS, calculate_score, decay_filter, score_expression
+from dashboard.services import send_schedule
+from dashboard.services.realtime import publish
+from dashboard.services.send_schedule import SCHEDULE_FIELDS, due_time
+from dashboard.utils.phone import normalize_phone
+
+# Lead columns whose change is pushed to open browser tabs as "lead.updated"
+PUSH_FIELDS = (
+    "new_message",
+    "has_replied",
+    "opted_in_for_ai",
+    "opted_out",
+    "ai_active",
+    "message_status",
+)
+
+
+class SyncSequence(models.Model):
+    """Named monotonic counters used to version rows for delta sync."""
+
+    name  = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+def next_lead_version() -> int:
+    """
+    Bump and return the lead change counter.
+
+    Callers must already be inside ``transaction.atomic()`` so the counter
+    row stays locked until their write commits – that keeps versions in
+    commit order and a poller can never skip a row.
+    """
+    seq = SyncSequence.objects.filter(name="lead")
+    if not seq.update(value=F("value") + 1):
+        SyncSequence.objects.get_or_create(name="lead")
+        seq.update(value=F("value") + 1)
+    return seq.values_list("value", flat=True).get()
+
+
+def _reschedules(fields) -> bool:
+    """A write of *fields* can move a lead in or out of the AI timing wheel."""
+    return not set(fields).isdisjoint(SCHEDULE_FIELDS)
+
+
+def _rescores(fields) -> bool:
+    """A write of *fields* needs a rescore: it touches a score input but not score itself."""
+    fields = set(fields)
+    return "score" not in fields and not fields.isdisjoint(SCORE_INPUTS)
+
+
+class LeadQuerySet(models.QuerySet):
+    """Stamps a fresh change version on every bulk write / delete."""
+
+    # ------------------------------------------------------------------
+    # Hot-path lookups – each one is backed by an index in Lead.Meta and
+    # EXPLAINed by `manage.py check_query_plans`.
+    # ------------------------------------------------------------------
+    def due_for_ai(self, now):
+        """Leads the AI dispatcher should text now (lead_ai_due_idx)."""
+        return self.filter(
+            opted_in_for_ai=True, opted_out=False, has_replied=False
+        ).filter(
+            Q(next_ai_send_at__lte=now) | Q(next_ai_send_at__isnull=True)
+        ).order_by("next_ai_send_at")
+
+    def scheduled(self):
+        """Leads with an AI follow-up scheduled – the members of the timing wheel (lead_ai_due_idx)."""
+        return self.filter(
+            opted_in_for_ai=True, opted_out=False, has_replied=False, next_ai_send_at__isnull=False
+        )
+
+    def due_by(self, until):
+        """Leads with an AI follow-up scheduled at or before *until*, soonest first (lead_ai_due_idx)."""
+        return self.scheduled().filter(next_ai_send_at__lte=until).order_by("next_ai_send_at")
+
+    def crossed_decay(self, since, now):
+        """Leads a time-based scoring rule flipped for between *since* and *now*."""
+        return self.filter(decay_filter(since, now))
+
+    def rescore(self, chunk_size=5000) -> int:
+        """
+        Recompute ``score`` for these leads in SQL – one
+        ``UPDATE … SET score = CASE …`` per *chunk_size* ids, touching only
+        rows whose score actually changes. Returns rows changed.
+        """
+        now, changed, last = timezone.now(), 0, 0
+        ids = self.order_by("id").values_list("id", flat=True)
+        while True:
+            chunk = list(ids.filter(id__gt=last)[:chunk_size])
+            if not chunk:
+                return changed
+            score = score_expression(now)
+            changed += self.model.objects.filter(id__in=chunk).exclude(score=score).update(score=score)
+            last = chunk[-1]
+
+    def mirror_schedule(self):
+        """Copy these leads' AI due times into the Redis timing wheel after commit."""
+        rows = self.values_list("id", *SCHEDULE_FIELDS)
+        send_schedule.mirror_on_commit((row[0], due_time(*row[1:])) for row in rows)
+
+    def _mirror_written(self, version, fields, inserted=False):
+        """Mirror the rows just written as *version* when *fields* touch the schedule."""
+        if not _reschedules(fields):
+            return
+        written = self.model.objects.filter(version=version)
+        if inserted or "next_ai_send_at" not in fields:
+            # a lead without a due time can't be in the wheel yet
+            written = written.filter(next_ai_send_at__isnull=False)
+        written.mirror_schedule()
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            kwargs.setdefault("version", next_lead_version())
+            kwargs.setdefault("updated_at", timezone.now())
+            rows = super().update(**kwargs)
+            if rows and _rescores(kwargs):
+                # every row just written carries this version
+                self.model.objects.filter(version=kwargs["version"]).rescore()
+            if rows:
+                self._mirror_written(kwargs["version"], kwargs)
+
+            pushed = [f for f in PUSH_FIELDS if f in kwargs]
+            if rows and pushed:
+                # lead ids unknown here – clients catch up via /api/leads/changes/
+                publish("lead.updated", {"lead_id": None, "version": kwargs["version"], "fields": pushed})
+            return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        if kwargs.get("update_conflicts"):
+            # upserted rows must reach delta-sync clients too
+            kwargs["update_fields"] = [*kwargs.get("update_fields", ()), "version", "updated_at"]
+        with transaction.atomic(using=self.db):
+            version = next_lead_version()
+            for obj in objs:
+                obj.version = version
+                if obj.phone_e164 is None:
+                    obj.phone_e164 = normalize_phone(obj.cellphone)
+                if not obj.score:
+                    obj.score = calculate_score(obj)
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get("update_conflicts") and _rescores(kwargs["update_fields"]):
+                # conflicting rows kept their other inputs – rescore them from the table
+                self.model.objects.filter(version=version).rescore()
+            if kwargs.get("update_conflicts"):
+                self._mirror_written(version, kwargs["update_fields"])
+            else:
+                self._mirror_written(version, SCHEDULE_FIELDS, inserted=True)
+            return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            version, now = next_lead_version(), timezone.now()
+            for obj in objs:
+                obj.version, obj.updated_at = version, now
+            rows = super().bulk_update(objs, [*fields, "version", "updated_at"], *args, **kwargs)
+            if rows and _rescores(fields):
+                self.model.objects.filter(version=version).rescore()
+            if rows:
+                self._mirror_written(version, fields)
+            return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list("id", flat=True))
+            result = super().delete()
+            LeadTombstone.record(ids)
+            send_schedule.mirror_on_commit((lead_id, None) for lead_id in ids)
+            return result
 
 
 class Lead(models.Model):
@@ -18,6 +195,7 @@ class Lead(models.Model):
     dayphone    = models.CharField(max_length=20, blank=True)
     evephone    = models.CharField(max_length=20, blank=True)
     cellphone   = models.CharField(max_length=20, unique=True)
+    phone_e164  = models.CharField(max_length=16, unique=True, null=True, blank=True, editable=False)
 
     # ------------------------------------------------------------------
     # Address Info
@@ -82,9 +260,20 @@ class Lead(models.Model):
     # Lead quality & runtime flags
     # ------------------------------------------------------------------
     score             = models.PositiveSmallIntegerField(default=0)
+    # 0–100 model predictions, written in batch by `manage.py predict_lead_scores`
+    reply_likelihood  = models.PositiveSmallIntegerField(null=True, blank=True)
+    sale_likelihood   = models.PositiveSmallIntegerField(null=True, blank=True)
     has_replied       = models.BooleanField(default=False)
     new_message       = models.BooleanField(default=False)
 
+    # ------------------------------------------------------------------
+    # Conversation summary (denormalised from MessageLog for the inbox)
+    # ------------------------------------------------------------------
+    last_message_at        = models.DateTimeField(null=True, blank=True)
+    last_message_snippet   = models.CharField(max_length=160, blank=True)
+    last_message_direction = models.CharField(max_length=10, blank=True)
+    unread_inbound_count   = models.PositiveIntegerField(default=0)
+
     # ------------------------------------------------------------------
     # Catch‑all JSON for future CSV columns
     # ------------------------------------------------------------------
@@ -94,13 +283,115 @@ class Lead(models.Model):
     # Metadata
     # ------------------------------------------------------------------
     created_at        = models.DateTimeField(auto_now_add=True)
+    updated_at        = models.DateTimeField(auto_now=True)
+    version           = models.PositiveBigIntegerField(default=0, db_index=True)
+
+    objects = LeadQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["next_ai_send_at"],
+                name="lead_ai_due_idx",
+                condition=Q(opted_in_for_ai=True, opted_out=False, has_replied=False),
+            ),
+            models.Index(fields=["last_texted"], name="lead_last_texted_idx"),
+            models.Index(fields=["created_at"], name="lead_created_idx"),
+            models.Index(
+                fields=["-last_message_at", "-id"],
+                name="lead_inbox_idx",
+                condition=Q(last_message_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.firstname} {self.lastname} – {self.cellphone}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_flags = instance._push_state()
+        instance._loaded_cellphone = instance.__dict__.get("cellphone")
+        instance._loaded_score = instance._score_state()
+        instance._loaded_schedule = instance._schedule_state()
+        return instance
+
+    def _push_state(self):
+        return {f: self.__dict__.get(f) for f in PUSH_FIELDS}
+
+    def _schedule_state(self):
+        return {f: self.__dict__.get(f) for f in SCHEDULE_FIELDS}
+
+    @property
+    def ai_due_at(self):
+        """When this lead is due an AI text (its score in the timing wheel), or None."""
+        return due_time(*(getattr(self, f) for f in SCHEDULE_FIELDS))
+
+    def _score_state(self):
+        return {f: self.__dict__.get(f) for f in (*SCORE_INPUTS, "score")}
+
+    def _needs_rescore(self, update_fields) -> bool:
+        """A score input is being written and the caller didn't set ``score`` itself."""
+        if update_fields is not None:
+            return _rescores(update_fields)
+        if self._state.adding:
+            return not self.score
+        before, after = getattr(self, "_loaded_score", None), self._score_state()
+        if before is None or before["score"] != after["score"]:
+            return False
+        return any(before[f] != after[f] for f in SCORE_INPUTS)
+
+    def save(self, *args, **kwargs):
+        """
+        Every save bumps ``version`` so /api/leads/changes/ picks it up,
+        re-normalises ``phone_e164`` when the cellphone is new or edited,
+        rescores the lead when a score input changed and mirrors its due
+        time into the AI timing wheel when that moved.
+        """
+        update_fields = kwargs.get("update_fields")
+        if self._needs_rescore(update_fields):
+            self.score = calculate_score(self)
+            if update_fields is not None:
+                update_fields = {*update_fields, "score"}
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields = {*update_fields, "version", "updated_at"}
+
+        cellphone_written = update_fields is None or "cellphone" in update_fields
+        cellphone_changed = self._state.adding or self.cellphone != getattr(self, "_loaded_cellphone", None)
+        if cellphone_written and cellphone_changed:
+            self.phone_e164 = normalize_phone(self.cellphone)
+            if update_fields is not None:
+                update_fields.add("phone_e164")
+
+        with transaction.atomic(using=kwargs.get("using")):
+            self.version = next_lead_version()
+            super().save(*args, **kwargs)
+
+            before = getattr(self, "_loaded_flags", None)
+            after = self._push_state()
+            changed = [f for f in PUSH_FIELDS if before and before[f] != after[f]]
+            if changed:
+                publish("lead.updated", {"lead_id": self.id, "version": self.version, "fields": changed})
+            schedule = self._schedule_state()
+            loaded = getattr(self, "_loaded_schedule", None)
+            schedule_written = update_fields is None or _reschedules(update_fields)
+            if schedule_written and schedule != loaded and (loaded is not None or self.next_ai_send_at):
+                send_schedule.mirror_on_commit([(self.id, self.ai_due_at)])
+
+            self._loaded_flags = after
+            self._loaded_cellphone = self.cellphone
+            self._loaded_score = self._score_state()
+            self._loaded_schedule = schedule
+
+    def delete(self, *args, **kwargs):
+        lead_id = self.id
+        with transaction.atomic(using=kwargs.get("using")):
+            result = super().delete(*args, **kwargs)
+            LeadTombstone.record([lead_id])
+            send_schedule.mirror_on_commit([(lead_id, None)])
+            return result
+
     def to_dict(self):
         """Return a dict ready for JSON serialization for the React UI."""
         return {
@@ -128,6 +419,169 @@ class Lead(models.Model):
         }
 
 
+SNIPPET_LENGTH = 160
+
+
+def touch_conversations(messages) -> None:
+    """
+    Fold newly inserted *messages* into each lead's inbox summary columns.
+
+    System prompt rows are audit-only and never show up in the inbox.
+    """
+    latest, unread = {}, {}
+    for msg in messages:
+        if msg.source == "System":
+            continue
+        if msg.lead_id not in latest or msg.timestamp >= latest[msg.lead_id].timestamp:
+            latest[msg.lead_id] = msg
+        if msg.direction == MessageLog.Direction.INBOUND and not msg.read:
+            unread[msg.lead_id] = unread.get(msg.lead_id, 0) + 1
+
+    for lead_id, msg in latest.items():
+        # a backfilled / late message counts as unread but never moves the summary back
+        newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=msg.timestamp)
+
+        def unless_older(field, value):
+            return Case(When(newer, then=Value(value)), default=F(field), output_field=Lead._meta.get_field(field))
+
+        Lead.objects.filter(pk=lead_id).update(
+            last_message_at=unless_older("last_message_at", msg.timestamp),
+            last_message_snippet=unless_older("last_message_snippet", msg.content[:SNIPPET_LENGTH]),
+            last_message_direction=unless_older("last_message_direction", msg.direction),
+            unread_inbound_count=F("unread_inbound_count") + unread.get(lead_id, 0),
+        )
+
+
+def recount_unread(lead_ids) -> None:
+    """Recompute unread_inbound_count for *lead_ids* after messages are marked read."""
+    unread = (
+        MessageLog.objects.filter(lead=OuterRef("pk"), direction="IN", read=False)
+        .order_by()
+        .values("lead")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    Lead.objects.filter(pk__in=lead_ids).update(
+        unread_inbound_count=Coalesce(Subquery(unread), Value(0))
+    )
+
+
+def refresh_conversations(lead_ids) -> None:
+    """Rebuild every inbox summary column for *lead_ids* from MessageLog (set-based)."""
+    last = (
+        MessageLog.objects.filter(lead=OuterRef("pk"))
+        .exclude(source="System")
+        .order_by("-timestamp", "-id")
+    )
+    Lead.objects.filter(pk__in=lead_ids).update(
+        last_message_at=Subquery(last.values("timestamp")[:1]),
+        last_message_snippet=Coalesce(Substr(Subquery(last.values("content")[:1]), 1, SNIPPET_LENGTH), Value("")),
+        last_message_direction=Coalesce(Subquery(last.values("direction")[:1]), Value("")),
+    )
+    recount_unread(lead_ids)
+
+
+FEATURE_FIELDS = (
+    "messages_out",
+    "messages_in",
+    "last_outbound_at",
+    "last_inbound_at",
+    "replies",
+    "avg_reply_seconds",
+    "last_stage",
+    "stages_completed",
+)
+
+
+def fold_message(features, msg) -> None:
+    """Advance one LeadFeatures row by one message (in timestamp order)."""
+    if msg.direction == MessageLog.Direction.INBOUND:
+        features.messages_in += 1
+        awaiting = features.last_outbound_at and (
+            features.last_inbound_at is None or features.last_inbound_at < features.last_outbound_at
+        )
+        if awaiting:
+            latency = max(0, (msg.timestamp - features.last_outbound_at).total_seconds())
+            total = (features.avg_reply_seconds or 0) * features.replies + latency
+            features.replies += 1
+            features.avg_reply_seconds = round(total / features.replies)
+        features.last_inbound_at = max(filter(None, (features.last_inbound_at, msg.timestamp)))
+    else:
+        features.messages_out += 1
+        features.last_outbound_at = max(filter(None, (features.last_outbound_at, msg.timestamp)))
+        if msg.follow_up_stage and msg.follow_up_stage != features.last_stage:
+            features.stages_completed += 1
+            features.last_stage = msg.follow_up_stage
+
+
+def record_features(messages) -> None:
+    """
+    Fold newly inserted *messages* into each lead's LeadFeatures row and
+    rescore those leads. System prompt rows are not conversation.
+    """
+    messages = sorted((m for m in messages if m.source != "System"), key=lambda m: (m.timestamp, m.pk))
+    lead_ids = {m.lead_id for m in messages}
+    if not lead_ids:
+        return
+
+    LeadFeatures.objects.bulk_create([LeadFeatures(lead_id=i) for i in lead_ids], ignore_conflicts=True)
+    rows = {f.lead_id: f for f in LeadFeatures.objects.select_for_update().filter(lead_id__in=lead_ids)}
+    for msg in messages:
+        fold_message(rows[msg.lead_id], msg)
+    now = timezone.now()
+    for features in rows.values():
+        features.updated_at = now
+    LeadFeatures.objects.bulk_update(rows.values(), [*FEATURE_FIELDS, "updated_at"])
+    Lead.objects.filter(pk__in=lead_ids).rescore()
+
+
+def rebuild_features(lead_ids) -> None:
+    """Replay MessageLog into LeadFeatures for *lead_ids* (after a merge or a backfill)."""
+    lead_ids = list(lead_ids)
+    LeadFeatures.objects.filter(lead_id__in=lead_ids).delete()
+    rows = {}
+    history = (
+        MessageLog.objects.filter(lead_id__in=lead_ids)
+        .exclude(source="System")
+        .order_by("timestamp", "id")
+        .only("lead_id", "direction", "timestamp", "follow_up_stage")
+    )
+    for msg in history.iterator(chunk_size=2000):
+        features = rows.setdefault(msg.lead_id, LeadFeatures(lead_id=msg.lead_id))
+        fold_message(features, msg)
+    LeadFeatures.objects.bulk_create(rows.values(), batch_size=500)
+    Lead.objects.filter(pk__in=lead_ids).rescore()
+
+
+class MessageLogQuerySet(models.QuerySet):
+    """Hot-path lookups – keep in step with MessageLog.Meta.indexes."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            touch_conversations(created)
+            record_features(created)
+            return created
+
+    def update(self, **kwargs):
+        if "read" not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            lead_ids = set(self.order_by().values_list("lead_id", flat=True).distinct())
+            rows = super().update(**kwargs)
+            recount_unread(lead_ids)
+            return rows
+
+    def unread_inbound(self):
+        """Unread customer replies, newest first (msg_unread_in_idx)."""
+        return self.filter(direction="IN", read=False).order_by("-timestamp")
+
+    def thread(self, lead_id):
+        """One lead's conversation without System rows, oldest first (msg_thread_idx)."""
+        return self.filter(lead_id=lead_id).exclude(source="System").order_by("id")
+
+
 class MessageLog(models.Model):
     class Direction(models.TextChoices):
         OUTBOUND = "OUT", "Outgoing"
@@ -153,12 +607,111 @@ class MessageLog(models.Model):
     delivery_status = models.CharField(max_length=50, blank=True, null=True)
     follow_up_stage = models.CharField(max_length=50, blank=True, null=True)
 
+    objects = MessageLogQuerySet.as_manager()
+
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["lead", "id"], name="msg_thread_idx"),
+            models.Index(
+                fields=["-timestamp"],
+                name="msg_unread_in_idx",
+                condition=Q(direction="IN", read=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.lead.name} – {self.source} @ {self.timestamp:%Y‑%m‑%d %H:%M}"
 
+    def save(self, *args, **kwargs):
+        """New rows update the lead's inbox summary and features in the same transaction."""
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            if adding:
+                touch_conversations([self])
+                record_features([self])
+
+
+class LeadFeatures(models.Model):
+    """
+    Conversation signals for scoring, kept current by record_features() as
+    messages are logged (System rows excluded).
+
+    replies            – inbound messages that answered an outbound one
+    avg_reply_seconds  – mean time from our message to that answer
+    stages_completed   – follow-up stages we have texted the lead in
+    """
+
+    lead              = models.OneToOneField(Lead, on_delete=models.CASCADE, primary_key=True, related_name="features")
+    messages_out      = models.PositiveIntegerField(default=0)
+    messages_in       = models.PositiveIntegerField(default=0)
+    last_outbound_at  = models.DateTimeField(null=True, blank=True)
+    last_inbound_at   = models.DateTimeField(null=True, blank=True)
+    replies           = models.PositiveIntegerField(default=0)
+    avg_reply_seconds = models.PositiveIntegerField(null=True, blank=True)
+    last_stage        = models.CharField(max_length=50, blank=True)
+    stages_completed  = models.PositiveIntegerField(default=0)
+    updated_at        = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["last_inbound_at"], name="features_last_in_idx")]
+
+    def __str__(self):
+        return f"Lead {self.lead_id}: {self.messages_out} out / {self.messages_in} in"
+
+
+class ScoringModel(models.Model):
+    """
+    A trained logistic-regression lead model (see dashboard.services.lead_model).
+    Inference uses the newest active model per target.
+
+    features      – feature names, in coefficient order
+    mean / scale  – standardisation applied before the dot product
+    metrics       – training-set stats (rows, positives, log loss, AUC)
+    """
+
+    class Target(models.TextChoices):
+        REPLY = "reply", "Replies"
+        SALE  = "sale", "Buys"
+
+    target       = models.CharField(max_length=10, choices=Target.choices)
+    features     = models.JSONField(default=list)
+    coefficients = models.JSONField(default=list)
+    intercept    = models.FloatField(default=0.0)
+    mean         = models.JSONField(default=list)
+    scale        = models.JSONField(default=list)
+    metrics      = models.JSONField(default=dict, blank=True)
+    active       = models.BooleanField(default=True)
+    trained_at   = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-trained_at"]
+
+    def __str__(self):
+        return f"{self.get_target_display()} model #{self.pk} ({self.trained_at:%Y-%m-%d})"
+
+
+class LeadTombstone(models.Model):
+    """Marker left behind when a lead is deleted, so delta-sync clients drop it."""
+
+    lead_id    = models.BigIntegerField()
+    version    = models.PositiveBigIntegerField(db_index=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["version"]
+
+    def __str__(self):
+        return f"Lead {self.lead_id} deleted @ v{self.version}"
+
+    @classmethod
+    def record(cls, lead_ids):
+        if not lead_ids:
+            return
+        version = next_lead_version()
+        cls.objects.bulk_create(cls(lead_id=i, version=version) for i in lead_ids)
+
 
 class ScheduledEvent(models.Model):
     lead          = models.ForeignKey(Lead, on_delete=models.CASCADE)
@@ -173,6 +726,186 @@ class ScheduledEvent(models.Model):
         return f"{self.lead.name} – {self.event_type} @ {self.scheduled_for:%Y‑%m‑%d %H:%M}"
 
 
+class ExportJob(models.Model):
+    """
+    A background lead export (see dashboard.tasks.export_jobs).
+
+    last_id / partial_bytes – checkpoint: last lead written and the size of
+                    the ``.part`` file at that point
+    heartbeat_at  – when the running worker last checkpointed
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE    = "done", "Done"
+        FAILED  = "failed", "Failed"
+
+    class Format(models.TextChoices):
+        CSV    = "csv", "CSV"
+        NDJSON = "ndjson", "NDJSON"
+
+    status           = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    format           = models.CharField(max_length=10, choices=Format.choices, default=Format.CSV)
+    fields           = models.JSONField(default=list)
+    filters          = models.JSONField(default=dict, blank=True)
+    include_messages = models.BooleanField(default=False)
+    total_rows       = models.PositiveIntegerField(default=0)
+    processed_rows   = models.PositiveIntegerField(default=0)
+    last_id          = models.PositiveBigIntegerField(default=0)
+    partial_bytes    = models.PositiveBigIntegerField(default=0)
+    file_path        = models.CharField(max_length=255, blank=True)
+    error            = models.TextField(blank=True)
+    created_at       = models.DateTimeField(auto_now_add=True)
+    heartbeat_at     = models.DateTimeField(null=True, blank=True)
+    finished_at      = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Export #{self.pk} ({self.format}, {self.status})"
+
+    @property
+    def progress(self) -> int:
+        """Percentage of matching leads written so far."""
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.processed_rows * 100 // self.total_rows)
+
+
+class ImportProfile(models.Model):
+    """
+    How one CRM export's columns map onto Lead, found by the hash of its
+    header row (see dashboard.services.import_profiles).
+
+    mapping       – {source header: Lead field}; unmapped headers go to extra_data
+    transforms    – {source header: transform name} applied before the field cleaner
+    date_columns  – [[source header, strptime format], …] in appointment priority
+    unsampled_columns – headers that were empty in every sample so far; their
+                    date check is retried on the next upload
+    """
+
+    name             = models.CharField(max_length=255, blank=True)
+    header_signature = models.CharField(max_length=16, unique=True)
+    headers          = models.JSONField(default=list)
+    mapping          = models.JSONField(default=dict, blank=True)
+    transforms       = models.JSONField(default=dict, blank=True)
+    date_columns     = models.JSONField(default=list, blank=True)
+    unsampled_columns = models.JSONField(default=list, blank=True)
+    auto_generated   = models.BooleanField(default=True)
+    created_at       = models.DateTimeField(auto_now_add=True)
+    updated_at       = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-updated_at"]
+
+    def __str__(self):
+        return self.name or f"Profile {self.header_signature}"
+
+
+class ImportJob(models.Model):
+    """
+    A background CSV lead import (see dashboard.tasks.import_jobs).
+
+    ``processed_rows`` is the checkpoint: it is written in the same
+    transaction as each batch's upsert, so a restarted task resumes right
+    after the last committed batch.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE    = "done", "Done"
+        FAILED  = "failed", "Failed"
+
+    status         = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    original_name  = models.CharField(max_length=255, blank=True)
+    file_path      = models.CharField(max_length=255)
+    total_rows     = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count  = models.PositiveIntegerField(default=0)
+    updated_count  = models.PositiveIntegerField(default=0)
+    failed_count   = models.PositiveIntegerField(default=0)
+    error          = models.TextField(blank=True)
+    created_at     = models.DateTimeField(auto_now_add=True)
+    finished_at    = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Import #{self.pk} {self.original_name} ({self.status})"
+
+    @property
+    def progress(self) -> int:
+        """Percentage of data rows processed so far."""
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.processed_rows * 100 // self.total_rows)
+
+
+class ImportReject(models.Model):
+    """One CSV row an ImportJob could not import, and why."""
+
+    job    = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name="rejects")
+    row    = models.PositiveIntegerField()
+    reason = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ["job", "row"]
+
+    def __str__(self):
+        return f"Import #{self.job_id} row {self.row}: {self.reason}"
+
+
+class LeadBlockKey(models.Model):
+    """
+    One blocking key of a lead ("email:ann", "vin:1HGCM…", …). Leads that
+    share a key are compared for duplicates (see dashboard.services.lead_dedupe).
+    """
+
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name="block_keys")
+    key  = models.CharField(max_length=64, db_index=True)
+
+    def __str__(self):
+        return f"Lead {self.lead_id}: {self.key}"
+
+
+class DuplicateCandidate(models.Model):
+    """
+    A scored pair of leads that look like the same customer; lead_a is
+    always the lower id. Reviewed in the admin or merged by
+    ``manage.py find_duplicates --auto-merge``.
+    """
+
+    class Status(models.TextChoices):
+        PENDING   = "pending", "Pending"
+        DISMISSED = "dismissed", "Not a duplicate"
+
+    lead_a     = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name="+")
+    lead_b     = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name="+")
+    score      = models.FloatField()
+    reasons    = models.JSONField(default=list)
+    status     = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-score"]
+        constraints = [
+            models.UniqueConstraint(fields=["lead_a", "lead_b"], name="duplicate_pair_unique"),
+        ]
+        indexes = [models.Index(fields=["status", "-score"], name="duplicate_review_idx")]
+
+    def __str__(self):
+        return f"Lead {self.lead_a_id} ≈ {self.lead_b_id} ({self.score:.2f})"
+
+
 # ------------------------------------------------------------------
 # Backwards‑compatibility alias for legacy imports
 # ------------------------------------------------------------------
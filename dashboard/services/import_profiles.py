@@ -0,0 +1,279 @@
+# dashboard/services/import_profiles.py
+"""
+Import mapping profiles: which CSV column feeds which Lead field.
+
+Every dealer CRM names its columns differently. A profile is stored per
+header signature (column_types.header_signature), so the first upload of a
+new export auto-generates one – exact / case-insensitive / alias matches
+plus inferred date columns – and every later upload of the same export
+reuses it, including any corrections made in the admin. A column that was
+empty in every sample row has no verdict yet; later uploads check it again
+and add it to the date columns once it turns out to hold dates.
+
+``compile_profile()`` turns a profile into a plain function once per
+import. All per-column decisions (target field, transform, cleaner, date
+format) are made there, so the per-row work is a handful of dict lookups.
+
+Usage
+-----
+    from dashboard.services.import_profiles import compile_profile, profile_for
+
+    profile   = profile_for(reader.fieldnames, sample_rows)
+    transform = compile_profile(profile)
+    lead_data = transform(row)        # ValueError → reject the row
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from dashboard.models import ImportProfile, Lead
+from dashboard.services.column_types import (
+    APPOINTMENT_HEADER,
+    header_signature,
+    infer_date_columns,
+    parse_date,
+)
+from dashboard.utils.phone import normalize_phone
+
+# Columns a CSV may never write – identity, bookkeeping and derived state
+PROTECTED_FIELDS = {
+    "id",
+    "phone_e164",
+    "extra_data",
+    "created_at",
+    "updated_at",
+    "version",
+    "last_message_at",
+    "last_message_snippet",
+    "last_message_direction",
+    "unread_inbound_count",
+    "reply_likelihood",
+    "sale_likelihood",
+}
+
+IMPORTABLE_FIELDS = {
+    f.name: f for f in Lead._meta.concrete_fields if f.name not in PROTECTED_FIELDS
+}
+
+# Dealer exports spell booleans every possible way
+TRUE_VALUES  = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]")
+_NON_DIGITS = re.compile(r"\D")
+
+# Common CRM spellings that don't squash to a Lead field name
+HEADER_ALIASES = {
+    "cell": "cellphone",
+    "mobile": "cellphone",
+    "mobilephone": "cellphone",
+    "emailaddress": "email",
+    "zip": "postalcode",
+    "zipcode": "postalcode",
+    "vin": "VehicleVIN",
+    "stock": "VehicleStockNumber",
+    "stocknumber": "VehicleStockNumber",
+}
+
+# Named value transforms a profile can apply before the field cleaner
+TRANSFORMS: Dict[str, Callable[[str], str]] = {
+    "upper": str.upper,
+    "lower": str.lower,
+    "title": str.title,
+    "digits": lambda v: _NON_DIGITS.sub("", v),
+    "squash_spaces": lambda v: " ".join(v.split()),
+}
+
+RowTransform = Callable[[Dict[str, str]], Dict]
+
+_TEXT_TYPES = ("CharField", "TextField", "EmailField")
+_DATE_TYPES = ("DateTimeField", "DateField")
+
+
+def _squash(header: str) -> str:
+    return _NON_ALNUM.sub("", header.lower())
+
+
+_SQUASHED_FIELDS = {_squash(name): name for name in IMPORTABLE_FIELDS}
+
+
+# ----------------------------------------------------------------------
+#  Profile lookup / auto-generation
+# ----------------------------------------------------------------------
+def default_mapping(headers: Sequence[str]) -> Dict[str, str]:
+    """Map each header to the Lead field it obviously names (first claim wins)."""
+    mapping, taken = {}, set()
+    for header in headers:
+        target = (
+            header if header in IMPORTABLE_FIELDS
+            else _SQUASHED_FIELDS.get(_squash(header)) or HEADER_ALIASES.get(_squash(header))
+        )
+        if target and target not in taken:
+            mapping[header] = target
+            taken.add(target)
+    return mapping
+
+
+def _unsampled(headers: Sequence[str], sample_rows: List[Dict[str, str]]) -> List[str]:
+    """Headers with no non-empty value in *sample_rows*."""
+    return [h for h in headers if not any((row.get(h) or "").strip() for row in sample_rows)]
+
+
+def _infer_unsampled(profile: ImportProfile, sample_rows: List[Dict[str, str]]) -> None:
+    """Run date inference on the profile's still-empty columns and store any verdicts."""
+    pending = profile.unsampled_columns
+    still_empty = _unsampled(pending, sample_rows)
+    if len(still_empty) == len(pending):
+        return
+
+    found = [list(item) for item in infer_date_columns(pending, sample_rows)]
+    # appointment-named columns stay ahead of the rest (stable, so admin order holds)
+    profile.date_columns = sorted(
+        profile.date_columns + found, key=lambda item: not APPOINTMENT_HEADER.search(item[0])
+    )
+    profile.unsampled_columns = still_empty
+    profile.save(update_fields=["date_columns", "unsampled_columns", "updated_at"])
+
+
+def profile_for(headers: Sequence[str], sample_rows: List[Dict[str, str]]) -> ImportProfile:
+    """Return the stored profile for this header row, creating one if it's new."""
+    headers = list(headers or [])
+    if not headers:
+        raise ValueError("CSV has no header row")
+
+    signature = header_signature(headers)
+    profile = ImportProfile.objects.filter(header_signature=signature).first()
+    if profile is not None:
+        if profile.unsampled_columns:
+            _infer_unsampled(profile, sample_rows)
+        return profile
+
+    profile = ImportProfile(
+        header_signature=signature,
+        headers=headers,
+        mapping=default_mapping(headers),
+        date_columns=[list(item) for item in infer_date_columns(headers, sample_rows)],
+        unsampled_columns=_unsampled(headers, sample_rows),
+    )
+    try:
+        with transaction.atomic():
+            profile.save()
+    except IntegrityError:  # a concurrent upload of the same export won
+        profile = ImportProfile.objects.get(header_signature=signature)
+    return profile
+
+
+# ----------------------------------------------------------------------
+#  Compilation
+# ----------------------------------------------------------------------
+def _cleaner(field, transform: Optional[Callable[[str], str]], fmt: Optional[str]) -> Callable[[str], object]:
+    """Build the str → Python value converter for one column."""
+    kind = field.get_internal_type()
+    name = field.name
+    if field.null:
+        blank = None
+    elif kind in _TEXT_TYPES:
+        blank = ""
+    else:
+        blank = field.get_default()
+
+    def clean(value: str):
+        if transform is not None:
+            value = transform(value)
+        if not value:
+            return blank
+        if kind == "BooleanField":
+            flag = value.lower()
+            if flag not in TRUE_VALUES and flag not in FALSE_VALUES:
+                raise ValueError(f"{name}: {value!r} is not yes/no")
+            return flag in TRUE_VALUES
+        if fmt and kind in _DATE_TYPES:
+            parsed = parse_date(value, fmt)
+            if parsed is None:
+                raise ValueError(f"{name}: {value!r} does not match {fmt}")
+            if kind == "DateField":
+                return parsed.date()
+            return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+        if field.max_length and len(value) > field.max_length:
+            raise ValueError(f"{name}: longer than {field.max_length} characters")
+        try:
+            return field.to_python(value)
+        except ValidationError as exc:
+            raise ValueError(f"{name}: {'; '.join(exc.messages)}") from None
+
+    return clean
+
+
+def compile_profile(profile: ImportProfile) -> RowTransform:
+    """
+    Turn *profile* into ``transform(row) -> lead_data`` for upsert_batch.
+
+    Raises ValueError up front when the profile itself is unusable (unknown
+    field or transform, no cellphone column) so an import fails fast instead
+    of rejecting every row.
+    """
+    dates = {header: fmt for header, fmt in profile.date_columns}
+    plan, extras, sources = [], [], {}
+    for header in profile.headers:
+        name = profile.transforms.get(header)
+        if name and name not in TRANSFORMS:
+            raise ValueError(f"Profile {profile.pk}: unknown transform {name!r} for {header!r}")
+        fn = TRANSFORMS.get(name)
+
+        target = profile.mapping.get(header)
+        if not target:
+            extras.append((header, fn))
+            continue
+        field = IMPORTABLE_FIELDS.get(target)
+        if field is None:
+            raise ValueError(f"Profile {profile.pk}: {header!r} maps to unknown field {target!r}")
+        if target in sources:
+            raise ValueError(f"Profile {profile.pk}: {sources[target]!r} and {header!r} both map to {target}")
+        sources[target] = header
+        plan.append((header, target, _cleaner(field, fn, dates.get(header))))
+
+    phone_column = sources.get("cellphone")
+    if phone_column is None:
+        raise ValueError(f"Profile {profile.pk}: no column maps to cellphone – fix it in the admin")
+
+    has_vehicle = "VehicleMake" in sources or "VehicleModel" in sources
+    # only appointment-named columns – a created / sold date is not an appointment
+    appointment = [(header, fmt) for header, fmt in profile.date_columns if APPOINTMENT_HEADER.search(header)]
+
+    def transform(row: Dict[str, str]) -> Dict:
+        raw_phone = (row.get(phone_column) or "").strip()
+        phone_e164 = normalize_phone(raw_phone)
+        if not phone_e164:
+            raise ValueError(f"invalid cellphone {raw_phone!r}")
+
+        data = {"phone_e164": phone_e164}
+        for header, target, clean in plan:
+            data[target] = clean((row.get(header) or "").strip())
+
+        extra = {}
+        for header, fn in extras:
+            value = (row.get(header) or "").strip()
+            extra[header] = fn(value) if fn else value
+
+        # 🚗 Vehicle detection
+        if has_vehicle:
+            year, make, model = (data.get(f) or "" for f in ("VehicleYear", "VehicleMake", "VehicleModel"))
+            if make or model:
+                data["vehicle_interest"] = f"{year} {make} {model}".strip()
+
+        # 📅 Appointment detection
+        for header, fmt in appointment:
+            value = (row.get(header) or "").strip()
+            parsed = parse_date(value, fmt) if value else None
+            if parsed is not None:
+                extra["appointment_time"] = str(parsed)
+                break
+
+        data["extra_data"] = extra
+        return data
+
+    return transform
@@ -0,0 +1,317 @@
+# dashboard/services/lead_dedupe.py
+"""
+Fuzzy duplicate detection with blocking keys.
+
+Comparing every lead with every other lead is O(n²). Instead each lead gets
+a few cheap *blocking keys* – stored in LeadBlockKey and indexed – and only
+leads that share a key are compared:
+
+    email:<local part>      ann.smith+promo@gmail.com → email:annsmith
+    name:<soundex pair>     Ann Smith / Anne Smyth     → name:A500S530
+    vin:<VIN>               1hgcm82633a004352          → vin:1HGCM82633A004352
+    tel:<last 7 digits>     (555) 010-1234, 555-0101234 → tel:0101234
+
+Blocks bigger than MAX_BLOCK ("info@", "J500S530") are skipped – they say
+nothing about identity and would bring the quadratic cost back.
+
+Pairs are scored by score_pair() and kept in DuplicateCandidate when the
+score reaches MIN_SCORE. The work is incremental: refresh_candidates() only
+re-keys and re-compares leads whose ``version`` moved since the last run
+(the "dedupe" SyncSequence holds the high-water mark), so the periodic task
+stays cheap as new leads arrive.
+
+Usage
+-----
+    from dashboard.services.lead_dedupe import auto_merge, refresh_candidates
+
+    refresh_candidates()                  # {"leads": 120, "candidates": 7}
+    refresh_candidates(rebuild=True)      # re-key and re-compare everything
+    auto_merge(min_score=0.95)            # {"groups": 3, "losers": 4, …}
+"""
+
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import islice
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from dashboard.models import DuplicateCandidate, Lead, LeadBlockKey, SyncSequence
+from dashboard.services.lead_merge import merge_leads
+
+MIN_SCORE  = getattr(settings, "DEDUPE_MIN_SCORE", 0.5)
+MAX_BLOCK  = getattr(settings, "DEDUPE_MAX_BLOCK", 50)
+CHUNK_SIZE = 500
+
+WATERMARK = "dedupe"
+
+# Lead columns the keys and the scorer read
+FIELDS = (
+    "id",
+    "firstname",
+    "lastname",
+    "name",
+    "email",
+    "emailalt",
+    "cellphone",
+    "dayphone",
+    "evephone",
+    "VehicleVIN",
+    "postalcode",
+    "phone_e164",
+)
+
+# Evidence weights – summed and capped at 1.0
+WEIGHTS = {
+    "email": 0.45,
+    "email_local": 0.25,
+    "vin": 0.45,
+    "phone": 0.4,
+    "phone7": 0.25,
+    "name": 0.3,
+    "postalcode": 0.1,
+}
+NAME_SIMILARITY = 0.85
+
+_NON_DIGITS = re.compile(r"\D")
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+_SOUNDEX = {c: d for d, letters in {
+    "1": "BFPV", "2": "CGJKQSXZ", "3": "DT", "4": "L", "5": "MN", "6": "R",
+}.items() for c in letters}
+
+LeadRow = Dict[str, object]
+
+
+# ----------------------------------------------------------------------
+#  Keys
+# ----------------------------------------------------------------------
+def soundex(word: str) -> str:
+    """American Soundex code ("Smyth" → "S530"); "" for a word without letters."""
+    letters = [c for c in word.upper() if "A" <= c <= "Z"]
+    if not letters:
+        return ""
+    code, last = letters[0], _SOUNDEX.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX.get(c, "")
+        if digit and digit != last:
+            code += digit
+        if c not in "HW":
+            last = digit
+    return (code + "000")[:4]
+
+
+def _name_parts(row: LeadRow) -> Tuple[str, str]:
+    first, last = (row["firstname"] or "").strip(), (row["lastname"] or "").strip()
+    if not (first and last):
+        words = (row["name"] or "").split()
+        if len(words) >= 2:
+            first, last = words[0], words[-1]
+    return first, last
+
+
+def _email_local(email: str) -> str:
+    local = (email or "").lower().partition("@")[0].partition("+")[0]
+    return local.replace(".", "")
+
+
+def _emails(row: LeadRow) -> Set[str]:
+    return {e.lower() for e in (row["email"], row["emailalt"]) if e}
+
+
+def _phones(row: LeadRow) -> Set[str]:
+    digits = (_NON_DIGITS.sub("", row[f] or "") for f in ("cellphone", "dayphone", "evephone"))
+    return {d[-10:] for d in digits if len(d) >= 7}
+
+
+def _vin(row: LeadRow) -> str:
+    vin = _NON_ALNUM.sub("", (row["VehicleVIN"] or "").upper())
+    return vin if len(vin) >= 11 else ""
+
+
+def blocking_keys(row: LeadRow) -> Set[str]:
+    """Every blocking key for one lead (a dict with FIELDS)."""
+    keys = set()
+    for email in _emails(row):
+        local = _email_local(email)
+        if len(local) >= 3:
+            keys.add(f"email:{local}")
+    first, last = _name_parts(row)
+    if first and last:
+        keys.add(f"name:{soundex(first)}{soundex(last)}")
+    vin = _vin(row)
+    if vin:
+        keys.add(f"vin:{vin}")
+    for phone in _phones(row):
+        keys.add(f"tel:{phone[-7:]}")
+    return {k[:64] for k in keys}
+
+
+# ----------------------------------------------------------------------
+#  Scoring
+# ----------------------------------------------------------------------
+def score_pair(a: LeadRow, b: LeadRow) -> Tuple[float, List[str]]:
+    """(score 0–1, matched evidence) for two leads."""
+    reasons = []
+
+    emails_a, emails_b = _emails(a), _emails(b)
+    if emails_a & emails_b:
+        reasons.append("email")
+    elif {_email_local(e) for e in emails_a} & {_email_local(e) for e in emails_b} - {""}:
+        reasons.append("email_local")
+
+    vin = _vin(a)
+    if vin and vin == _vin(b):
+        reasons.append("vin")
+
+    phones_a, phones_b = _phones(a), _phones(b)
+    if {p for p in phones_a if len(p) == 10} & phones_b:
+        reasons.append("phone")
+    elif {p[-7:] for p in phones_a} & {p[-7:] for p in phones_b}:
+        reasons.append("phone7")
+
+    score = sum(WEIGHTS[r] for r in reasons)
+
+    parts_a, parts_b = _name_parts(a), _name_parts(b)
+    if all(parts_a) and all(parts_b):
+        if [soundex(p) for p in parts_a] == [soundex(p) for p in parts_b]:
+            similarity = 1.0
+        else:
+            similarity = SequenceMatcher(None, " ".join(parts_a).lower(), " ".join(parts_b).lower()).ratio()
+        if similarity >= NAME_SIMILARITY:
+            reasons.append("name")
+            score += WEIGHTS["name"] * similarity
+
+    if a["postalcode"] and a["postalcode"][:5] == (b["postalcode"] or "")[:5]:
+        reasons.append("postalcode")
+        score += WEIGHTS["postalcode"]
+
+    return round(min(score, 1.0), 3), reasons
+
+
+# ----------------------------------------------------------------------
+#  Incremental rebuild
+# ----------------------------------------------------------------------
+def _chunks(ids: Iterable[int], size: int):
+    ids = iter(ids)
+    while True:
+        chunk = list(islice(ids, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _rows(ids) -> Dict[int, LeadRow]:
+    return {row["id"]: row for row in Lead.objects.filter(id__in=ids).order_by().values(*FIELDS)}
+
+
+def _refresh_chunk(ids: List[int]) -> int:
+    """Re-key *ids* and re-compare them with their block mates; return candidates stored."""
+    rows = _rows(ids)
+    keys = {lead_id: blocking_keys(row) for lead_id, row in rows.items()}
+
+    LeadBlockKey.objects.filter(lead_id__in=ids).delete()
+    LeadBlockKey.objects.bulk_create(
+        LeadBlockKey(lead_id=lead_id, key=key) for lead_id, lead_keys in keys.items() for key in lead_keys
+    )
+
+    wanted = set().union(*keys.values()) if keys else set()
+    usable = [
+        row["key"]
+        for row in LeadBlockKey.objects.filter(key__in=wanted)
+        .values("key").annotate(n=Count("id")).filter(n__gt=1, n__lte=MAX_BLOCK)
+    ]
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for key, lead_id in LeadBlockKey.objects.filter(key__in=usable).values_list("key", "lead_id"):
+        blocks[key].append(lead_id)
+
+    pairs = set()
+    for key, members in blocks.items():
+        for lead_id in members:
+            if lead_id in rows:
+                pairs.update((min(lead_id, m), max(lead_id, m)) for m in members if m != lead_id)
+
+    rows.update(_rows({m for pair in pairs for m in pair} - rows.keys()))
+    now = timezone.now()
+    found = []
+    for a, b in pairs:
+        score, reasons = score_pair(rows[a], rows[b])
+        if score >= MIN_SCORE:
+            found.append(DuplicateCandidate(lead_a_id=a, lead_b_id=b, score=score, reasons=reasons, updated_at=now))
+
+    # pairs that no longer match drop out; dismissed ones stay dismissed
+    DuplicateCandidate.objects.filter(
+        Q(lead_a_id__in=ids) | Q(lead_b_id__in=ids), status=DuplicateCandidate.Status.PENDING
+    ).delete()
+    DuplicateCandidate.objects.bulk_create(
+        found,
+        update_conflicts=True,
+        unique_fields=["lead_a", "lead_b"],
+        update_fields=["score", "reasons", "updated_at"],
+    )
+    return len(found)
+
+
+def refresh_candidates(rebuild: bool = False, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Re-key and re-compare every lead changed since the last run (every lead
+    with *rebuild*); return {"leads": …, "candidates": …}.
+    """
+    current = SyncSequence.objects.filter(name="lead").values_list("value", flat=True).first() or 0
+    mark, _ = SyncSequence.objects.get_or_create(name=WATERMARK)
+    since = 0 if rebuild else mark.value
+
+    changed = (
+        Lead.objects.filter(version__gt=since, version__lte=current)
+        .order_by("id").values_list("id", flat=True)
+    )
+    result = {"leads": 0, "candidates": 0}
+    for ids in _chunks(changed.iterator(chunk_size=chunk_size), chunk_size):
+        with transaction.atomic():
+            result["candidates"] += _refresh_chunk(ids)
+        result["leads"] += len(ids)
+
+    SyncSequence.objects.filter(name=WATERMARK).update(value=current)
+    return result
+
+
+# ----------------------------------------------------------------------
+#  Auto-merge
+# ----------------------------------------------------------------------
+def auto_merge(min_score: float, dry_run: bool = False) -> Dict:
+    """
+    Merge every pending candidate pair scoring at least *min_score*.
+
+    Chained pairs (A≈B, B≈C) become one group; the winner is picked like in
+    lead_merge – the lead owning a phone_e164 first, then the oldest.
+    """
+    pairs = list(
+        DuplicateCandidate.objects.filter(status=DuplicateCandidate.Status.PENDING, score__gte=min_score)
+        .values_list("lead_a_id", "lead_b_id")
+    )
+    parent: Dict[int, int] = {}
+
+    def root(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        parent[root(a)] = root(b)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for lead_id in parent:
+        groups[root(lead_id)].append(lead_id)
+
+    owners = set(
+        Lead.objects.filter(id__in=list(parent), phone_e164__isnull=False).values_list("id", flat=True)
+    )
+    mapping = []
+    for members in groups.values():
+        winner = min(members, key=lambda i: (i not in owners, i))
+        mapping.extend((loser, winner) for loser in members if loser != winner)
+    return merge_leads(mapping, dry_run=dry_run)
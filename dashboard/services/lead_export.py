@@ -0,0 +1,191 @@
+# dashboard/services/lead_export.py
+"""
+Constant-memory lead export.
+
+Rows are pulled with ``.values_list().iterator(chunk_size=…)`` – a server-side
+cursor on Postgres, chunked fetchmany() on SQLite – and encoded one line at a
+time, so a 500k-lead export never holds more than one chunk in memory and the
+first bytes leave before the query has finished.
+
+• export_columns(raw)        – validate a ?fields= column selector
+• lead_rows(qs, fields)      – tuples of display values, one per lead
+• csv_lines(fields, rows)    – header + CSV-encoded lines for StreamingHttpResponse
+• write_export(fh, …)        – keyset-chunked CSV / NDJSON file for ExportJob,
+                               optionally with each lead's message history
+
+Usage
+-----
+    from dashboard.services.lead_export import csv_lines, export_columns, lead_rows
+
+    fields = export_columns(request.GET.get("fields"))
+    qs     = filter_leads(Lead.objects.all(), request.GET).order_by("-id")
+    return StreamingHttpResponse(csv_lines(fields, lead_rows(qs, fields)),
+                                 content_type="text/csv")
+"""
+
+import csv
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from dashboard.models import MessageLog
+from dashboard.services.lead_query import DERIVED_FIELDS, parse_fields, values_columns
+
+# Columns of the original hot-lead CSV – the default when no selector is given
+EXPORT_FIELDS = (
+    "id",
+    "name",
+    "cellphone",
+    "email",
+    "vehicle_interest",
+    "score",
+    "created_at",
+)
+
+# Per-message columns added when an export includes the history
+MESSAGE_FIELDS = ("id", "timestamp", "direction", "source", "content")
+
+CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+FORMATS = ("csv", "ndjson")
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(raw: Optional[str]) -> List[str]:
+    """Return the requested export columns, or EXPORT_FIELDS when *raw* is empty."""
+    return parse_fields(raw) if raw else list(EXPORT_FIELDS)
+
+
+def _display(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(v) for v in value)
+    return value
+
+
+def lead_values(
+    queryset: QuerySet, fields: Sequence[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple]:
+    """Yield one tuple of raw values per lead, derived fields resolved."""
+    columns = values_columns(list(fields))
+    position = {c: i for i, c in enumerate(columns)}
+    extra_at = position.get("extra_data")
+
+    for row in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        extra = (row[extra_at] or {}) if extra_at is not None else None
+        yield tuple(
+            DERIVED_FIELDS[f](extra) if f in DERIVED_FIELDS else row[position[f]]
+            for f in fields
+        )
+
+
+def lead_rows(
+    queryset: QuerySet, fields: Sequence[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple]:
+    """Yield one tuple of display values per lead in *queryset*'s order."""
+    for row in lead_values(queryset, fields, chunk_size):
+        yield tuple(_display(v) for v in row)
+
+
+def csv_lines(fields: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    """Header line, then one CSV-encoded line per row."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+# ----------------------------------------------------------------------
+#  File export (background jobs)
+# ----------------------------------------------------------------------
+def _messages_by_lead(lead_ids: List[int]) -> Dict[int, List[tuple]]:
+    grouped: Dict[int, List[tuple]] = {}
+    rows = (
+        MessageLog.objects.filter(lead_id__in=lead_ids)
+        .exclude(source="System")
+        .order_by("lead_id", "id")
+        .values_list("lead_id", *MESSAGE_FIELDS)
+    )
+    for lead_id, *message in rows:
+        grouped.setdefault(lead_id, []).append(tuple(message))
+    return grouped
+
+
+def write_export(
+    fh,
+    fmt: str,
+    queryset: QuerySet,
+    fields: Sequence[str],
+    include_messages: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+    after_id: int = 0,
+    written: int = 0,
+) -> int:
+    """
+    Write every lead in *queryset* to the text file *fh*; return the lead count.
+
+    Leads are read in id order, one keyset chunk per query, plus one message
+    query per chunk when *include_messages* is set. CSV repeats the lead
+    columns on each message row (``message_*`` columns); NDJSON nests them
+    under ``"messages"``. *on_chunk* gets the running total and the last lead
+    id after each chunk; pass them back as *written* / *after_id* to resume
+    (no CSV header is written then).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    select = list(dict.fromkeys(["id", *fields]))
+    pick = [select.index(f) for f in fields]
+    message_header = [f"message_{f}" for f in MESSAGE_FIELDS]
+    blank_message = ("",) * len(MESSAGE_FIELDS)
+
+    writer = csv.writer(fh) if fmt == "csv" else None
+    if writer and not after_id:
+        writer.writerow([*fields, *message_header] if include_messages else fields)
+
+    last_id = after_id
+    while True:
+        chunk = list(
+            lead_values(queryset.filter(id__gt=last_id).order_by("id")[:chunk_size], select)
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        messages = _messages_by_lead([r[0] for r in chunk]) if include_messages else {}
+
+        for row in chunk:
+            values = [row[i] for i in pick]
+            history = messages.get(row[0], [])
+            if writer and not include_messages:
+                writer.writerow([_display(v) for v in values])
+            elif writer:
+                lead = [_display(v) for v in values]
+                for message in history or [blank_message]:
+                    writer.writerow([*lead, *(_display(v) for v in message)])
+            else:
+                record = dict(zip(fields, values))
+                if include_messages:
+                    record["messages"] = [dict(zip(MESSAGE_FIELDS, m)) for m in history]
+                fh.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+
+        written += len(chunk)
+        if on_chunk:
+            on_chunk(written, last_id)
+
+    return written
@@ -0,0 +1,288 @@
+# dashboard/services/lead_merge.py
+"""
+Set-based duplicate-lead merge.
+
+Duplicates are leads whose cellphone reduces to the same 10-digit NANP
+number once punctuation is stripped – typically legacy rows that lost the
+phone_e164 race in migration 0017, or the same customer typed two ways.
+
+The whole merge is a fixed number of SQL statements, independent of how
+many leads there are:
+
+1. one INSERT … SELECT with a window function fills a temporary
+   ``loser_id → winner_id`` map. The winner is the lead that already owns
+   the phone_e164, else the oldest one.
+2. one UPDATE coalesces the losers' data into the winners: blank text
+   fields are filled, opt-out / do-not-contact / reply flags stick, and the
+   latest last_texted wins.
+3. one UPDATE per table with a Lead foreign key (MessageLog, ScheduledEvent,
+   InboxMessage, …) re-points the losers' rows at their winner, so no
+   history is cascaded away; the winners' inbox summary and LeadFeatures
+   are rebuilt from the merged history and they are rescored.
+4. the losers are deleted in chunks through LeadQuerySet.delete(), which
+   leaves tombstones for delta-sync clients.
+
+Usage
+-----
+    from dashboard.services.lead_merge import merge_duplicates, merge_leads
+
+    report = merge_duplicates(dry_run=True)
+    # {"groups": 412, "losers": 519, "repoint": {"dashboard_messagelog": 3310, …},
+    #  "sample": [{"winner": 17, "losers": [903, 1204], "phone": "5551234567"}, …]}
+
+    merge_leads([(903, 17), (1204, 17)])      # explicit (loser, winner) pairs
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import connection, transaction
+from django.db.models import F, Value, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import FirstValue, Replace, Right
+from django.utils import timezone
+
+from dashboard.models import (
+    DuplicateCandidate,
+    Lead,
+    LeadBlockKey,
+    next_lead_version,
+    rebuild_features,
+    refresh_conversations,
+)
+
+MAP_TABLE = "dashboard_lead_merge_map"
+
+DELETE_CHUNK = 1000
+SAMPLE_GROUPS = 20
+
+# Derived from the lead itself – dropped with the loser and rebuilt, never re-pointed
+REBUILT_MODELS = (DuplicateCandidate, LeadBlockKey)
+
+# Filled from a loser only when the winner's value is blank
+TEXT_FIELDS = (
+    "firstname",
+    "middlename",
+    "lastname",
+    "name",
+    "email",
+    "emailalt",
+    "dayphone",
+    "evephone",
+    "address",
+    "city",
+    "state",
+    "postalcode",
+    "vehicle_interest",
+    "VehicleYear",
+    "VehicleMake",
+    "VehicleModel",
+    "VehicleVIN",
+    "VehicleStockNumber",
+    "dealerid",
+    "salesperson",
+    "SalesPersonFirstName",
+    "SalesPersonLastName",
+    "source",
+    "leadsourcename",
+    "LeadTypeName",
+    "LeadTypeID",
+    "leadstatustypename",
+    "CustomerCreatedUTC",
+    "LeadCreatedUTC",
+    "SoldDateUTC",
+)
+
+# True on any duplicate → true on the merged lead (never text an opt-out)
+STICKY_FLAGS = ("opted_out", "DoNotCall", "DoNotEmail", "DoNotMail", "has_replied", "new_message")
+
+# Highest value across the group wins (score is recomputed from the merged history)
+MAX_FIELDS = ("last_texted",)
+
+_STRIP = " -().+"
+
+
+def phone_key():
+    """SQL expression: cellphone with punctuation stripped."""
+    digits = F("cellphone")
+    for char in _STRIP:
+        digits = Replace(digits, Value(char), Value(""))
+    return digits
+
+
+def _map_query():
+    """(loser_id, winner_id) for every duplicate, as a Lead queryset."""
+    return (
+        Lead.objects.order_by()
+        .annotate(digits=phone_key())
+        .filter(digits__regex=r"^1?[0-9]{10}$")
+        .annotate(key=Right("digits", 10))
+        .annotate(
+            winner_id=Window(
+                FirstValue("id"),
+                partition_by=[F("key")],
+                order_by=[F("phone_e164").asc(nulls_last=True), F("id").asc()],
+            )
+        )
+        .exclude(id=F("winner_id"))
+        .values_list("id", "winner_id")
+    )
+
+
+def _create_map(cursor) -> None:
+    cursor.execute(f"DROP TABLE IF EXISTS {MAP_TABLE}")
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {MAP_TABLE} (loser_id BIGINT PRIMARY KEY, winner_id BIGINT NOT NULL)"
+    )
+
+
+def _index_map(cursor) -> None:
+    cursor.execute(f"CREATE INDEX {MAP_TABLE}_winner ON {MAP_TABLE} (winner_id)")
+
+
+def _fk_tables():
+    """(table, column) of every one-to-many foreign key pointing at Lead."""
+    return [
+        (rel.related_model._meta.db_table, rel.field.column)
+        for rel in Lead._meta.related_objects
+        if rel.one_to_many
+        and not rel.related_model._meta.proxy
+        and rel.related_model not in REBUILT_MODELS
+    ]
+
+
+def _coalesce_sql():
+    q = connection.ops.quote_name
+    lead = q(Lead._meta.db_table)
+
+    def losers(expr, where=""):
+        return (
+            f"SELECT {expr} FROM {lead} l JOIN {MAP_TABLE} m ON m.loser_id = l.id "
+            f"WHERE m.winner_id = {lead}.id {where}"
+        )
+
+    sets = []
+    for name in TEXT_FIELDS:
+        col = q(name)
+        sets.append(
+            f"{col} = CASE WHEN {col} = '' THEN "
+            f"COALESCE(({losers(f'l.{col}', f'AND l.{col} <> %s ORDER BY l.id LIMIT 1')}), {col}) "
+            f"ELSE {col} END"
+        )
+    for name in STICKY_FLAGS:
+        col = q(name)
+        sets.append(f"{col} = CASE WHEN EXISTS ({losers('1', f'AND l.{col}')}) THEN %s ELSE {col} END")
+    for name in MAX_FIELDS:
+        col = q(name)
+        best = f"({losers(f'MAX(l.{col})')})"
+        sets.append(f"{col} = CASE WHEN {col} IS NULL OR {best} > {col} THEN COALESCE({best}, {col}) ELSE {col} END")
+    sets.append(f"{q('version')} = %s")
+    sets.append(f"{q('updated_at')} = %s")
+
+    params = [""] * len(TEXT_FIELDS) + [True] * len(STICKY_FLAGS)
+    sql = f"UPDATE {lead} SET {', '.join(sets)} WHERE id IN (SELECT winner_id FROM {MAP_TABLE})"
+    return sql, params
+
+
+def _report(cursor) -> Dict:
+    cursor.execute(f"SELECT COUNT(DISTINCT winner_id), COUNT(*) FROM {MAP_TABLE}")
+    groups, losers = cursor.fetchone()
+
+    repoint = {}
+    for table, column in _fk_tables():
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)} "
+            f"WHERE {connection.ops.quote_name(column)} IN (SELECT loser_id FROM {MAP_TABLE})"
+        )
+        repoint[table] = cursor.fetchone()[0]
+
+    cursor.execute(
+        f"SELECT winner_id, loser_id FROM {MAP_TABLE} WHERE winner_id IN "
+        f"(SELECT DISTINCT winner_id FROM {MAP_TABLE} ORDER BY winner_id LIMIT %s) "
+        f"ORDER BY winner_id, loser_id",
+        [SAMPLE_GROUPS],
+    )
+    sample: Dict[int, List[int]] = {}
+    for winner, loser in cursor.fetchall():
+        sample.setdefault(winner, []).append(loser)
+    phones = dict(Lead.objects.filter(id__in=sample).values_list("id", "cellphone"))
+
+    return {
+        "groups": groups,
+        "losers": losers,
+        "repoint": repoint,
+        "sample": [
+            {"winner": winner, "losers": ids, "phone": phones.get(winner)}
+            for winner, ids in sample.items()
+        ],
+    }
+
+
+def _merge(cursor, dry_run: bool, chunk_size: int) -> Dict:
+    """Report on – and unless *dry_run* apply – the filled merge map."""
+    _index_map(cursor)
+    report = _report(cursor)
+    if dry_run or not report["losers"]:
+        cursor.execute(f"DROP TABLE {MAP_TABLE}")
+        return report
+
+    # 1. coalesce loser data into winners
+    sql, params = _coalesce_sql()
+    cursor.execute(sql, [*params, next_lead_version(), timezone.now()])
+
+    # 2. re-point every child row
+    for table, column in _fk_tables():
+        table, column = connection.ops.quote_name(table), connection.ops.quote_name(column)
+        cursor.execute(
+            f"UPDATE {table} SET {column} = "
+            f"(SELECT winner_id FROM {MAP_TABLE} WHERE loser_id = {table}.{column}) "
+            f"WHERE {column} IN (SELECT loser_id FROM {MAP_TABLE})"
+        )
+
+    winners = RawSQL(f"SELECT winner_id FROM {MAP_TABLE}", [])
+    refresh_conversations(winners)
+    cursor.execute(f"SELECT DISTINCT winner_id FROM {MAP_TABLE}")
+    rebuild_features([row[0] for row in cursor.fetchall()])  # also rescores
+
+    # 3. delete losers in chunks (tombstones via LeadQuerySet.delete)
+    last = 0
+    while True:
+        cursor.execute(
+            f"SELECT loser_id FROM {MAP_TABLE} WHERE loser_id > %s ORDER BY loser_id LIMIT %s",
+            [last, chunk_size],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            break
+        Lead.objects.filter(id__in=ids).delete()
+        last = ids[-1]
+
+    cursor.execute(f"DROP TABLE {MAP_TABLE}")
+    return report
+
+
+def merge_duplicates(dry_run: bool = False, chunk_size: int = DELETE_CHUNK) -> Dict:
+    """
+    Merge every group of leads sharing a phone number; return the report
+    (see module docstring).
+
+    With *dry_run* nothing is written – the report shows what would happen.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _create_map(cursor)
+        sql, params = _map_query().query.sql_with_params()
+        cursor.execute(f"INSERT INTO {MAP_TABLE} (loser_id, winner_id) SELECT * FROM ({sql}) dupes", params)
+        return _merge(cursor, dry_run, chunk_size)
+
+
+def merge_leads(
+    pairs: Iterable[Tuple[int, int]], dry_run: bool = False, chunk_size: int = DELETE_CHUNK
+) -> Dict:
+    """
+    Merge explicit ``(loser_id, winner_id)`` pairs the same way – used for
+    fuzzy duplicates (dashboard.services.lead_dedupe). Winners must not
+    themselves appear as losers.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _create_map(cursor)
+        cursor.executemany(f"INSERT INTO {MAP_TABLE} (loser_id, winner_id) VALUES (%s, %s)", list(pairs))
+        return _merge(cursor, dry_run, chunk_size)
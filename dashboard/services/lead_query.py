@@ -0,0 +1,245 @@
+# dashboard/services/lead_query.py
+"""
+Shared query helpers for the lead list API (and anything else that needs the
+same filters – exports, background jobs).
+
+• parse_fields(raw)          – validate a ?fields= projection
+• filter_leads(qs, params)   – apply server-side filters from a QueryDict
+• paginate(qs, ...)          – keyset page on (created_at, id), newest first
+
+Usage
+-----
+    from dashboard.services.lead_query import filter_leads, paginate, parse_fields
+
+    fields = parse_fields(request.GET.get("fields"))
+    qs     = filter_leads(Lead.objects.all(), request.GET)
+    rows, next_cursor = paginate(qs, fields, cursor=request.GET.get("cursor"))
+
+Every helper raises ``ValueError`` on bad input so views can answer 400.
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from dashboard.models import Lead
+
+# ----------------------------------------------------------------------
+#  Projection
+# ----------------------------------------------------------------------
+# Default payload = the keys of Lead.to_dict(), so the React UI keeps working.
+DEFAULT_FIELDS = (
+    "id",
+    "name",
+    "cellphone",
+    "email",
+    "vehicle_interest",
+    "message_status",
+    "score",
+    "last_texted",
+    "follow_up_stage",
+    "opted_in_for_ai",
+    "opted_out",
+    "ai_active",
+    "next_ai_send_at",
+    "manual_next_ai_send_at",
+    "has_replied",
+    "new_message",
+    "salesperson",
+    "source",
+    "appointment_time",
+    "tags",
+    "ai_message",
+)
+
+# Keys that live inside Lead.extra_data rather than in their own column.
+DERIVED_FIELDS = {
+    "appointment_time": lambda extra: extra.get("appointment_time"),
+    "tags":             lambda extra: extra.get("tags", []),
+}
+
+COLUMN_FIELDS = frozenset(
+    f.attname for f in Lead._meta.concrete_fields if f.name != "extra_data"
+)
+
+PAGE_SIZE     = getattr(settings, "LEADS_PAGE_SIZE", 100)
+MAX_PAGE_SIZE = getattr(settings, "LEADS_MAX_PAGE_SIZE", 500)
+
+# ----------------------------------------------------------------------
+#  Filters
+# ----------------------------------------------------------------------
+TRUE_VALUES  = {"1", "true", "yes"}
+FALSE_VALUES = {"0", "false", "no"}
+
+# Mirrors the tab buttons in frontend/src/pages/Leads.jsx
+FILTER_PRESETS = {
+    "all":          Q(),
+    "replied":      Q(new_message=True),
+    "hot":          Q(score__gte=60),
+    "scheduled":    Q(ai_active=True),
+    "paused":       Q(opted_in_for_ai=True, ai_active=False),
+    "not_opted_in": Q(opted_in_for_ai=False),
+}
+
+
+def parse_fields(raw: Optional[str]) -> List[str]:
+    """Return the requested field list, or DEFAULT_FIELDS when *raw* is empty."""
+    if not raw:
+        return list(DEFAULT_FIELDS)
+
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in COLUMN_FIELDS and f not in DERIVED_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def _parse_bool(name: str, value: str) -> bool:
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def _parse_int(name: str, value: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def filters_from_json(data: dict) -> Dict[str, str]:
+    """
+    Turn a JSON filter object into the query-string form filter_leads()
+    parses: true/false → "true"/"false", numbers → their digits, null dropped.
+    """
+    params = {}
+    for key, value in data.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        elif isinstance(value, (int, float, str)):
+            value = str(value)
+        else:
+            raise ValueError(f"{key} must be a string, number or boolean")
+        params[key] = value
+    return params
+
+
+def filter_leads(queryset: QuerySet, params) -> QuerySet:
+    """
+    Apply list filters from *params* (a QueryDict or plain dict).
+
+    Supported keys: filter (UI tab preset), hot, min_score, max_score,
+    stage, opted_in_for_ai, salesperson.
+    """
+    preset = params.get("filter")
+    if preset:
+        if preset not in FILTER_PRESETS:
+            raise ValueError(f"Unknown filter: {preset}")
+        queryset = queryset.filter(FILTER_PRESETS[preset])
+
+    min_score = params.get("min_score")
+    if params.get("hot") in ("true", "1"):
+        # legacy contract from views_api: ?hot=true implies min_score=80
+        queryset = queryset.filter(score__gte=_parse_int("min_score", min_score or 80))
+    elif min_score:
+        queryset = queryset.filter(score__gte=_parse_int("min_score", min_score))
+
+    max_score = params.get("max_score")
+    if max_score:
+        queryset = queryset.filter(score__lte=_parse_int("max_score", max_score))
+
+    stage = params.get("stage")
+    if stage:
+        queryset = queryset.filter(follow_up_stage=stage)
+
+    opted_in = params.get("opted_in_for_ai")
+    if opted_in:
+        queryset = queryset.filter(opted_in_for_ai=_parse_bool("opted_in_for_ai", opted_in))
+
+    salesperson = params.get("salesperson")
+    if salesperson:
+        queryset = queryset.filter(salesperson=salesperson)
+
+    return queryset
+
+
+# ----------------------------------------------------------------------
+#  Keyset pagination
+# ----------------------------------------------------------------------
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_iso, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_iso), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def parse_page_size(raw: Optional[str]) -> int:
+    if not raw:
+        return PAGE_SIZE
+    size = _parse_int("page_size", raw)
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    return size
+
+
+def project_row(row: Dict, fields: List[str]) -> Dict:
+    """Shape a .values() row into the requested payload."""
+    extra = row.get("extra_data") or {}
+    return {
+        f: DERIVED_FIELDS[f](extra) if f in DERIVED_FIELDS else row[f]
+        for f in fields
+    }
+
+
+def values_columns(fields: List[str]) -> List[str]:
+    """Columns to fetch with .values() for *fields*."""
+    columns = [f for f in fields if f in COLUMN_FIELDS]
+    if any(f in DERIVED_FIELDS for f in fields):
+        columns.append("extra_data")
+    return columns
+
+
+def paginate(
+    queryset: QuerySet,
+    fields: List[str],
+    cursor: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Return (rows, next_cursor) for one page ordered by (-created_at, -id).
+
+    Only *fields* (plus the keyset columns) are fetched; next_cursor is None
+    on the last page.
+    """
+    queryset = queryset.order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    columns = {*values_columns(fields), "id", "created_at"}
+    rows = list(queryset.values(*columns)[: page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+
+    return [project_row(r, fields) for r in rows], next_cursor
@@ -1,34 +1,154 @@
 # C:\Projects\auto_text_crm_dockerized_clean\dashboard\services\lead_scoring.py
 """
-Pure function: calculate_score(lead) → int  (0‑100)
+Lead scoring rules, defined once and compiled two ways:
 
-Weighting (v1 — tweak anytime):
+• calculate_score(lead) → int (0‑100) – per lead, in Python (Lead.save, bulk_create)
+• score_expression()    → SQL CASE expression – for set-based rescoring
+                          (LeadQuerySet.rescore, the nightly sweep)
+
+Weighting (v1 — tweak RULES anytime, both forms follow):
 +25  if lead.opted_in_for_ai
 +20  if lead.new_message            (unread customer reply)
-+15  if lead.created < 3 days ago
++15  if lead.created < 3 days ago
 +10  if lead.vehicle_interest
 +10  if lead.message_status == "Generated"
++10  if the customer wrote in the last 7 days         (LeadFeatures)
++10  if the customer answers within an hour on average (LeadFeatures)
++5   if the customer sent 3+ messages                   (LeadFeatures)
+
+Rules on ``features__…`` read the per-lead LeadFeatures row, which is
+maintained as messages are logged – no aggregate over MessageLog at
+scoring time. In SQL they compile to EXISTS subqueries (UPDATE can't join).
+
+Scores are kept current on write: Lead.save() and the LeadQuerySet bulk
+paths rescore a lead whenever one of SCORE_INPUTS changes, unless the
+caller writes ``score`` itself. Time-based rules (TIME_TESTS) are handled
+by the hourly rescore_time_decay task, which only rescores the leads a
+rule's window edge swept past since its last run (decay_filter). The
+nightly score_leads task is just a consistency sweep.
 """
 from datetime import timedelta
+
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Case, Exists, IntegerField, OuterRef, Q, Value, When
+from django.db.models.functions import Least
 from django.utils import timezone
 
+MAX_SCORE = 100
+
+# (points, lead field, test, argument)
+RULES = (
+    (25, "opted_in_for_ai", "true", None),
+    (20, "new_message", "true", None),
+    (15, "created_at", "within", timedelta(days=3)),
+    (10, "vehicle_interest", "not_blank", None),
+    (10, "message_status", "equals", "Generated"),
+    (10, "features__last_inbound_at", "recent", timedelta(days=7)),
+    (10, "features__avg_reply_seconds", "at_most", 3600),
+    (5, "features__messages_in", "at_least", 3),
+)
+
+FEATURES = "features__"
+
+# test → (Python predicate(value, arg, now), Q builder(field, arg, now))
+TESTS = {
+    "true": (
+        lambda value, arg, now: bool(value),
+        lambda field, arg, now: Q(**{field: True}),
+    ),
+    "not_blank": (
+        lambda value, arg, now: bool(value),
+        lambda field, arg, now: ~Q(**{field: ""}) & Q(**{f"{field}__isnull": False}),
+    ),
+    "equals": (
+        lambda value, arg, now: value == arg,
+        lambda field, arg, now: Q(**{field: arg}),
+    ),
+    "at_least": (
+        lambda value, arg, now: value is not None and value >= arg,
+        lambda field, arg, now: Q(**{f"{field}__gte": arg}),
+    ),
+    "at_most": (
+        lambda value, arg, now: value is not None and value <= arg,
+        lambda field, arg, now: Q(**{f"{field}__lte": arg}),
+    ),
+    "recent": (
+        lambda value, arg, now: value is not None and value >= now - arg,
+        lambda field, arg, now: Q(**{f"{field}__gte": now - arg}),
+    ),
+    # not saved yet (no created_at) → created just now
+    "within": (
+        lambda value, arg, now: (value or now) >= now - arg,
+        lambda field, arg, now: Q(**{f"{field}__gte": now - arg}),
+    ),
+}
+
+# Tests on a timestamp – their result flips as time passes, with no write
+TIME_TESTS = {"within", "recent"}
+
+# Lead fields the rules read – a write to any of them rescores the lead
+# (feature rules are rescored when LeadFeatures changes)
+SCORE_INPUTS = tuple(dict.fromkeys(field for _, field, _, _ in RULES if not field.startswith(FEATURES)))
+
+
+def _value(lead, field):
+    if not field.startswith(FEATURES):
+        return getattr(lead, field)
+    if lead.pk is None:
+        return None
+    try:
+        return getattr(lead.features, field[len(FEATURES):])
+    except ObjectDoesNotExist:
+        return None
+
 
-def calculate_score(lead) -> int:
-    score = 0
+def _condition(field, test, arg, now):
+    if not field.startswith(FEATURES):
+        return TESTS[test][1](field, arg, now)
+    LeadFeatures = apps.get_model("dashboard", "LeadFeatures")
+    return Exists(
+        LeadFeatures.objects.filter(lead=OuterRef("pk")).filter(TESTS[test][1](field[len(FEATURES):], arg, now))
+    )
 
-    if lead.opted_in_for_ai:
-        score += 25
 
-    if lead.new_message:
-        score += 20
+def calculate_score(lead, now=None) -> int:
+    now = now or timezone.now()
+    score = sum(
+        points
+        for points, field, test, arg in RULES
+        if TESTS[test][0](_value(lead, field), arg, now)
+    )
+    return min(score, MAX_SCORE)
 
-    if lead.created_at and lead.created_at >= timezone.now() - timedelta(days=3):
-        score += 15
 
-    if lead.vehicle_interest:
-        score += 10
+def decay_filter(since, now):
+    """
+    Leads whose score changed between *since* and *now* through time alone:
+    a timestamp rule's window edge (now - arg) swept past them. Each test is
+    one indexed range on the rule's field.
+    """
+    crossed = Q(pk__in=[])
+    for _, field, test, arg in RULES:
+        if test not in TIME_TESTS:
+            continue
+        column = field.removeprefix(FEATURES)
+        edge = Q(**{f"{column}__gte": since - arg, f"{column}__lt": now - arg})
+        if field.startswith(FEATURES):
+            # IN (subquery) keeps each branch on its own index – an OR across a join would not
+            LeadFeatures = apps.get_model("dashboard", "LeadFeatures")
+            edge = Q(pk__in=LeadFeatures.objects.filter(edge).values("lead_id"))
+        crossed |= edge
+    return crossed
 
-    if lead.message_status == "Generated":
-        score += 10
 
-    return min(score, 100)
+def score_expression(now=None):
+    """The same rules as one SQL expression: LEAST(CASE … + CASE …, MAX_SCORE)."""
+    now = now or timezone.now()
+    total = Value(0)
+    for points, field, test, arg in RULES:
+        total = total + Case(
+            When(_condition(field, test, arg, now), then=Value(points)),
+            default=Value(0),
+        )
+    return Least(total, Value(MAX_SCORE), output_field=IntegerField())
@@ -0,0 +1,91 @@
+# dashboard/services/message_thread.py
+"""
+Cursor pagination for a lead's conversation, shared by the thread endpoints.
+
+Message ids are the cursor – they grow with ``timestamp`` (auto_now_add), and
+(lead_id, id) is covered by msg_thread_idx, so every page is one index range
+read no matter how long the history gets.
+
+• no cursor     – the latest *page_size* messages
+• before=<id>   – the page just older than message <id> (scroll back)
+• after=<id>    – everything newer than <id>, oldest first (polling)
+
+Rows always come back oldest → newest. System rows (the prompts written by
+fresh_followup) are never part of a thread.
+
+Usage
+-----
+    from dashboard.services.message_thread import parse_thread_params, thread_page
+
+    before, after, page_size = parse_thread_params(request.GET)
+    rows, has_more = thread_page(
+        MessageLog.objects.thread(lead_id).values("id", "content"),
+        before=before, after=after, page_size=page_size,
+    )
+
+Helpers raise ``ValueError`` on bad input so views can answer 400.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import QuerySet
+
+PAGE_SIZE     = getattr(settings, "THREAD_PAGE_SIZE", 50)
+MAX_PAGE_SIZE = getattr(settings, "THREAD_MAX_PAGE_SIZE", 200)
+
+
+def _parse_id(name: str, raw: Optional[str]) -> Optional[int]:
+    if not raw:
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a message id") from None
+    if value < 0:
+        raise ValueError(f"{name} must be a message id")
+    return value
+
+
+def parse_thread_params(params) -> Tuple[Optional[int], Optional[int], int]:
+    """Return (before, after, page_size) from a QueryDict."""
+    before = _parse_id("before", params.get("before"))
+    after = _parse_id("after", params.get("after"))
+    if before is not None and after is not None:
+        raise ValueError("before and after are mutually exclusive")
+
+    raw = params.get("page_size")
+    if not raw:
+        return before, after, PAGE_SIZE
+    try:
+        page_size = int(raw)
+    except ValueError:
+        raise ValueError("page_size must be an integer") from None
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    return before, after, page_size
+
+
+def thread_page(
+    queryset: QuerySet,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    page_size: int = PAGE_SIZE,
+) -> Tuple[List[Dict], bool]:
+    """
+    Return (rows, has_more) for one page of *queryset*, oldest first.
+
+    *queryset* must select "id". has_more means older messages exist (latest
+    and before= modes) or newer ones do (after= mode) beyond this page.
+    """
+    if after is not None:
+        rows = list(queryset.filter(id__gt=after).order_by("id")[: page_size + 1])
+        return rows[:page_size], len(rows) > page_size
+
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    rows = list(queryset.order_by("-id")[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    rows.reverse()
+    return rows, has_more
@@ -0,0 +1,55 @@
+# dashboard/services/realtime.py
+"""
+Server-push fan-out over Redis pub/sub.
+
+Write paths call ``publish()``; every web worker serving /api/events/
+subscribes to the same channel, so an event raised on one worker (or in a
+Celery task) reaches browser tabs connected to any worker.
+
+Event types
+-----------
+message.inbound   – a customer SMS was logged        {lead_id, message_id}
+message.outbound  – an SMS left the building          {lead_id, message_id, source}
+lead.updated      – inbox-relevant lead flags changed {lead_id, version, fields}
+
+Usage
+-----
+    from dashboard.services.realtime import publish
+
+    publish("message.inbound", {"lead_id": lead.id, "message_id": log.id})
+"""
+
+import json
+import logging
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = getattr(settings, "REALTIME_CHANNEL", "crm-events")
+REDIS_URL = getattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+
+_client = None
+
+
+def _redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+    return _client
+
+
+def _send(message: str) -> None:
+    try:
+        _redis().publish(CHANNEL, message)
+    except redis.RedisError as exc:
+        # Push is best-effort – clients still catch up via /api/leads/changes/
+        logger.warning("Realtime publish failed: %s", exc)
+
+
+def publish(event: str, data: dict) -> None:
+    """Broadcast *event* once the surrounding transaction commits."""
+    message = json.dumps({"event": event, "data": data}, default=str)
+    transaction.on_commit(lambda: _send(message))
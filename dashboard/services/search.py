@@ -0,0 +1,224 @@
+# dashboard/services/search.py
+"""
+Full-text lead search shared by /api/search/ and the Django admin.
+
+The index is maintained by the database itself, so every write path –
+save(), queryset.update(), bulk_create() from the importer – keeps it
+current without extra Python work:
+
+• SQLite    – FTS5 external-content tables (trigram tokenizer) kept in sync
+              by triggers; ranked with bm25()
+• Postgres  – pg_trgm GIN indexes on the lead identity expression and on
+              MessageLog.content; ranked with word_similarity()
+• other     – icontains fallback (sequential scan, dev only)
+
+Migration 0018 creates the index; ``ensure_search_index()`` re-creates any
+missing piece after every ``migrate`` (see DashboardConfig), since SQLite
+drops a table's triggers whenever a migration rebuilds that table.
+
+Usage
+-----
+    from dashboard.services.search import search_leads
+
+    hits, has_more = search_leads("tahoe 3322", limit=25, offset=0)
+"""
+
+from typing import Dict, List, Tuple
+
+from django.db import connection
+from django.db.models import Q
+
+from dashboard.models import Lead
+
+# Lead columns covered by the index (admin search_fields + vehicle info)
+LEAD_SEARCH_COLUMNS = (
+    "name",
+    "firstname",
+    "lastname",
+    "cellphone",
+    "phone_e164",
+    "email",
+    "VehicleVIN",
+    "VehicleStockNumber",
+    "vehicle_interest",
+)
+
+# Trigram matching needs at least three characters per term
+MIN_TERM_LENGTH = 3
+
+# Message hits rank below identity hits with the same text score
+MESSAGE_RANK_WEIGHT = 0.5
+
+RESULT_FIELDS = ("id", "name", "cellphone", "email", "vehicle_interest", "score", "new_message")
+
+
+# ----------------------------------------------------------------------
+#  Index DDL
+# ----------------------------------------------------------------------
+def _cols(prefix=""):
+    return ", ".join(f'{prefix}"{c}"' for c in LEAD_SEARCH_COLUMNS)
+
+
+# name → (content table, indexed columns, new.* values, old.* values)
+SQLITE_FTS_TABLES = {
+    "dashboard_lead_fts": ("dashboard_lead", _cols(), _cols("new."), _cols("old.")),
+    "dashboard_message_fts": ("dashboard_messagelog", "content", "new.content", "old.content"),
+}
+
+
+def _sqlite_ddl():
+    for fts, (table, cols, new, old) in SQLITE_FTS_TABLES.items():
+        yield f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {cols}, content='{table}', content_rowid='id', tokenize='trigram')"""
+        yield f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+            END"""
+        yield f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+            END"""
+        yield f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+            END"""
+
+
+LEAD_SEARCH_EXPR = " || ' ' || ".join(
+    f'coalesce("{c}", \'\')' for c in LEAD_SEARCH_COLUMNS
+)
+
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS dashboard_lead_search_trgm ON dashboard_lead "
+    f"USING gin (({LEAD_SEARCH_EXPR}) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS dashboard_messagelog_content_trgm ON dashboard_messagelog "
+    "USING gin (content gin_trgm_ops)",
+)
+
+
+def ensure_search_index(conn=connection) -> None:
+    """Create the search index (and SQLite sync triggers) if any piece is missing."""
+    with conn.cursor() as cur:
+        if conn.vendor == "postgresql":
+            for sql in POSTGRES_DDL:
+                cur.execute(sql)
+            return
+        if conn.vendor != "sqlite":
+            return
+
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cur.fetchall()}
+        for sql in _sqlite_ddl():
+            cur.execute(sql)
+        for fts in SQLITE_FTS_TABLES:
+            if not {f"{fts}_ai", f"{fts}_ad", f"{fts}_au"} <= existing:
+                # triggers were missing, so rows may have changed unindexed
+                cur.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+# ----------------------------------------------------------------------
+#  Query helpers
+# ----------------------------------------------------------------------
+def _terms(query: str) -> List[str]:
+    return [t for t in query.split() if len(t) >= MIN_TERM_LENGTH]
+
+
+# ----------------------------------------------------------------------
+#  Backends – each returns [(lead_id, rank, snippet), …] best first,
+#  rank is "bigger is better".
+# ----------------------------------------------------------------------
+def _sqlite_hits(terms, limit, offset):
+    match = " ".join('"{}"'.format(t.replace('"', '""')) for t in terms)
+    sql = f"""
+        SELECT lead_id, MAX(rank) AS rank, snippet FROM (
+            SELECT rowid AS lead_id, -bm25(dashboard_lead_fts) AS rank, NULL AS snippet
+              FROM dashboard_lead_fts
+             WHERE dashboard_lead_fts MATCH %s
+            UNION ALL
+            SELECT m.lead_id,
+                   -bm25(dashboard_message_fts) * {MESSAGE_RANK_WEIGHT},
+                   snippet(dashboard_message_fts, 0, '[', ']', '…', 12)
+              FROM dashboard_message_fts
+              JOIN dashboard_messagelog m ON m.id = dashboard_message_fts.rowid
+             WHERE dashboard_message_fts MATCH %s AND m.source != 'System'
+        )
+        GROUP BY lead_id
+        ORDER BY rank DESC, lead_id DESC
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cur:
+        cur.execute(sql, [match, match, limit, offset])
+        return cur.fetchall()
+
+
+def _postgres_hits(terms, limit, offset):
+    query = " ".join(terms)
+    patterns = [
+        "%{}%".format(t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_"))
+        for t in terms
+    ]
+    lead_where = " AND ".join([f"{LEAD_SEARCH_EXPR} ILIKE %s"] * len(terms))
+    msg_where = " AND ".join(["m.content ILIKE %s"] * len(terms))
+    sql = f"""
+        SELECT DISTINCT ON (lead_id) lead_id, rank, snippet FROM (
+            SELECT id AS lead_id, word_similarity(%s, {LEAD_SEARCH_EXPR}) AS rank, NULL AS snippet
+              FROM dashboard_lead
+             WHERE {lead_where}
+            UNION ALL
+            SELECT m.lead_id, word_similarity(%s, m.content) * {MESSAGE_RANK_WEIGHT}, left(m.content, 120)
+              FROM dashboard_messagelog m
+             WHERE {msg_where} AND m.source != 'System'
+        ) hits
+        ORDER BY lead_id, rank DESC
+    """
+    sql = f"SELECT * FROM ({sql}) best ORDER BY rank DESC, lead_id DESC LIMIT %s OFFSET %s"
+    with connection.cursor() as cur:
+        cur.execute(sql, [query, *patterns, query, *patterns, limit, offset])
+        return cur.fetchall()
+
+
+def _fallback_hits(terms, limit, offset):
+    cond = Q()
+    for t in terms:
+        cond &= Q(*[Q(**{f"{c}__icontains": t}) for c in LEAD_SEARCH_COLUMNS], _connector=Q.OR)
+    ids = Lead.objects.filter(cond).order_by("-id").values_list("id", flat=True)
+    return [(pk, 0.0, None) for pk in ids[offset:offset + limit]]
+
+
+BACKENDS = {
+    "sqlite": _sqlite_hits,
+    "postgresql": _postgres_hits,
+}
+
+
+# ----------------------------------------------------------------------
+#  Public API
+# ----------------------------------------------------------------------
+def search_lead_ids(query: str, limit: int, offset: int = 0) -> List[int]:
+    """Ranked lead ids only – what the admin changelist needs."""
+    terms = _terms(query)
+    if not terms:
+        return []
+    hits = BACKENDS.get(connection.vendor, _fallback_hits)(terms, limit, offset)
+    return [lead_id for lead_id, _, _ in hits]
+
+
+def search_leads(query: str, limit: int, offset: int = 0) -> Tuple[List[Dict], bool]:
+    """Return (results, has_more); each result is a lead summary + rank + snippet."""
+    terms = _terms(query)
+    if not terms:
+        return [], False
+
+    hits = BACKENDS.get(connection.vendor, _fallback_hits)(terms, limit + 1, offset)
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+
+    leads = Lead.objects.only(*RESULT_FIELDS).in_bulk([h[0] for h in hits])
+    results = []
+    for lead_id, rank, snippet in hits:
+        lead = leads.get(lead_id)
+        if lead is None:  # deleted between the two queries
+            continue
+        row = {f: getattr(lead, f) for f in RESULT_FIELDS}
+        row.update(rank=round(rank, 4), snippet=snippet)
+        results.append(row)
+    return results, has_more
@@ -0,0 +1,133 @@
+# dashboard/services/send_schedule.py
+"""
+Redis sorted-set timing wheel for AI follow-ups.
+
+Every lead due an AI text is a member of one sorted set, scored by its
+``next_ai_send_at`` as epoch seconds. Leads that may not be texted (not
+opted in, opted out, replied, nothing scheduled) are not in it. Lead's
+write paths keep the set in step through mirror_on_commit(), so every
+caller that moves a due time – get_next_send after a send, start_ai,
+approve / skip, the webhooks – is covered without knowing about Redis.
+
+The pop loop (``manage.py run_send_scheduler``) claims due members with
+ZRANGEBYSCORE + ZREM: O(log n) per member, and only the process whose
+ZREM removed a member owns it. The database stays the source of truth –
+dispatch re-checks each claimed lead against its row – and reconcile()
+rebuilds the set from the table on startup to repair mirror writes lost
+while Redis was unreachable.
+
+Usage
+-----
+    from dashboard.services import send_schedule
+
+    send_schedule.mirror_on_commit([(lead.id, lead.ai_due_at)])
+    send_schedule.pop_due(timezone.now(), 100)     # [lead ids], now removed
+    send_schedule.reconcile()                      # members written
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KEY = getattr(settings, "AI_SCHEDULE_KEY", "ai-followups:due")
+REDIS_URL = getattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+CHUNK_SIZE = 5000
+
+# Lead columns that decide whether (and when) a lead is in the wheel
+SCHEDULE_FIELDS = ("next_ai_send_at", "opted_in_for_ai", "opted_out", "has_replied")
+
+_client = None
+
+
+def _redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+    return _client
+
+
+def due_time(next_ai_send_at, opted_in_for_ai, opted_out, has_replied) -> Optional[datetime]:
+    """When the lead is due an AI text, or None when it isn't (SCHEDULE_FIELDS order)."""
+    if opted_in_for_ai and not opted_out and not has_replied:
+        return next_ai_send_at
+    return None
+
+
+def mirror(entries: Iterable[Tuple[int, Optional[datetime]]]) -> None:
+    """Set each (lead id, due time) in the wheel; a None due time removes the lead."""
+    pipe = _redis().pipeline(transaction=False)
+    for lead_id, due in entries:
+        if due is None:
+            pipe.zrem(KEY, lead_id)
+        else:
+            pipe.zadd(KEY, {lead_id: due.timestamp()})
+    try:
+        pipe.execute()
+    except redis.RedisError as exc:
+        # best-effort – reconcile() repairs the set from the table
+        logger.warning("Send schedule mirror failed: %s", exc)
+
+
+def mirror_on_commit(entries: Iterable[Tuple[int, Optional[datetime]]]) -> None:
+    """mirror() once the surrounding transaction commits."""
+    entries = list(entries)
+    if entries:
+        transaction.on_commit(lambda: mirror(entries))
+
+
+def pop_due(now: datetime, limit: int) -> List[int]:
+    """Claim up to *limit* members due at *now*; each id is returned to one caller only."""
+    client = _redis()
+    members = client.zrangebyscore(KEY, "-inf", now.timestamp(), start=0, num=limit)
+    if not members:
+        return []
+    pipe = client.pipeline(transaction=False)
+    for member in members:
+        pipe.zrem(KEY, member)
+    return [int(member) for member, removed in zip(members, pipe.execute()) if removed]
+
+
+def next_due() -> Optional[datetime]:
+    """The earliest due time in the wheel, if any."""
+    head = _redis().zrange(KEY, 0, 0, withscores=True)
+    return datetime.fromtimestamp(head[0][1], tz=dt_timezone.utc) if head else None
+
+
+def reconcile(chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Rebuild the wheel from the Lead table; return members written.
+
+    The new set is built under a scratch key and swapped in with RENAME,
+    then leads written during the scan (version past the starting mark)
+    are mirrored again so the swap can't drop their updates.
+    """
+    Lead = apps.get_model("dashboard", "Lead")
+    SyncSequence = apps.get_model("dashboard", "SyncSequence")
+    client = _redis()
+    scratch = f"{KEY}:rebuild"
+    start = SyncSequence.objects.filter(name="lead").values_list("value", flat=True).first() or 0
+
+    client.delete(scratch)
+    rows = Lead.objects.scheduled().order_by("id").values_list("id", "next_ai_send_at")
+    written, last = 0, 0
+    while True:
+        chunk = list(rows.filter(id__gt=last)[:chunk_size])
+        if not chunk:
+            break
+        client.zadd(scratch, {lead_id: due.timestamp() for lead_id, due in chunk})
+        written += len(chunk)
+        last = chunk[-1][0]
+
+    if written:
+        client.rename(scratch, KEY)
+    else:
+        client.delete(KEY)
+    Lead.objects.filter(version__gt=start).mirror_schedule()
+    return written
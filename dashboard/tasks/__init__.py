@@ -11,13 +11,19 @@ from __future__ import annotations
 
 import logging
 import os
-from datetime import timedelta, time
+from datetime import datetime, timedelta, time
+from datetime import timezone as dt_timezone
 
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from ..models import Lead, Message
+from ..models import Lead, Message, SyncSequence
+from ..services import send_schedule
+from ..services.ai_scheduler import get_next_send
+from ..services.realtime import publish
+from ..utils.phone import normalize_phone
 from ..utils.ai import compose_outbound_text
 from ..utils.sms import send_sms
 
@@ -29,7 +35,19 @@ logger = logging.getLogger(__name__)
 
 SEND_WINDOW_START: time       = getattr(settings, "SEND_WINDOW_START", time(8, 0))
 SEND_WINDOW_END:   time       = getattr(settings, "SEND_WINDOW_END",   time(20, 0))
-FOLLOW_UP_COOLDOWN: timedelta = getattr(settings, "FOLLOW_UP_COOLDOWN", timedelta(days=2))
+
+# queue_ai_followups_task runs every minute and queues whatever falls due before
+# the next run, DISPATCH_BATCH_SIZE leads per query
+DISPATCH_BATCH_SIZE: int       = getattr(settings, "AI_DISPATCH_BATCH_SIZE", 500)
+DISPATCH_LOOKAHEAD: timedelta  = getattr(settings, "AI_DISPATCH_LOOKAHEAD", timedelta(minutes=1))
+# a queued lead's next_ai_send_at is leased this far past its send – if the
+# send never happens (enqueue lost, worker died) the lead comes due again
+DISPATCH_LEASE: timedelta      = getattr(settings, "AI_DISPATCH_LEASE", timedelta(minutes=15))
+# a scheduled send that can't go out (no draft, no phone, retries used up) is retried this much later
+FOLLOW_UP_RETRY_DELAY: timedelta = getattr(settings, "AI_FOLLOW_UP_RETRY_DELAY", timedelta(hours=1))
+
+# SyncSequence holding the epoch second rescore_time_decay last ran at
+DECAY_WATERMARK = "score_decay"
 
 TWILIO_PHONE_NUMBER = (
     getattr(settings, "TWILIO_PHONE_NUMBER", None) or os.getenv("TWILIO_PHONE_NUMBER")
@@ -46,8 +64,54 @@ TWILIO_AUTH_TOKEN = (
 # ────────────────────────────────────────────────────────────────────────────────
 
 def _best_phone(lead: Lead) -> str:
-    """Return the first non-empty phone field for the lead, or an empty string."""
-    return (lead.cellphone or lead.dayphone or lead.evephone or "").strip()
+    """Return the first usable phone for the lead in E.164, or an empty string."""
+    return (
+        lead.phone_e164
+        or normalize_phone(lead.dayphone)
+        or normalize_phone(lead.evephone)
+        or ""
+    )
+
+
+def send_window_opens(now: datetime) -> datetime:
+    """*now* inside the SEND_WINDOW (local time), else when it next opens."""
+    local = timezone.localtime(now)
+    if SEND_WINDOW_START <= local.time() <= SEND_WINDOW_END:
+        return now
+    day = local.date() if local.time() < SEND_WINDOW_START else local.date() + timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, SEND_WINDOW_START))
+
+
+def _claim(lead_ids, now) -> datetime:
+    """
+    Lease queued leads: their due time moves past the send instead of being
+    cleared. Returns the lease – the send task's token for the claim.
+    """
+    lease = now + DISPATCH_LOOKAHEAD + DISPATCH_LEASE
+    Lead.objects.filter(id__in=lead_ids).update(next_ai_send_at=lease)
+    return lease
+
+
+def _take_lease(lead_id: int, lease: str | None) -> datetime | None:
+    """
+    Consume the claim *lease* (ISO timestamp) for a scheduled send: swap it
+    for a fresh hold in one conditional UPDATE. None when the lease expired
+    and the lead was queued again, moved or sent – the caller must not send.
+    """
+    if not lease:
+        return None
+    held = timezone.now() + DISPATCH_LEASE
+    taken = Lead.objects.filter(pk=lead_id, next_ai_send_at=datetime.fromisoformat(lease)).update(
+        next_ai_send_at=held
+    )
+    return held if taken else None
+
+
+def _retry_later(lead: Lead, reason: str) -> None:
+    """Keep a scheduled follow-up that couldn't go out on the schedule, FOLLOW_UP_RETRY_DELAY on."""
+    lead.next_ai_send_at = timezone.now() + FOLLOW_UP_RETRY_DELAY
+    lead.save(update_fields=["next_ai_send_at"])
+    logger.warning("Lead %s – %s; follow-up retried at %s", lead.id, reason, lead.next_ai_send_at)
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -81,16 +145,41 @@ def generate_ai_message_task(lead_id: int) -> None:
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
-def send_ai_message_task(self, lead_id: int) -> None:
-    """Send the stored AI draft via Twilio and log the outbound."""
+def send_ai_message_task(self, lead_id: int, scheduled: bool = False, lease: str | None = None) -> None:
+    """
+    Send the stored AI draft via Twilio and log the outbound.
+
+    *scheduled* sends come from the dispatchers with the claim's *lease*:
+    the lead is checked again (it may have replied or opted out since it was
+    queued), the lease is consumed – a task whose lease expired and was
+    re-queued drops out, so the customer is texted once – a draft is
+    written if there is none, and the next follow-up is scheduled after the
+    send. One that can't go out is rescheduled FOLLOW_UP_RETRY_DELAY later.
+    """
     lead = Lead.objects.get(pk=lead_id)
 
+    if scheduled:
+        if not lead.opted_in_for_ai or lead.opted_out or lead.has_replied:
+            logger.info("Lead %s – no longer due an AI follow-up", lead.id)
+            return
+        held = _take_lease(lead.id, lease)
+        if held is None:
+            logger.info("Lead %s – claim %s no longer held, skipping send", lead.id, lease)
+            return
+        if not lead.ai_message:
+            lead.ai_message = generate_ai_message(lead)
+            lead.save(update_fields=["ai_message"])
+
     if not lead.ai_message:
+        if scheduled:
+            return _retry_later(lead, "no draft to send")
         logger.info("Lead %s – nothing to send", lead.id)
         return
 
     phone = _best_phone(lead)
     if not phone:
+        if scheduled:
+            return _retry_later(lead, "no phone number")
         logger.warning("Lead %s has no phone number – skipping send", lead.id)
         return
 
@@ -104,9 +193,14 @@ def send_ai_message_task(self, lead_id: int) -> None:
         )
     except Exception as exc:
         logger.error("SMS send failed for lead %s – %s", lead.id, exc)
-        raise self.retry(exc=exc, countdown=30)
-
-    Message.objects.create(
+        if not scheduled:
+            raise self.retry(exc=exc, countdown=30)
+        if self.request.retries >= self.max_retries:
+            _retry_later(lead, "send failed after retries")
+        # the retry carries the hold this attempt took as its lease
+        raise self.retry(exc=exc, countdown=30, kwargs={"scheduled": True, "lease": held.isoformat()})
+
+    log = Message.objects.create(
         lead=lead,
         content=lead.ai_message,
         direction=Message.Direction.OUTBOUND,
@@ -115,42 +209,144 @@ def send_ai_message_task(self, lead_id: int) -> None:
         sent_by_ai=True,
         timestamp=timezone.now(),
     )
+    publish("message.outbound", {"lead_id": lead.id, "message_id": log.id, "source": "AI"})
     lead.last_texted = timezone.now()
     lead.ai_message = ""
     lead.ai_message_count += 1
-    lead.save(update_fields=["last_texted", "ai_message", "ai_message_count"])
+    update_fields = ["last_texted", "ai_message", "ai_message_count"]
+    if scheduled:
+        next_dt, next_stage = get_next_send(
+            current_stage=lead.follow_up_stage,
+            last_send_at=lead.last_texted,
+            lead_created=lead.created_at,
+        )
+        lead.follow_up_stage = next_stage or lead.follow_up_stage
+        # end of the cadence → nothing more is due
+        lead.next_ai_send_at = next_dt if next_stage else None
+        update_fields += ["follow_up_stage", "next_ai_send_at"]
+    lead.save(update_fields=update_fields)
     logger.info("SMS sent for lead %s (SID %s)", lead.id, sid)
 
 
 @shared_task
-def queue_ai_followups_task() -> None:
-    """Beat-triggered scan that prepares/sends follow-ups (max 6 per run)."""
+def queue_ai_followups_task(batch_size: int | None = None) -> dict:
+    """
+    Beat-triggered dispatcher (every minute): queue every lead whose
+    ``next_ai_send_at`` falls before the next run, each with a Celery ETA
+    at its due time, so texts go out on schedule rather than on beat ticks.
+
+    Due leads are read through lead_ai_due_idx *batch_size* at a time and
+    claimed in the same transaction by leasing ``next_ai_send_at``
+    (DISPATCH_LEASE past the send), so an overlapping run can't queue them
+    twice and a send that never runs comes due again; send_ai_message_task
+    schedules the next follow-up after sending. Returns – and logs – how many were
+    queued and how late the overdue ones were (lag = now − due time).
+    """
+    batch_size = batch_size or DISPATCH_BATCH_SIZE
     now = timezone.now()
-    start = now.replace(hour=SEND_WINDOW_START.hour, minute=0, second=0, microsecond=0)
-    end   = now.replace(hour=SEND_WINDOW_END.hour,   minute=0, second=0, microsecond=0)
-
-    if not (start <= now <= end):
-        return
-
-    leads = (
-        Lead.objects
-        .filter(last_texted__lt=now - FOLLOW_UP_COOLDOWN)
-        .order_by("last_texted")[:6]
+    if send_window_opens(now) > now:
+        return {"queued": 0, "overdue": 0, "max_lag_seconds": 0.0, "avg_lag_seconds": 0.0}
+
+    horizon = now + DISPATCH_LOOKAHEAD
+    queued, lags = 0, []
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Lead.objects.due_by(horizon)
+                .select_for_update(skip_locked=True)
+                .values_list("id", "next_ai_send_at")[:batch_size]
+            )
+            if batch:
+                lease = _claim([lead_id for lead_id, _ in batch], now)
+
+        for lead_id, due in batch:
+            send_ai_message_task.apply_async(
+                (lead_id,), {"scheduled": True, "lease": lease.isoformat()}, eta=max(due, now)
+            )
+            if due <= now:
+                lags.append((now - due).total_seconds())
+        queued += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    report = {
+        "queued": queued,
+        "overdue": len(lags),
+        "max_lag_seconds": max(lags, default=0.0),
+        "avg_lag_seconds": sum(lags) / len(lags) if lags else 0.0,
+    }
+    logger.info(
+        "AI dispatch: queued %(queued)s, %(overdue)s overdue (max lag %(max_lag_seconds).0fs, "
+        "avg %(avg_lag_seconds).0fs)",
+        report,
     )
+    return report
+
+
+def dispatch_from_wheel(batch_size: int | None = None, now: datetime | None = None) -> dict:
+    """
+    One turn of the timing-wheel pop loop (``manage.py run_send_scheduler``):
+    claim the members of the Redis wheel that are due, claim them again in
+    the database exactly like queue_ai_followups_task, and queue their sends
+    right away. A member whose row is no longer due (moved, replied, opted
+    out, or claimed by the beat dispatcher) is mirrored back from its row.
+    """
+    batch_size = batch_size or DISPATCH_BATCH_SIZE
+    now = now or timezone.now()
+    report = {"queued": 0, "stale": 0, "max_lag_seconds": 0.0}
+    if send_window_opens(now) > now:
+        return report
+
+    claimed = send_schedule.pop_due(now, batch_size)
+    if not claimed:
+        return report
+    with transaction.atomic():
+        due = dict(
+            Lead.objects.due_by(now).filter(id__in=claimed)
+            .select_for_update(skip_locked=True)
+            .values_list("id", "next_ai_send_at")
+        )
+        if due:
+            lease = _claim(list(due), now)
+
+    stale = [lead_id for lead_id in claimed if lead_id not in due]
+    if stale:
+        Lead.objects.filter(id__in=stale).mirror_schedule()
+    for lead_id in due:
+        send_ai_message_task.apply_async((lead_id,), {"scheduled": True, "lease": lease.isoformat()})
+
+    report.update(
+        queued=len(due),
+        stale=len(stale),
+        max_lag_seconds=max(((now - at).total_seconds() for at in due.values()), default=0.0),
+    )
+    return report
 
-    for lead in leads:
-        if lead.ai_message:
-            send_ai_message_task.delay(lead.id)
-        else:
-            generate_ai_message_task.delay(lead.id)
 
-    logger.info("Queued %s ready messages", leads.count())
+@shared_task
+def score_leads() -> None:
+    """Nightly consistency sweep – scores are otherwise kept current on write."""
+    updated = Lead.objects.rescore()
+    logger.info("Lead score sweep: %s corrected", updated)
 
 
 @shared_task
-def score_leads() -> None:
-    """Placeholder for nightly lead-scoring job (future work)."""
-    logger.debug("score_leads placeholder executed – nothing to do (yet)")
+def rescore_time_decay() -> None:
+    """
+    Hourly: rescore only the leads a time-based scoring rule flipped for
+    since the previous run (indexed range per rule). The first run, with
+    no mark yet, sweeps everything.
+    """
+    now = timezone.now()
+    mark, _ = SyncSequence.objects.get_or_create(name=DECAY_WATERMARK)
+    if mark.value:
+        since = datetime.fromtimestamp(mark.value, tz=dt_timezone.utc)
+        updated = Lead.objects.crossed_decay(since, now).rescore()
+    else:
+        updated = Lead.objects.rescore()
+    # floor to the second – the next window overlaps a little, never gaps
+    SyncSequence.objects.filter(name=DECAY_WATERMARK).update(value=int(now.timestamp()))
+    logger.info("Score decay: %s leads rescored", updated)
 
 
 @shared_task
@@ -158,3 +354,9 @@ def send_scheduled_ai_messages() -> None:
     """Legacy alias so any old beat entries keep working."""
     logger.debug("send_scheduled_ai_messages alias invoked")
     queue_ai_followups_task.delay()
+
+
+# Task modules that live beside this one – imported so autodiscovery registers them
+from .export_jobs import run_export_job  # noqa: E402,F401
+from .import_jobs import run_import_job  # noqa: E402,F401
+from .dedupe import refresh_duplicate_candidates  # noqa: E402,F401
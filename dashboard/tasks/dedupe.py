@@ -0,0 +1,22 @@
+# dashboard/tasks/dedupe.py
+"""
+Celery task: keep DuplicateCandidate current as leads arrive.
+
+Only leads whose version moved since the previous run are re-keyed and
+re-compared (see dashboard.services.lead_dedupe), so the task can run every
+few minutes from beat.
+"""
+
+import logging
+
+from celery import shared_task
+
+from dashboard.services.lead_dedupe import refresh_candidates
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_duplicate_candidates() -> None:
+    result = refresh_candidates()
+    logger.info("Duplicate scan: %(leads)s leads re-checked, %(candidates)s candidate pairs", result)
@@ -0,0 +1,158 @@
+# dashboard/tasks/export_jobs.py
+"""
+Celery task: run an ExportJob in the worker instead of a web request.
+
+The file is written gzip-compressed under settings.EXPORT_ROOT, first to a
+``.part`` file that is renamed on success, so a download never sees a
+half-written artifact. Progress lands in ExportJob.processed_rows after every
+chunk, which /api/export-jobs/<id>/ turns into a percentage.
+
+Each chunk is sealed as its own gzip member (concatenated members are one
+valid gzip stream) and checkpointed on the job row. When a worker dies the
+message is redelivered (acks_late) and the task truncates the ``.part`` file
+to the last checkpoint and carries on from the last lead written. A RUNNING
+job whose heartbeat is older than EXPORT_STALE_AFTER may be claimed again –
+by a redelivery or by POST /api/export-jobs/<id>/resume/.
+"""
+
+import gzip
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from dashboard.models import ExportJob, Lead
+from dashboard.services.lead_export import write_export
+from dashboard.services.lead_query import filter_leads
+
+logger = logging.getLogger(__name__)
+
+EXPORT_ROOT = Path(getattr(settings, "EXPORT_ROOT", Path(settings.BASE_DIR) / "exports"))
+
+# a running export checkpoints every chunk; this long without one means its worker is gone
+EXPORT_STALE_AFTER: timedelta = getattr(settings, "EXPORT_STALE_AFTER", timedelta(minutes=10))
+
+
+class _Superseded(Exception):
+    """Another worker has claimed the job since this one checkpointed."""
+
+
+class _GzipMembers:
+    """Text sink over a binary file; checkpoint() seals the open gzip member."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.member = None
+
+    def write(self, text: str) -> int:
+        if self.member is None:
+            self.member = gzip.GzipFile(fileobj=self.raw, mode="wb")
+        return self.member.write(text.encode("utf-8"))
+
+    def checkpoint(self) -> int:
+        """Seal the current member, flush it to disk and return the file size."""
+        if self.member is not None:
+            self.member.close()  # leaves self.raw open
+            self.member = None
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        return self.raw.tell()
+
+
+def export_path(job: ExportJob) -> Path:
+    return EXPORT_ROOT / f"leads-{job.pk}.{job.format}.gz"
+
+
+def is_stale(job: ExportJob, now=None) -> bool:
+    """True when *job* is RUNNING but its worker has stopped checkpointing."""
+    now = now or timezone.now()
+    return job.status == ExportJob.Status.RUNNING and (
+        job.heartbeat_at is None or job.heartbeat_at < now - EXPORT_STALE_AFTER
+    )
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def run_export_job(self, job_id: int) -> None:
+    """Write (or resume writing) the export file for *job_id* from its last checkpoint."""
+    now = timezone.now()
+    jobs = ExportJob.objects.filter(pk=job_id)
+    claimable = (
+        Q(status__in=[ExportJob.Status.PENDING, ExportJob.Status.FAILED])
+        | Q(status=ExportJob.Status.RUNNING, heartbeat_at__isnull=True)
+        | Q(status=ExportJob.Status.RUNNING, heartbeat_at__lt=now - EXPORT_STALE_AFTER)
+    )
+    if not jobs.filter(claimable).update(status=ExportJob.Status.RUNNING, error="", heartbeat_at=now):
+        status = jobs.values_list("status", flat=True).first()
+        if status == ExportJob.Status.RUNNING and self.request.retries < self.max_retries:
+            # redelivered while the last heartbeat is fresh – look again once it could be stale
+            raise self.retry(countdown=EXPORT_STALE_AFTER.total_seconds())
+        logger.info("Export %s is %s – skipping", job_id, status)
+        return
+
+    job = jobs.get()
+    path = export_path(job)
+    partial = path.with_name(path.name + ".part")
+    heartbeat = now
+
+    def checkpoint(written: int, last_id: int) -> None:
+        nonlocal heartbeat
+        size = sink.checkpoint()
+        beat = timezone.now()
+        if not jobs.filter(heartbeat_at=heartbeat).update(
+            processed_rows=written, last_id=last_id, partial_bytes=size, heartbeat_at=beat
+        ):
+            raise _Superseded
+        heartbeat = beat
+
+    try:
+        queryset = filter_leads(Lead.objects.all(), job.filters)
+        if not job.total_rows:
+            jobs.update(total_rows=queryset.count())
+
+        EXPORT_ROOT.mkdir(parents=True, exist_ok=True)
+        resume = bool(job.last_id) and partial.exists() and partial.stat().st_size >= job.partial_bytes
+        if not resume:
+            job.last_id = job.processed_rows = job.partial_bytes = 0
+            jobs.update(last_id=0, processed_rows=0, partial_bytes=0)
+        else:
+            logger.info("Export %s resuming after lead %s", job_id, job.last_id)
+
+        with open(partial, "r+b" if resume else "wb") as raw:
+            raw.truncate(job.partial_bytes)
+            raw.seek(job.partial_bytes)
+            sink = _GzipMembers(raw)
+            written = write_export(
+                sink,
+                job.format,
+                queryset,
+                job.fields,
+                include_messages=job.include_messages,
+                on_chunk=checkpoint,
+                after_id=job.last_id,
+                written=job.processed_rows,
+            )
+            sink.checkpoint()
+        os.replace(partial, path)
+    except _Superseded:
+        logger.warning("Export %s claimed by another worker – stopping", job_id)
+        return
+    except Exception as exc:
+        # the .part file and checkpoint stay; POST …/resume/ continues from there
+        logger.exception("Export %s failed", job_id)
+        jobs.filter(heartbeat_at=heartbeat).update(
+            status=ExportJob.Status.FAILED, error=str(exc), finished_at=timezone.now()
+        )
+        return
+
+    jobs.filter(heartbeat_at=heartbeat).update(
+        status=ExportJob.Status.DONE,
+        processed_rows=written,
+        file_path=str(path),
+        finished_at=timezone.now(),
+    )
+    logger.info("Export %s finished – %s leads → %s", job_id, written, path)
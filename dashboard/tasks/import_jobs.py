@@ -0,0 +1,84 @@
+# dashboard/tasks/import_jobs.py
+"""
+Celery task: run an ImportJob from the CSV stored at upload time.
+
+Each batch is upserted and checkpointed in one transaction – the lead rows,
+the ImportReject rows and ImportJob.processed_rows commit together. When a
+worker dies the message is redelivered (acks_late) and the task skips the
+rows already committed instead of starting over.
+"""
+
+import csv
+import logging
+import os
+from pathlib import Path
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from dashboard.models import ImportJob, ImportReject
+from dashboard.services.lead_import import BATCH_SIZE, iter_batches, prepare_rows, upsert_batch
+
+logger = logging.getLogger(__name__)
+
+IMPORT_ROOT = Path(getattr(settings, "IMPORT_ROOT", Path(settings.BASE_DIR) / "imports"))
+
+# reject reasons are free text from the row validators
+REASON_LENGTH = ImportReject._meta.get_field("reason").max_length
+
+
+def count_rows(path) -> int:
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        return sum(1 for _ in csv.DictReader(fh))
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def run_import_job(job_id: int, batch_size: int = BATCH_SIZE) -> None:
+    """Import (or resume importing) *job_id* from its last checkpoint."""
+    jobs = ImportJob.objects.filter(pk=job_id)
+    if not jobs.exclude(status=ImportJob.Status.DONE).update(status=ImportJob.Status.RUNNING, error=""):
+        logger.info("Import %s already finished – skipping", job_id)
+        return
+
+    job = jobs.get()
+    try:
+        if not job.total_rows:
+            job.total_rows = count_rows(job.file_path)
+            jobs.update(total_rows=job.total_rows)
+
+        with open(job.file_path, encoding="utf-8-sig", newline="") as fh:
+            rows, transform = prepare_rows(csv.DictReader(fh))
+            checkpoint = job.processed_rows
+            for batch in iter_batches(rows, batch_size, skip=checkpoint):
+                with transaction.atomic():
+                    # lock the job row: a second worker on the same job stops here
+                    if jobs.select_for_update().values_list("processed_rows", flat=True).get() != checkpoint:
+                        logger.warning("Import %s advanced by another worker – stopping", job_id)
+                        return
+                    created, updated, rejects = upsert_batch(batch, transform)
+                    ImportReject.objects.bulk_create(
+                        ImportReject(job_id=job_id, row=row, reason=reason[:REASON_LENGTH])
+                        for row, reason in rejects
+                    )
+                    checkpoint += len(batch)
+                    jobs.update(
+                        processed_rows=checkpoint,
+                        created_count=F("created_count") + created,
+                        updated_count=F("updated_count") + updated,
+                        failed_count=F("failed_count") + len(rejects),
+                    )
+    except Exception as exc:
+        # committed batches stay; POST …/resume/ continues from the checkpoint
+        logger.exception("Import %s failed", job_id)
+        jobs.update(status=ImportJob.Status.FAILED, error=str(exc), finished_at=timezone.now())
+        return
+
+    jobs.update(status=ImportJob.Status.DONE, finished_at=timezone.now())
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        logger.warning("Could not remove import file %s", job.file_path)
+    logger.info("Import %s finished", job_id)
@@ -1,25 +1,19 @@
 # C:\Projects\auto_text_crm_dockerized_clean\dashboard\tasks\score_leads.py
 """
-Nightly task: refresh Lead.score for every active lead.
-Runs via Celery Beat (see celery_tasks.py snippet below).
+Nightly consistency sweep for Lead.score.
+
+Scores are recomputed on every write that touches a score input (see
+dashboard.services.lead_scoring), so this only catches what no write
+covers – leads ageing out of the "created < 3 days" bonus, or rows
+changed behind the ORM's back. It runs in short per-chunk UPDATEs, never
+one long transaction.
 """
 
 from celery import shared_task
-from django.db import transaction
 from dashboard.models import Lead
-from dashboard.services.lead_scoring import calculate_score
 
 
 @shared_task
 def score_all_leads():
-    updated = 0
-
-    with transaction.atomic():
-        for lead in Lead.objects.all():
-            new_score = calculate_score(lead)
-            if lead.score != new_score:
-                lead.score = new_score
-                lead.save(update_fields=["score"])
-                updated += 1
-
+    updated = Lead.objects.rescore()
     return f"Lead scores refreshed: {updated} updated"
@@ -22,13 +22,13 @@ from datetime import timedelta
 
 import openai
 from celery import shared_task
-from django.db.models import Q
 from django.utils import timezone
 from django.conf import settings
 from twilio.rest import Client
 
 from dashboard.models import Lead, MessageLog
 from dashboard.services.ai_scheduler import get_next_send
+from dashboard.services.realtime import publish
 
 logger = logging.getLogger(__name__)
 
@@ -45,13 +45,7 @@ TWILIO_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 def send_scheduled_ai_messages():
     now = timezone.now()
 
-    leads = Lead.objects.filter(
-        opted_in_for_ai=True,
-        opted_out=False,
-        has_replied=False
-    ).filter(
-        Q(next_ai_send_at__lte=now) | Q(next_ai_send_at__isnull=True)
-    )
+    leads = Lead.objects.due_for_ai(now)
 
     sent_count = 0
 
@@ -95,13 +89,13 @@ def send_scheduled_ai_messages():
             sms = twilio_client.messages.create(
                 body=lead.ai_message,
                 from_=TWILIO_NUMBER,
-                to=lead.cellphone
+                to=lead.phone_e164 or lead.cellphone
             )
 
             # ------------------------------------------------------------------
             # 3. Log message
             # ------------------------------------------------------------------
-            MessageLog.objects.create(
+            log = MessageLog.objects.create(
                 lead=lead,
                 content=lead.ai_message,
                 source="AI",
@@ -112,6 +106,7 @@ def send_scheduled_ai_messages():
                 delivery_status=sms.status,
                 follow_up_stage=lead.follow_up_stage,
             )
+            publish("message.outbound", {"lead_id": lead.id, "message_id": log.id, "source": "AI"})
 
             # ------------------------------------------------------------------
             # 4. Schedule next send
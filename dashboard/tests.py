@@ -1,7 +1,55 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import time, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import fakeredis
+import numpy as np
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from dashboard.models import Lead, MessageLog
+from dashboard.models import (
+    DuplicateCandidate,
+    ExportJob,
+    ImportProfile,
+    Lead,
+    LeadFeatures,
+    MessageLog,
+    ScoringModel,
+    SyncSequence,
+    rebuild_features,
+)
+from dashboard.services.column_types import infer_date_columns
+from dashboard.services import send_schedule
+from dashboard.services.import_profiles import compile_profile, profile_for
+from dashboard.services.lead_dedupe import auto_merge, refresh_candidates, soundex
+from dashboard.services.lead_model import fit_logistic, predict_all
+from dashboard.services.lead_scoring import calculate_score
+from dashboard.tasks import (
+    DECAY_WATERMARK,
+    DISPATCH_LEASE,
+    DISPATCH_LOOKAHEAD,
+    FOLLOW_UP_RETRY_DELAY,
+    dispatch_from_wheel,
+    export_jobs,
+    import_jobs,
+    queue_ai_followups_task,
+    rescore_time_decay,
+    send_ai_message_task,
+)
+from dashboard.tasks.export_jobs import EXPORT_STALE_AFTER, run_export_job
+from dashboard.tasks.import_jobs import run_import_job
 
 
 class GenerateAIMessageTest(TestCase):
@@ -42,20 +90,1114 @@ class ManualMessageTest(TestCase):
 
 
 class MessageLogRetrievalTest(TestCase):
-    """GET /message-thread/<lead_id>/ should return all logs in chronological order."""
+    """GET /message-thread/<lead_id>/ pages the thread with before/after cursors."""
 
     def setUp(self):
         self.client = Client()
         self.lead = Lead.objects.create(name="Thread Lead", cellphone="9998887777")
-        MessageLog.objects.create(lead=self.lead, content="First", source="Manual")
-        MessageLog.objects.create(lead=self.lead, content="Second", source="IN")
+        self.logs = [
+            MessageLog.objects.create(lead=self.lead, content=f"Msg {i}", source="Manual")
+            for i in range(5)
+        ]
+        MessageLog.objects.create(lead=self.lead, content="prompt", source="System")
+        self.url = reverse("message_thread", args=[self.lead.id])
 
     def test_message_thread_returns_logs(self):
-        url = reverse("get_message_thread", args=[self.lead.id])
-        response = self.client.get(url)
+        response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
 
         data = response.json()
-        self.assertEqual(len(data), 2)
-        self.assertEqual(data[0]["content"], "First")
-        self.assertEqual(data[1]["content"], "Second")
+        self.assertEqual([m["body"] for m in data["messages"]], [f"Msg {i}" for i in range(5)])
+        self.assertFalse(data["has_more"])
+
+    def test_latest_page_then_before(self):
+        data = self.client.get(self.url, {"page_size": 2}).json()
+        self.assertEqual([m["body"] for m in data["messages"]], ["Msg 3", "Msg 4"])
+        self.assertTrue(data["has_more"])
+
+        data = self.client.get(
+            self.url, {"page_size": 2, "before": data["messages"][0]["id"]}
+        ).json()
+        self.assertEqual([m["body"] for m in data["messages"]], ["Msg 1", "Msg 2"])
+        self.assertTrue(data["has_more"])
+
+    def test_after_polls_new_messages_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {"after": self.logs[2].id}).json()
+        self.assertEqual([m["body"] for m in data["messages"]], ["Msg 3", "Msg 4"])
+        self.assertFalse(data["has_more"])
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get(self.url, {"before": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"before": 1, "after": 1}).status_code, 400)
+
+
+class LeadListPaginationTest(TestCase):
+    """GET /api/leads/ should page with a keyset cursor and honour ?fields=."""
+
+    def setUp(self):
+        self.client = Client()
+        for i in range(5):
+            Lead.objects.create(
+                name=f"Lead {i}",
+                cellphone=f"555000000{i}",
+                score=i * 20,
+                salesperson="Tommy" if i % 2 else "Ann",
+            )
+
+    def test_pages_cover_every_lead_once(self):
+        url = reverse("all_leads")
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": 2, "fields": "id,name"}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(url, params).json()
+            self.assertTrue(all(set(row) == {"id", "name"} for row in data["leads"]))
+            seen.extend(row["id"] for row in data["leads"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        expected = list(Lead.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filters_and_bad_input(self):
+        url = reverse("all_leads")
+        data = self.client.get(url, {"min_score": 40, "salesperson": "Ann"}).json()
+        self.assertEqual({row["name"] for row in data["leads"]}, {"Lead 2", "Lead 4"})
+
+        self.assertEqual(self.client.get(url, {"fields": "nope"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"cursor": "garbage"}).status_code, 400)
+
+    def test_legacy_payload(self):
+        data = self.client.get(reverse("all_leads"), {"legacy": "1"}).json()
+        self.assertEqual(len(data["leads"]), 5)
+        self.assertNotIn("next_cursor", data)
+        self.assertIn("appointment_time", data["leads"][0])
+
+    @patch("dashboard.services.lead_query.PAGE_SIZE", 2)
+    def test_paged_by_default(self):
+        data = self.client.get(reverse("all_leads")).json()
+        self.assertEqual(len(data["leads"]), 2)
+        self.assertTrue(data["next_cursor"])
+
+
+class LeadDeltaSyncTest(TestCase):
+    """GET /api/leads/changes/ should return only rows touched since a version."""
+
+    def setUp(self):
+        self.client = Client()
+        self.a = Lead.objects.create(name="A", cellphone="2220000001")
+        self.b = Lead.objects.create(name="B", cellphone="2220000002")
+        self.url = reverse("lead_changes")
+
+    def test_changes_updates_and_tombstones(self):
+        data = self.client.get(self.url, {"since": 0, "fields": "id,name"}).json()
+        self.assertEqual([r["name"] for r in data["leads"]], ["A", "B"])
+        since = data["version"]
+
+        self.a.new_message = True
+        self.a.save(update_fields=["new_message"])
+        Lead.objects.filter(pk=self.b.pk).delete()
+
+        data = self.client.get(self.url, {"since": since, "fields": "id"}).json()
+        self.assertEqual(data["leads"], [{"id": self.a.id}])
+        self.assertEqual(data["deleted"], [self.b.id])
+        self.assertGreater(data["version"], since)
+
+        data = self.client.get(self.url, {"since": data["version"]}).json()
+        self.assertEqual((data["leads"], data["deleted"]), ([], []))
+
+    def test_bulk_update_shares_a_version_and_pages(self):
+        Lead.objects.update(score=10)
+        data = self.client.get(self.url, {"since": 0, "page_size": 1}).json()
+        self.assertTrue(data["has_more"])
+
+        data = self.client.get(
+            self.url,
+            {"since": data["version"], "after_id": data["after_id"], "page_size": 1},
+        ).json()
+        self.assertEqual(len(data["leads"]), 1)
+        self.assertFalse(data["has_more"])
+
+
+class RealtimePublishTest(TestCase):
+    """Lead flag flips should be pushed once the transaction commits."""
+
+    def test_flag_flip_publishes_lead_updated(self):
+        lead = Lead.objects.create(name="Push", cellphone="3330000001")
+        lead = Lead.objects.get(pk=lead.pk)
+
+        with patch("dashboard.services.realtime._send") as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                lead.score = 5
+                lead.save(update_fields=["score"])
+            send.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                lead.new_message = True
+                lead.save(update_fields=["new_message"])
+
+        payload = json.loads(send.call_args.args[0])
+        self.assertEqual(payload["event"], "lead.updated")
+        self.assertEqual(payload["data"]["lead_id"], lead.id)
+        self.assertEqual(payload["data"]["fields"], ["new_message"])
+
+
+class QueryPlanTest(TestCase):
+    """Every hot-path query should be served by an index."""
+
+    def test_check_query_plans_passes(self):
+        call_command("check_query_plans", stdout=io.StringIO())
+
+
+class PhoneNormalizationTest(TestCase):
+    """Inbound SMS should match the lead on the normalized E.164 column."""
+
+    def setUp(self):
+        self.client = Client()
+        self.lead = Lead.objects.create(name="Formatted", cellphone="(555) 444-3322")
+
+    def test_phone_e164_computed_on_save(self):
+        self.assertEqual(self.lead.phone_e164, "+15554443322")
+
+        self.lead.cellphone = "555-444-9999"
+        self.lead.save(update_fields=["cellphone"])
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.phone_e164, "+15554449999")
+
+    def test_webhook_matches_exact_e164(self):
+        response = self.client.post(
+            reverse("twilio_webhook"), {"From": "+15554443322", "Body": "Still available?"}
+        )
+        self.assertEqual(response.status_code, 204)
+
+        self.lead.refresh_from_db()
+        self.assertTrue(self.lead.new_message)
+        self.assertTrue(
+            MessageLog.objects.filter(lead=self.lead, direction="IN", content="Still available?").exists()
+        )
+
+    def test_webhook_ignores_unparseable_sender(self):
+        # a lead without a usable phone has phone_e164 NULL
+        orphan = Lead.objects.create(name="No phone", cellphone="n/a", opted_in_for_ai=True)
+        self.assertIsNone(orphan.phone_e164)
+        version = orphan.version
+
+        response = self.client.post(reverse("twilio_webhook"), {"From": "12345", "Body": "STOP"})
+        self.assertEqual(response.status_code, 204)
+
+        self.assertFalse(MessageLog.objects.exists())
+        orphan.refresh_from_db()
+        self.assertEqual(orphan.version, version)
+        self.assertFalse(orphan.has_replied)
+
+
+class SearchApiTest(TestCase):
+    """GET /api/search/ should rank lead identity and message matches."""
+
+    def setUp(self):
+        self.client = Client()
+        self.tahoe = Lead.objects.create(name="Jane Tahoe", cellphone="4440001111", VehicleVIN="1GNSKCKD5MR123456")
+        self.other = Lead.objects.create(name="Bob Smith", cellphone="4440002222")
+        MessageLog.objects.create(lead=self.other, content="Is the Tahoe still on the lot?", source="IN")
+
+    def test_identity_and_message_hits(self):
+        data = self.client.get(reverse("search"), {"q": "tahoe"}).json()
+        ids = [r["id"] for r in data["results"]]
+        self.assertEqual(ids, [self.tahoe.id, self.other.id])
+        self.assertIn("[Tahoe]", data["results"][1]["snippet"])
+
+    def test_index_follows_writes(self):
+        url = reverse("search")
+        self.assertEqual(self.client.get(url, {"q": "MR123456"}).json()["results"][0]["id"], self.tahoe.id)
+
+        self.tahoe.VehicleVIN = "ZZZ999"
+        self.tahoe.save()
+        self.assertEqual(self.client.get(url, {"q": "MR123456"}).json()["results"], [])
+
+        self.assertEqual(self.client.get(url, {"q": "ab"}).status_code, 400)
+
+
+class InboxSummaryTest(TestCase):
+    """GET /api/inbox/ should list conversations by last activity with unread counts."""
+
+    def setUp(self):
+        self.client = Client()
+        self.quiet = Lead.objects.create(name="Quiet", cellphone="6660000001")
+        self.old = Lead.objects.create(name="Old", cellphone="6660000002")
+        self.busy = Lead.objects.create(name="Busy", cellphone="6660000003")
+
+        MessageLog.objects.create(lead=self.old, content="Hello from us", direction="OUT")
+        MessageLog.objects.create(lead=self.busy, content="Hi", direction="IN", source="IN")
+        MessageLog.objects.create(lead=self.busy, content="Any news?", direction="IN", source="IN")
+        MessageLog.objects.bulk_create(
+            [MessageLog(lead=self.old, content="prompt", source="System", read=True)]
+        )
+
+    def test_summary_order_snippet_and_unread(self):
+        rows = self.client.get(reverse("inbox_summary")).json()["conversations"]
+        self.assertEqual([r["id"] for r in rows], [self.busy.id, self.old.id])
+        self.assertEqual(rows[0]["last_message_snippet"], "Any news?")
+        self.assertEqual(rows[0]["unread_inbound_count"], 2)
+        self.assertEqual(rows[1]["last_message_snippet"], "Hello from us")
+
+    def test_older_message_keeps_latest_summary(self):
+        # timestamp is auto_now_add – put the summary ahead of the new row instead
+        latest = timezone.now() + timedelta(hours=1)
+        Lead.objects.filter(pk=self.busy.pk).update(last_message_at=latest)
+        MessageLog.objects.create(lead=self.busy, content="Late webhook", direction="IN", source="IN")
+        busy = Lead.objects.get(pk=self.busy.pk)
+        self.assertEqual(busy.last_message_at, latest)
+        self.assertEqual(busy.last_message_snippet, "Any news?")
+        self.assertEqual(busy.unread_inbound_count, 3)
+
+    def test_mark_read_resets_unread(self):
+        self.client.post(reverse("mark_messages_read"))
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.unread_inbound_count, 0)
+
+        rows = self.client.get(reverse("inbox_summary"), {"unread": "1"}).json()["conversations"]
+        self.assertEqual(rows, [])
+
+
+class LeadExportTest(TestCase):
+    """GET /api/leads/export/ streams CSV with list filters and a column selector."""
+
+    def setUp(self):
+        self.client = Client()
+        for i in range(4):
+            Lead.objects.create(
+                name=f"Lead {i}",
+                cellphone=f"555000001{i}",
+                score=i * 30,
+                extra_data={"tags": ["vip", "trade-in"]} if i == 3 else {},
+            )
+
+    def _rows(self, response):
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(body)))
+
+    def test_filters_and_columns(self):
+        response = self.client.get(
+            reverse("export_leads"), {"min_score": 60, "fields": "name,score,tags"}
+        )
+        self.assertEqual(
+            self._rows(response),
+            [["name", "score", "tags"], ["Lead 3", "90", "vip;trade-in"], ["Lead 2", "60", ""]],
+        )
+
+    def test_unknown_column(self):
+        response = self.client.get(reverse("export_leads"), {"fields": "name,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_hot_export_keeps_contract(self):
+        response = self.client.get(reverse("export_hot_leads"), {"min_score": " 85"})
+        self.assertIn('filename="hot_leads_score_85_plus.csv"', response["Content-Disposition"])
+        rows = self._rows(response)
+        self.assertEqual(rows[0][:3], ["id", "name", "cellphone"])
+        self.assertEqual([r[1] for r in rows[1:]], ["Lead 3"])
+
+        response = self.client.get(reverse("export_hot_leads"), {"min_score": 100})
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportJobTest(TestCase):
+    """POST /api/export-jobs/ queues a gzip export that reports progress and downloads."""
+
+    def setUp(self):
+        self.client = Client()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("dashboard.tasks.export_jobs.EXPORT_ROOT", Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for i in range(3):
+            lead = Lead.objects.create(name=f"Lead {i}", cellphone=f"555000002{i}")
+            MessageLog.objects.create(lead=lead, content=f"hi {i}", source="Manual")
+            Lead.objects.filter(pk=lead.pk).update(score=i * 50)
+
+    def _create(self, body):
+        with patch("dashboard.views_api.run_export_job.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("export_jobs"), json.dumps(body), content_type="application/json"
+                )
+        return response, delay
+
+    def test_ndjson_with_messages(self):
+        response, delay = self._create(
+            {"format": "ndjson", "fields": ["id", "name"], "filters": {"min_score": 50},
+             "include_messages": True}
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+        delay.assert_called_once_with(job_id)
+
+        run_export_job(job_id)
+
+        status = self.client.get(reverse("export_job_status", args=[job_id])).json()
+        self.assertEqual((status["status"], status["progress"]), ("done", 100))
+        self.assertEqual(status["processed_rows"], 2)
+
+        download = self.client.get(status["download_url"])
+        body = gzip.decompress(b"".join(download.streaming_content)).decode()
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["name"] for r in records], ["Lead 1", "Lead 2"])
+        self.assertEqual(records[0]["messages"][0]["content"], "hi 1")
+
+    def test_csv_default_columns(self):
+        job_id = self._create({})[0].json()["id"]
+        run_export_job(job_id)
+        download = self.client.get(reverse("export_job_download", args=[job_id]))
+        rows = list(csv.reader(io.StringIO(gzip.decompress(b"".join(download.streaming_content)).decode())))
+        self.assertEqual(rows[0], ["id", "name", "cellphone", "email", "vehicle_interest", "score", "created_at"])
+        self.assertEqual(len(rows), 4)
+
+    def test_not_ready_and_bad_input(self):
+        job_id = self._create({})[0].json()["id"]
+        self.assertEqual(self.client.get(reverse("export_job_download", args=[job_id])).status_code, 409)
+        self.assertEqual(self._create({"format": "xlsx"})[0].status_code, 400)
+        self.assertEqual(self._create({"fields": "nope"})[0].status_code, 400)
+        self.assertEqual(self._create({"filters": {"stage": ["Day 0"]}})[0].status_code, 400)
+
+    def _export_names(self, filters):
+        response = self._create({"format": "ndjson", "fields": ["name"], "filters": filters})[0]
+        self.assertEqual(response.status_code, 202)
+        run_export_job(response.json()["id"])
+        status = self.client.get(reverse("export_job_status", args=[response.json()["id"]])).json()
+        body = gzip.decompress(b"".join(self.client.get(status["download_url"]).streaming_content)).decode()
+        return [json.loads(line)["name"] for line in body.splitlines()]
+
+    def test_json_boolean_filters(self):
+        Lead.objects.filter(name="Lead 0").update(opted_in_for_ai=True)
+        self.assertEqual(self._export_names({"hot": True}), ["Lead 2"])
+        self.assertEqual(self._export_names({"opted_in_for_ai": True}), ["Lead 0"])
+        self.assertEqual(self._export_names({"opted_in_for_ai": False, "min_score": 50}), ["Lead 1", "Lead 2"])
+
+
+    def _download_rows(self, job_id):
+        download = self.client.get(reverse("export_job_download", args=[job_id]))
+        return list(csv.reader(io.StringIO(gzip.decompress(b"".join(download.streaming_content)).decode())))
+
+    def test_resumes_from_last_checkpoint(self):
+        job_id = self._create({"fields": ["name"]})[0].json()["id"]
+        real_write = export_jobs.write_export
+
+        def crash_after_second_chunk(*args, on_chunk, **kwargs):
+            def checkpoint(written, last_id):
+                on_chunk(written, last_id)
+                if written == 2:
+                    with open(partial, "ab") as fh:
+                        fh.write(b"half a gzip member")
+                    raise RuntimeError("worker lost")
+            return real_write(*args, on_chunk=checkpoint, chunk_size=1, **kwargs)
+
+        partial = Path(self.tmp.name) / f"leads-{job_id}.csv.gz.part"
+        with patch("dashboard.tasks.export_jobs.write_export", crash_after_second_chunk):
+            run_export_job(job_id)
+        status = self.client.get(reverse("export_job_status", args=[job_id])).json()
+        self.assertEqual((status["status"], status["processed_rows"]), ("failed", 2))
+
+        with patch("dashboard.views_api.run_export_job.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("export_job_resume", args=[job_id]))
+        delay.assert_called_once_with(job_id)
+        with patch("dashboard.tasks.export_jobs.write_export", wraps=real_write) as resumed:
+            run_export_job(job_id)
+        self.assertEqual(resumed.call_args.kwargs["written"], 2)  # picked up, not restarted
+
+        self.assertEqual(self._download_rows(job_id), [["name"], ["Lead 0"], ["Lead 1"], ["Lead 2"]])
+
+    def test_stalled_running_job_is_reclaimed(self):
+        job_id = self._create({"fields": ["name"]})[0].json()["id"]
+        ExportJob.objects.filter(pk=job_id).update(status="running", heartbeat_at=timezone.now())
+        self.assertEqual(self.client.post(reverse("export_job_resume", args=[job_id])).status_code, 409)
+        run_export_job.apply((job_id,))  # a live export is left alone
+        self.assertEqual(ExportJob.objects.get(pk=job_id).status, "running")
+
+        stalled = timezone.now() - EXPORT_STALE_AFTER - timedelta(minutes=1)
+        ExportJob.objects.filter(pk=job_id).update(heartbeat_at=stalled)
+        run_export_job(job_id)
+        self.assertEqual(len(self._download_rows(job_id)), 4)
+        self.assertEqual(self.client.post(reverse("export_job_resume", args=[job_id])).status_code, 409)
+
+
+class LeadImportTest(TestCase):
+    """POST /upload-leads/ streams the CSV and upserts leads in batches on phone_e164."""
+
+    HEADER = "cellphone,name,score,DoNotCall,VehicleYear,VehicleMake,VehicleModel,Trim\n"
+
+    def setUp(self):
+        self.client = Client()
+        self.existing = Lead.objects.create(
+            name="Old Name", cellphone="5550001111", score=70, opted_in_for_ai=True
+        )
+
+    def _upload(self, body, field="csv_file"):
+        upload = SimpleUploadedFile("leads.csv", body.encode(), content_type="text/csv")
+        return self.client.post(reverse("upload_leads"), {field: upload})
+
+    def test_creates_updates_and_rejects(self):
+        body = self.HEADER + (
+            "(555) 000-1111,New Name,75,true,2021,Chevy,Tahoe,LT\n"
+            "555-000-2222,Fresh Lead,10,false,,,,\n"
+            "12,Bad Phone,0,false,,,,\n"
+            "5550003333,Bad Bool,0,maybe,,,,\n"
+        )
+        with patch("dashboard.services.lead_import.BATCH_SIZE", 2):
+            data = self._upload(body).json()
+
+        self.assertEqual((data["created"], data["updated"], data["failed"]), (1, 1, 2))
+        self.assertEqual([r["row"] for r in data["rejects"]], [4, 5])
+
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, "New Name")
+        self.assertTrue(self.existing.DoNotCall)
+        self.assertTrue(self.existing.opted_in_for_ai)  # not in the CSV – untouched
+        self.assertEqual(self.existing.vehicle_interest, "2021 Chevy Tahoe")
+        self.assertEqual(self.existing.extra_data["Trim"], "LT")
+
+        fresh = Lead.objects.get(phone_e164="+15550002222")
+        self.assertEqual(fresh.score, 10)
+        self.assertGreater(fresh.version, 0)
+
+    def test_queries_do_not_grow_with_rows(self):
+        body = self.HEADER + "".join(f"55501{i:05d},Lead {i},0,false,,,,\n" for i in range(300))
+        with CaptureQueriesContext(connection) as queries:
+            data = self._upload(body, field="file").json()
+        self.assertEqual(data["imported"], 300)
+        # one multi-row INSERT … ON CONFLICT per SQLite variable-limit batch,
+        # never a query per row
+        self.assertLess(len(queries), 30)
+
+
+class ImportJobTest(TestCase):
+    """POST /api/import-jobs/ imports in checkpointed batches and resumes after a crash."""
+
+    def setUp(self):
+        self.client = Client()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch("dashboard.views_api.IMPORT_ROOT", Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create(self, body):
+        upload = SimpleUploadedFile("dealer.csv", body.encode(), content_type="text/csv")
+        with patch("dashboard.views_api.run_import_job.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse("import_jobs"), {"file": upload})
+        self.assertEqual(response.status_code, 202)
+        return response.json()["id"]
+
+    def test_resumes_from_last_checkpoint(self):
+        body = "cellphone,name\n" + "".join(f"55502{i:05d},Lead {i}\n" for i in range(5)) + "bad,Nope\n"
+        job_id = self._create(body)
+
+        real_upsert = import_jobs.upsert_batch
+        calls = []
+
+        def crash_on_second_batch(batch, *args):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError("worker lost")
+            return real_upsert(batch, *args)
+
+        with patch("dashboard.tasks.import_jobs.upsert_batch", crash_on_second_batch):
+            run_import_job(job_id, batch_size=2)
+
+        status = self.client.get(reverse("import_job_status", args=[job_id])).json()
+        self.assertEqual((status["status"], status["processed_rows"]), ("failed", 2))
+        self.assertEqual(status["progress"], 33)
+
+        with patch("dashboard.views_api.run_import_job.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("import_job_resume", args=[job_id]))
+        delay.assert_called_once_with(job_id)
+        run_import_job(job_id, batch_size=2)
+
+        status = self.client.get(reverse("import_job_status", args=[job_id])).json()
+        self.assertEqual(status["status"], "done")
+        self.assertEqual((status["created"], status["updated"], status["failed"]), (5, 0, 1))
+        self.assertEqual(Lead.objects.count(), 5)
+
+        rejects = self.client.get(status["rejects_url"])
+        rows = list(csv.reader(io.StringIO(b"".join(rejects.streaming_content).decode())))
+        self.assertEqual(rows, [["row", "reason"], ["7", "invalid cellphone 'bad'"]])
+
+    def test_finished_job_is_not_rerun(self):
+        job_id = self._create("cellphone,name\n5550300000,Only\n")
+        run_import_job(job_id)
+        run_import_job(job_id)
+        self.assertEqual(Lead.objects.filter(name="Only").count(), 1)
+        response = self.client.post(reverse("import_job_resume", args=[job_id]))
+        self.assertEqual(response.status_code, 409)
+
+
+class ColumnTypeInferenceTest(TestCase):
+    """Date columns are inferred once per header row, not fuzzy-parsed per cell."""
+
+    HEADERS = ["cellphone", "postalcode", "VehicleVIN", "LeadCreatedUTC", "ApptDate"]
+
+    def setUp(self):
+        self.rows = [
+            {
+                "cellphone": f"555040{i:04d}",
+                "postalcode": "90210",
+                "VehicleVIN": "1GNSKCKD4NR123456",
+                "LeadCreatedUTC": f"2024-03-{i + 1:02d} 10:15:00",
+                "ApptDate": f"04/{i + 1:02d}/2024 02:30 PM" if i % 2 else "",
+            }
+            for i in range(10)
+        ]
+
+    def test_infers_only_real_date_columns_appointment_first(self):
+        self.assertEqual(
+            infer_date_columns(self.HEADERS, self.rows),
+            [("ApptDate", "%m/%d/%Y %I:%M %p"), ("LeadCreatedUTC", "%Y-%m-%d %H:%M:%S")],
+        )
+
+    def test_appointment_only_from_appointment_columns(self):
+        transform = compile_profile(profile_for(self.HEADERS, self.rows))
+        with_appt = transform(self.rows[1])["extra_data"]
+        without = transform(self.rows[0])["extra_data"]
+        self.assertEqual(with_appt["appointment_time"], "2024-04-02 14:30:00")
+        self.assertNotIn("appointment_time", without)
+
+        # a file whose only date is the creation date has no appointment at all
+        headers = ["cellphone", "LeadCreatedUTC"]
+        rows = [{h: row[h] for h in headers} for row in self.rows]
+        self.assertNotIn("appointment_time", compile_profile(profile_for(headers, rows))(rows[0])["extra_data"])
+
+
+class ImportProfileTest(TestCase):
+    """Profiles are picked by header signature and compiled into a row transform."""
+
+    HEADERS = ["Mobile Phone", "First Name", "Zip", "Sales Rep", "Notes"]
+
+    def test_auto_profile_maps_obvious_headers(self):
+        profile = profile_for(self.HEADERS, [])
+        self.assertTrue(profile.auto_generated)
+        self.assertEqual(
+            profile.mapping,
+            {"Mobile Phone": "cellphone", "First Name": "firstname", "Zip": "postalcode"},
+        )
+        self.assertEqual(profile_for(self.HEADERS, []).pk, profile.pk)
+
+    def test_edited_profile_drives_the_transform(self):
+        profile = profile_for(self.HEADERS, [])
+        profile.mapping["Sales Rep"] = "salesperson"
+        profile.transforms = {"First Name": "title", "Zip": "digits"}
+        profile.save()
+
+        transform = compile_profile(profile_for(self.HEADERS, []))
+        data = transform(
+            {"Mobile Phone": "555 040 9999", "First Name": "ann", "Zip": "90210-1234",
+             "Sales Rep": "Tommy", "Notes": "trade-in"}
+        )
+        self.assertEqual(data["phone_e164"], "+15550409999")
+        self.assertEqual(
+            (data["firstname"], data["postalcode"], data["salesperson"]), ("Ann", "902101234", "Tommy")
+        )
+        self.assertEqual(data["extra_data"], {"Notes": "trade-in"})
+
+    def test_empty_column_is_checked_again_on_later_uploads(self):
+        headers = ["Mobile Phone", "Appt Date", "Notes"]
+        first = profile_for(headers, [{"Mobile Phone": "5550409999", "Appt Date": "", "Notes": "hi"}])
+        self.assertEqual(first.date_columns, [])
+        self.assertEqual(first.unsampled_columns, ["Appt Date"])
+
+        row = {"Mobile Phone": "5550409999", "Appt Date": "06/01/2025 10:30 AM", "Notes": ""}
+        profile = profile_for(headers, [row])
+        self.assertEqual(profile.pk, first.pk)
+        self.assertEqual(profile.date_columns, [["Appt Date", "%m/%d/%Y %I:%M %p"]])
+        self.assertEqual(profile.unsampled_columns, [])
+        self.assertEqual(ImportProfile.objects.get(pk=first.pk).date_columns, profile.date_columns)
+        self.assertEqual(compile_profile(profile)(row)["extra_data"]["appointment_time"], "2025-06-01 10:30:00")
+
+    def test_profile_without_phone_column_fails_fast(self):
+        response = self.client.post(
+            reverse("upload_leads"),
+            {"file": SimpleUploadedFile("x.csv", b"Name,Email\nAnn,a@b.co\n")},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cellphone", response.json()["error"])
+
+
+class LeadMergeTest(TestCase):
+    """merge_duplicates folds same-phone leads together and keeps their history."""
+
+    def setUp(self):
+        self.keeper = Lead.objects.create(name="Ann", cellphone="5550101234", score=20)
+        self.legacy = Lead.objects.create(cellphone="x1", email="ann@example.com", score=70, opted_out=True)
+        self.typo = Lead.objects.create(cellphone="x2", city="Reno")
+        self.other = Lead.objects.create(name="Bob", cellphone="5550109999")
+        # legacy rows that lost the phone_e164 race in migration 0017
+        Lead.objects.filter(pk=self.legacy.pk).update(cellphone="(555) 010-1234", phone_e164=None)
+        Lead.objects.filter(pk=self.typo.pk).update(cellphone="+1 555-010-1234", phone_e164=None)
+        MessageLog.objects.create(lead=self.keeper, content="Hi Ann", direction="OUT")
+        MessageLog.objects.create(lead=self.legacy, content="Stop", direction="IN", source="IN")
+
+    def test_dry_run_reports_without_writing(self):
+        out = io.StringIO()
+        call_command("merge_duplicates", "--dry-run", stdout=out)
+        self.assertIn("Would merge 2 duplicates into 1 leads", out.getvalue())
+        self.assertIn("dashboard_messagelog: 1 rows", out.getvalue())
+        self.assertEqual(Lead.objects.count(), 4)
+
+    def test_merge_coalesces_and_repoints_history(self):
+        call_command("merge_duplicates", stdout=io.StringIO())
+
+        self.assertEqual(set(Lead.objects.values_list("id", flat=True)), {self.keeper.id, self.other.id})
+        self.keeper.refresh_from_db()
+        self.assertEqual(
+            (self.keeper.name, self.keeper.email, self.keeper.city, self.keeper.opted_out),
+            ("Ann", "ann@example.com", "Reno", True),
+        )
+        self.assertEqual(self.keeper.features.messages_in, 1)
+        self.assertEqual(self.keeper.score, calculate_score(self.keeper))
+        self.assertEqual(MessageLog.objects.filter(lead=self.keeper).count(), 2)
+        self.assertEqual(self.keeper.last_message_snippet, "Stop")
+        self.assertEqual(self.keeper.unread_inbound_count, 1)
+
+        synced = self.client.get(reverse("lead_changes"), {"since": 0}).json()
+        self.assertEqual(sorted(synced["deleted"]), sorted([self.legacy.id, self.typo.id]))
+
+
+class DuplicateCandidateTest(TestCase):
+    """Blocking keys find fuzzy duplicates without comparing every pair."""
+
+    def setUp(self):
+        self.ann = Lead.objects.create(
+            firstname="Ann", lastname="Smith", email="ann.smith@gmail.com", cellphone="5550101234"
+        )
+        self.anne = Lead.objects.create(
+            firstname="Anne", lastname="Smyth", email="annsmith+promo@gmail.com", cellphone="7770101234"
+        )
+        self.bob = Lead.objects.create(firstname="Bob", lastname="Jones", cellphone="5550109999")
+
+    def test_soundex(self):
+        self.assertEqual([soundex(w) for w in ("Smith", "Smyth", "Ashcraft", "Tymczak")],
+                         ["S530", "S530", "A261", "T522"])
+
+    def test_incremental_refresh(self):
+        self.assertEqual(refresh_candidates(), {"leads": 3, "candidates": 1})
+        pair = DuplicateCandidate.objects.get()
+        self.assertEqual((pair.lead_a_id, pair.lead_b_id), (self.ann.id, self.anne.id))
+        self.assertEqual(pair.reasons, ["email_local", "phone7", "name"])
+
+        # nothing changed → nothing re-checked
+        self.assertEqual(refresh_candidates()["leads"], 0)
+
+        # a new lead only compares against its blocks
+        Lead.objects.create(firstname="Robert", lastname="Jones", email="bob@x.com", cellphone="8880109999")
+        self.assertEqual(refresh_candidates()["leads"], 1)
+        self.assertEqual(DuplicateCandidate.objects.count(), 1)
+
+        # dismissed pairs stay dismissed across rebuilds
+        pair.status = DuplicateCandidate.Status.DISMISSED
+        pair.save()
+        refresh_candidates(rebuild=True)
+        self.assertEqual(DuplicateCandidate.objects.get().status, DuplicateCandidate.Status.DISMISSED)
+
+    def test_auto_merge_keeps_history(self):
+        MessageLog.objects.create(lead=self.anne, content="Hi", direction="IN", source="IN")
+        refresh_candidates()
+        report = auto_merge(0.5)
+        self.assertEqual((report["groups"], report["losers"]), (1, 1))
+        self.assertFalse(Lead.objects.filter(id=self.anne.id).exists())
+        self.assertEqual(MessageLog.objects.filter(lead=self.ann).count(), 1)
+        self.assertFalse(DuplicateCandidate.objects.exists())
+
+
+class MergeOldLeadsTest(TestCase):
+    """merge_old_leads streams the legacy table in chunks and resumes from its high-water mark."""
+
+    def setUp(self):
+        with connection.cursor() as cur:
+            cur.execute(
+                "CREATE TABLE leads_lead (id INTEGER PRIMARY KEY, name VARCHAR(100), "
+                "cellphone VARCHAR(20), email VARCHAR(100), created_at DATETIME)"
+            )
+            cur.executemany(
+                "INSERT INTO leads_lead (id, name, cellphone, email, created_at) VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (1, "Ann", "555-010-0001", "ann@example.com", "2020-01-02 03:04:05"),
+                    (2, "Bob", "not a phone", None, None),
+                    (3, "Cy", "5550100003", "", None),
+                ],
+            )
+        Lead.objects.create(name="Old Cy", cellphone="5550100003")
+
+    def tearDown(self):
+        with connection.cursor() as cur:
+            cur.execute("DROP TABLE leads_lead")
+
+    def test_chunks_and_resume(self):
+        out = io.StringIO()
+        call_command("merge_old_leads", "--chunk-size", "2", stdout=out)
+        self.assertIn("Merged 1 new, 1 updated, 1 skipped", out.getvalue())
+        self.assertEqual(Lead.objects.get(phone_e164="+15550100003").name, "Cy")
+        self.assertEqual(Lead.objects.get(phone_e164="+15550100001").created_at.year, 2020)
+
+        with connection.cursor() as cur:
+            cur.execute("INSERT INTO leads_lead (id, name, cellphone) VALUES (4, 'Di', '5550100004')")
+        out = io.StringIO()
+        call_command("merge_old_leads", stdout=out)
+        self.assertIn("Resuming after legacy id 3", out.getvalue())
+        self.assertIn("Merged 1 new, 0 updated, 0 skipped", out.getvalue())
+
+
+class LeadScoringTest(TestCase):
+    """Scores follow their inputs on every write path; the sweep only fixes drift."""
+
+    def setUp(self):
+        self.lead = Lead.objects.create(name="Ann", cellphone="5550202020")
+
+    def test_new_lead_is_scored_unless_score_given(self):
+        self.assertEqual(self.lead.score, 15)
+        self.assertEqual(Lead.objects.create(cellphone="5550202021", score=90).score, 90)
+
+    def test_save_and_queryset_writes_rescore(self):
+        self.lead.new_message = True
+        self.lead.save(update_fields=["new_message"])
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.score, 35)
+
+        Lead.objects.filter(pk=self.lead.pk).update(opted_in_for_ai=True, vehicle_interest="Civic")
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.score, 70)
+
+        Lead.objects.filter(pk=self.lead.pk).update(created_at=timezone.now() - timedelta(days=10))
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.score, 55)
+
+    def test_sweep_fixes_drift(self):
+        with connection.cursor() as cur:
+            cur.execute("UPDATE dashboard_lead SET score = 99")
+        self.assertEqual(Lead.objects.rescore(), 1)
+        self.assertEqual(Lead.objects.rescore(), 0)
+        self.lead.refresh_from_db()
+        self.assertEqual(self.lead.score, 15)
+
+    def test_sql_and_python_rules_agree(self):
+        old = timezone.now() - timedelta(days=10)
+        combos = [
+            dict(opted_in_for_ai=a, new_message=b, vehicle_interest=v, message_status=m)
+            for a in (False, True) for b in (False, True)
+            for v in ("", "Civic") for m in ("Generated", "Sent")
+        ]
+        leads = Lead.objects.bulk_create(
+            Lead(cellphone=f"55503{i:05d}", score=1, **combo) for i, combo in enumerate(combos)
+        )
+        Lead.objects.filter(id__in=[lead.id for lead in leads[::2]]).update(created_at=old, score=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            Lead.objects.rescore()
+        self.assertLess(len(queries), 10)
+        for lead in Lead.objects.all():
+            self.assertEqual(lead.score, calculate_score(lead), lead.id)
+
+    def test_beat_runs_the_scoring_sweeps(self):
+        from auto_text_crm.celery import app
+
+        tasks = {entry["task"] for entry in app.conf.beat_schedule.values()}
+        self.assertLessEqual({"dashboard.tasks.rescore_time_decay", "dashboard.tasks.score_leads"}, tasks)
+        self.assertLessEqual(tasks, set(app.tasks))
+
+
+class LeadFeaturesTest(TestCase):
+    """LeadFeatures follows MessageLog inserts and feeds the score."""
+
+    def setUp(self):
+        self.lead = Lead.objects.create(name="Ann", cellphone="5550303030")
+        MessageLog.objects.create(lead=self.lead, content="Hi Ann", follow_up_stage="Day 0")
+        MessageLog.objects.bulk_create([
+            MessageLog(lead=self.lead, content="Hey", direction="IN", source="IN"),
+            MessageLog(lead=self.lead, content="Is it in stock?", direction="IN", source="IN"),
+            MessageLog(lead=self.lead, content="prompt", source="System", follow_up_stage="Day 9"),
+        ])
+        MessageLog.objects.create(lead=self.lead, content="It is!", follow_up_stage="Day 1")
+        MessageLog.objects.create(lead=self.lead, content="Great", direction="IN", source="IN")
+
+    def _snapshot(self):
+        features = LeadFeatures.objects.get(lead=self.lead)
+        return (features.messages_out, features.messages_in, features.replies,
+                features.stages_completed, features.last_stage)
+
+    def test_incremental_features_and_score(self):
+        self.assertEqual(self._snapshot(), (2, 3, 2, 2, "Day 1"))
+        self.lead.refresh_from_db()
+        # new lead 15 + wrote this week 10 + answers fast 10 + 3 messages 5
+        self.assertEqual(self.lead.score, 40)
+        self.assertEqual(self.lead.score, calculate_score(self.lead))
+
+    def test_rebuild_matches_incremental(self):
+        incremental = self._snapshot()
+        rebuild_features([self.lead.id])
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_time_decay_only_touches_crossing_leads(self):
+        now = timezone.now()
+        crossing = Lead.objects.create(cellphone="5550202030")
+        Lead.objects.filter(pk=crossing.pk).update(created_at=now - timedelta(days=3, minutes=30))
+        with connection.cursor() as cur:  # score left stale, as if an hour had passed
+            cur.execute("UPDATE dashboard_lead SET score = 15")
+        SyncSequence.objects.update_or_create(
+            name=DECAY_WATERMARK, defaults={"value": int((now - timedelta(hours=1)).timestamp())}
+        )
+
+        self.assertEqual(list(Lead.objects.crossed_decay(now - timedelta(hours=1), now)), [crossing])
+        rescore_time_decay()
+        crossing.refresh_from_db()
+        self.assertEqual(crossing.score, 0)
+
+
+class LeadModelTest(TestCase):
+    """The NumPy logistic regression trains, stores its weights and batch-scores leads."""
+
+    def setUp(self):
+        for i in range(40):
+            lead = Lead.objects.create(
+                cellphone=f"55504{i:05d}", opted_in_for_ai=i % 2 == 0, vehicle_interest="Civic" if i % 3 else ""
+            )
+            if i % 2 == 0 and i % 10:  # opted-in leads mostly answer
+                MessageLog.objects.create(lead=lead, content="hi", direction="IN", source="IN")
+
+    def test_fit_recovers_signal(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(2000, 2))
+        y = (rng.random(2000) < 1 / (1 + np.exp(-(2 * X[:, 0] - X[:, 1])))).astype(float)
+        weights, _ = fit_logistic(X, y, l2=0.0)
+        np.testing.assert_allclose(weights, [2, -1], atol=0.25)
+
+    def test_train_and_predict(self):
+        call_command("train_lead_model", "--target", "reply", stdout=io.StringIO())
+        model = ScoringModel.objects.get(target="reply", active=True)
+        self.assertEqual(len(model.coefficients), len(model.features))
+        self.assertGreater(model.metrics["auc"], 0.8)
+        # conversation counts move with the outcome – the reply model must not see them
+        self.assertFalse({"messages_out_log", "stages_completed", "messages_in_log"} & set(model.features))
+
+        call_command("predict_lead_scores", "--workers", "1", "--chunk-size", "7", stdout=io.StringIO())
+        opted_in = Lead.objects.filter(opted_in_for_ai=True).values_list("reply_likelihood", flat=True)
+        others = Lead.objects.filter(opted_in_for_ai=False).values_list("reply_likelihood", flat=True)
+        self.assertGreater(min(opted_in), max(others))
+
+        # a second run only writes what moved
+        self.assertEqual(predict_all(workers=1), {"reply": 0})
+
+    def test_writes_in_bounded_batches(self):
+        call_command("train_lead_model", "--target", "reply", stdout=io.StringIO())
+        with patch("dashboard.services.lead_model.WRITE_BATCH", 4), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(predict_all(workers=1), {"reply": 40})
+
+        updates = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith('UPDATE "dashboard_lead" SET "reply_likelihood"')
+        ]
+        self.assertTrue(updates)
+        self.assertTrue(all(sql.split(" IN (")[1].count(",") < 4 for sql in updates))
+        self.assertFalse(Lead.objects.filter(reply_likelihood__isnull=True).exists())
+
+    def test_untrainable_target(self):
+        with self.assertRaises(CommandError):
+            call_command("train_lead_model", "--target", "sale", stdout=io.StringIO())
+
+
+@patch("dashboard.tasks.SEND_WINDOW_END", time.max)
+@patch("dashboard.tasks.SEND_WINDOW_START", time.min)
+class AIDispatchTest(TestCase):
+    """queue_ai_followups_task queues exactly the due leads, with ETAs, once."""
+
+    def setUp(self):
+        now = timezone.now()
+        self.overdue = Lead.objects.create(
+            cellphone="5550301001", opted_in_for_ai=True, next_ai_send_at=now - timedelta(minutes=10)
+        )
+        self.imminent = Lead.objects.create(
+            cellphone="5550301002", opted_in_for_ai=True, next_ai_send_at=now + timedelta(seconds=30)
+        )
+        self.later = Lead.objects.create(
+            cellphone="5550301003", opted_in_for_ai=True, next_ai_send_at=now + timedelta(hours=2)
+        )
+        Lead.objects.create(cellphone="5550301004", opted_in_for_ai=True)  # never scheduled
+        Lead.objects.create(
+            cellphone="5550301005", opted_in_for_ai=True, opted_out=True, next_ai_send_at=now - timedelta(hours=1)
+        )
+
+    def test_queues_due_leads_with_eta(self):
+        with patch("dashboard.tasks.send_ai_message_task.apply_async") as apply_async:
+            report = queue_ai_followups_task(batch_size=1)
+
+        queued = {c.args[0][0]: c.kwargs["eta"] for c in apply_async.call_args_list}
+        self.assertEqual(set(queued), {self.overdue.id, self.imminent.id})
+        self.assertEqual(queued[self.imminent.id], self.imminent.next_ai_send_at)
+        self.assertEqual(report["queued"], 2)
+        self.assertEqual(report["overdue"], 1)
+        self.assertGreaterEqual(report["max_lag_seconds"], 600)
+
+        # claimed – leased past the send, so a second run finds nothing
+        self.assertGreater(Lead.objects.get(pk=self.overdue.pk).next_ai_send_at, timezone.now() + DISPATCH_LEASE)
+        with patch("dashboard.tasks.send_ai_message_task.apply_async") as apply_async:
+            self.assertEqual(queue_ai_followups_task()["queued"], 0)
+        apply_async.assert_not_called()
+
+    def test_lost_enqueue_comes_due_after_lease(self):
+        with patch("dashboard.tasks.send_ai_message_task.apply_async", side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                queue_ai_followups_task()
+
+        later = timezone.now() + DISPATCH_LOOKAHEAD + DISPATCH_LEASE + timedelta(seconds=1)
+        with patch("dashboard.tasks.send_ai_message_task.apply_async") as apply_async, \
+                patch("dashboard.tasks.timezone.now", return_value=later):
+            queue_ai_followups_task()
+        self.assertIn(self.overdue.id, {c.args[0][0] for c in apply_async.call_args_list})
+
+    def _lease(self, lead):
+        """Claim *lead* the way the dispatcher does; return the task's lease argument."""
+        lease = timezone.now() + DISPATCH_LEASE
+        Lead.objects.filter(pk=lead.pk).update(next_ai_send_at=lease)
+        return lease.isoformat()
+
+    def _assert_retried_later(self, lead):
+        due = Lead.objects.get(pk=lead.pk).next_ai_send_at
+        self.assertAlmostEqual(
+            due.timestamp(), (timezone.now() + FOLLOW_UP_RETRY_DELAY).timestamp(), delta=60
+        )
+
+    def test_send_without_draft_is_rescheduled(self):
+        with patch("dashboard.tasks.generate_ai_message", return_value=""):
+            send_ai_message_task(self.overdue.id, scheduled=True, lease=self._lease(self.overdue))
+        self._assert_retried_later(self.overdue)
+
+    def test_send_without_phone_is_rescheduled(self):
+        lead = Lead.objects.create(
+            cellphone="n/a", opted_in_for_ai=True, ai_message="Hi", next_ai_send_at=timezone.now()
+        )
+        send_ai_message_task(lead.id, scheduled=True, lease=self._lease(lead))
+        self._assert_retried_later(lead)
+
+    def test_send_out_of_retries_is_rescheduled(self):
+        Lead.objects.filter(pk=self.overdue.pk).update(ai_message="Still looking?")
+        with patch("dashboard.tasks.send_sms", side_effect=RuntimeError("twilio down")) as send_sms:
+            result = send_ai_message_task.apply(
+                (self.overdue.id,), {"scheduled": True, "lease": self._lease(self.overdue)}
+            )
+        self.assertTrue(result.failed())
+        self.assertEqual(send_sms.call_count, send_ai_message_task.max_retries + 1)
+        self._assert_retried_later(self.overdue)
+
+    def test_send_schedules_next_follow_up(self):
+        self.overdue.ai_message = "Still looking?"
+        self.overdue.save()
+        with patch("dashboard.tasks.send_sms", return_value="SM1"):
+            send_ai_message_task(self.overdue.id, scheduled=True, lease=self._lease(self.overdue))
+
+        lead = Lead.objects.get(pk=self.overdue.pk)
+        self.assertEqual(lead.follow_up_stage, "Day 0 – Msg 2")
+        self.assertIsNotNone(lead.next_ai_send_at)
+        self.assertEqual(lead.ai_message_count, 1)
+
+    def test_expired_lease_sends_once(self):
+        Lead.objects.filter(pk=self.overdue.pk).update(ai_message="Still looking?")
+        with patch("dashboard.tasks.send_ai_message_task.apply_async") as first:
+            queue_ai_followups_task()
+        # the first send hasn't run when the lease runs out – the lead is queued again
+        later = timezone.now() + DISPATCH_LOOKAHEAD + DISPATCH_LEASE + timedelta(minutes=1)
+        with patch("dashboard.tasks.send_ai_message_task.apply_async") as second, \
+                patch("dashboard.tasks.timezone.now", return_value=later):
+            queue_ai_followups_task()
+
+        queued = [
+            c for c in first.call_args_list + second.call_args_list if c.args[0] == (self.overdue.id,)
+        ]
+        self.assertEqual(len(queued), 2)
+        with patch("dashboard.tasks.send_sms", return_value="SM1") as send_sms:
+            for c in reversed(queued):  # the stale first task runs last, as in a backlog
+                send_ai_message_task(*c.args[0], **c.args[1])
+        send_sms.assert_called_once()
+        self.assertEqual(MessageLog.objects.filter(lead=self.overdue, direction="OUT").count(), 1)
+
+
+@patch("dashboard.tasks.SEND_WINDOW_END", time.max)
+@patch("dashboard.tasks.SEND_WINDOW_START", time.min)
+class SendScheduleTest(TestCase):
+    """The Redis timing wheel mirrors next_ai_send_at and feeds the send pipeline."""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch.object(send_schedule, "_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = timezone.now()
+
+    def _lead(self, phone, due, **fields):
+        return Lead.objects.create(cellphone=phone, opted_in_for_ai=True, next_ai_send_at=due, **fields)
+
+    def test_writes_are_mirrored(self):
+        due = self.now + timedelta(hours=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            lead = self._lead("5550401001", due)
+        self.assertEqual(self.redis.zscore(send_schedule.KEY, lead.id), due.timestamp())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Lead.objects.filter(pk=lead.pk).update(opted_out=True)
+        self.assertIsNone(self.redis.zscore(send_schedule.KEY, lead.id))
+
+        lead = Lead.objects.get(pk=lead.pk)
+        lead.opted_out = False
+        lead.next_ai_send_at = due + timedelta(minutes=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            lead.save(update_fields=["opted_out", "next_ai_send_at"])
+        self.assertEqual(self.redis.zscore(send_schedule.KEY, lead.id), lead.next_ai_send_at.timestamp())
+
+    def test_pop_claims_each_member_once(self):
+        self.redis.zadd(send_schedule.KEY, {1: self.now.timestamp() - 5, 2: self.now.timestamp() + 60})
+        self.assertEqual(send_schedule.pop_due(self.now, 10), [1])
+        self.assertEqual(send_schedule.pop_due(self.now, 10), [])
+        self.assertEqual(self.redis.zcard(send_schedule.KEY), 1)
+
+    def test_reconcile_then_dispatch(self):
+        due = self._lead("5550401002", self.now - timedelta(seconds=3))
+        moved = self._lead("5550401003", self.now + timedelta(hours=1))
+        self._lead("5550401004", self.now - timedelta(hours=1), has_replied=True)
+        self.redis.zadd(send_schedule.KEY, {999999: 0})  # a lead that no longer exists
+
+        self.assertEqual(send_schedule.reconcile(), 2)
+        self.assertIsNone(self.redis.zscore(send_schedule.KEY, 999999))
+
+        # a stale member: the row was moved later while Redis was unreachable
+        self.redis.zadd(send_schedule.KEY, {moved.id: self.now.timestamp() - 1})
+        with patch("dashboard.tasks.send_ai_message_task.apply_async") as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            report = dispatch_from_wheel(now=self.now)
+
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.args[0], (due.id,))
+        lease = apply_async.call_args.args[1]["lease"]
+        self.assertEqual((report["queued"], report["stale"]), (1, 1))
+        self.assertGreaterEqual(report["max_lag_seconds"], 3)
+        # the claim lease is mirrored too – the lead comes due again if the send is lost
+        leased = Lead.objects.get(pk=due.pk).next_ai_send_at
+        self.assertEqual(lease, leased.isoformat())
+        self.assertGreater(leased, self.now + DISPATCH_LEASE)
+        self.assertEqual(self.redis.zscore(send_schedule.KEY, due.id), leased.timestamp())
+        self.assertEqual(self.redis.zscore(send_schedule.KEY, moved.id), moved.next_ai_send_at.timestamp())
+        self.assertEqual(self.redis.zcard(send_schedule.KEY), 2)
+
+    def test_loop_sleeps_while_window_closed(self):
+        self._lead("5550401005", self.now - timedelta(minutes=5))
+        with patch("dashboard.tasks.SEND_WINDOW_START", time.max), \
+                patch("dashboard.management.commands.run_send_scheduler.time.sleep",
+                      side_effect=KeyboardInterrupt) as sleep:
+            call_command("run_send_scheduler", "--poll", "1", stdout=io.StringIO())
+
+        sleep.assert_called_once()
+        self.assertGreater(sleep.call_args.args[0], 1)
+        self.assertEqual(self.redis.zcard(send_schedule.KEY), 1)  # nothing popped
@@ -1,74 +1,47 @@
 import csv
-import re
-from dateutil.parser import parse as dateparse
-from django.http import HttpResponse
-from django.shortcuts import redirect
-from django.contrib import messages
-from django.views.decorators.csrf import csrf_exempt
-from dashboard.models import Lead
-
-@csrf_exempt
-def upload_leads_view(request):
-    if request.method == "POST" and request.FILES.get("csv_file"):
-        csv_file = request.FILES["csv_file"]
-        decoded_file = csv_file.read().decode("utf-8").splitlines()
-        reader = csv.DictReader(decoded_file)
-
-        created_count = 0
-        updated_count = 0
-        failed = 0
-
-        for i, row in enumerate(reader, start=2):
-            if not row or not row.get("cellphone"):
-                continue
-
-            phone = row.get("cellphone", "").strip()
-            if not phone:
-                failed += 1
-                continue
 
-            lead_data = {}
-            extra_data = {}
-
-            for field, value in row.items():
-                val = value.strip()
-                if hasattr(Lead, field):
-                    lead_data[field] = val
-                else:
-                    extra_data[field] = val
-
-            # 🚗 Vehicle detection
-            year = row.get("VehicleYear", "").strip()
-            make = row.get("VehicleMake", "").strip()
-            model = row.get("VehicleModel", "").strip()
-            if make or model:
-                lead_data["vehicle_interest"] = f"{year} {make} {model}".strip()
-
-            # 📅 Appointment detection
-            for key, value in {**row, **extra_data}.items():
-                try:
-                    if isinstance(value, str) and re.search(r"\d{4}", value):
-                        dt = dateparse(value, fuzzy=True)
-                        extra_data["appointment_time"] = str(dt)
-                        break
-                except:
-                    continue
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
-            lead_data["extra_data"] = extra_data  # 💡 final dict injection
+from dashboard.services.lead_import import import_csv, open_csv
 
-            try:
-                lead, created = Lead.objects.update_or_create(
-                    cellphone=phone,
-                    defaults=lead_data
-                )
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-            except Exception as e:
-                return HttpResponse(f"❌ ERROR on row {i}: {str(e)}", status=500)
+# Rejected rows echoed back in the response (the totals always cover all of them)
+MAX_REPORTED_REJECTS = 100
 
-        messages.success(request, f"✅ {created_count} created, {updated_count} updated, {failed} failed.")
-        return redirect("dashboard-home")
 
-    return HttpResponse("❌ No CSV file received.", status=400)
+@csrf_exempt
+@require_POST
+def upload_leads_view(request):
+    """
+    Import a dealer CSV: stream it, upsert leads in batches keyed on phone.
+
+    Accepts the file as ``csv_file`` (Django form) or ``file`` (React
+    UploadPage). Answers {created, updated, failed, imported, skipped,
+    rejects: [{row, reason}, …]}.
+    """
+    csv_file = request.FILES.get("csv_file") or request.FILES.get("file")
+    if csv_file is None:
+        return JsonResponse({"error": "No CSV file received."}, status=400)
+
+    try:
+        result = import_csv(open_csv(csv_file))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        return JsonResponse({"error": f"Unreadable CSV: {exc}"}, status=400)
+    except ValueError as exc:  # import profile can't map this file
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse(
+        {
+            "created": result["created"],
+            "updated": result["updated"],
+            "failed": result["failed"],
+            # keys read by frontend/src/components/UploadPage.jsx
+            "imported": result["created"] + result["updated"],
+            "skipped": result["failed"],
+            "rejects": [
+                {"row": line, "reason": reason}
+                for line, reason in sorted(result["rejects"])[:MAX_REPORTED_REJECTS]
+            ],
+        }
+    )
@@ -12,7 +12,24 @@ from . import views                               # KPI, lead lists, etc.
 from . import views_messages as vm                # send SMS, Twilio webhook
 from . import views_ai as ai                      # AI start / pause / queue
 from .views_schedule import get_next_schedule
-from .views_api import update_lead, export_hot_leads
+from .views_events import event_stream
+from .views_inbox import get_inbox_summary
+from .views_api import (
+    get_all_leads,
+    get_lead_changes,
+    update_lead,
+    export_leads,
+    export_hot_leads,
+    create_export_job,
+    export_job_status,
+    download_export_job,
+    resume_export_job,
+    create_import_job,
+    import_job_status,
+    resume_import_job,
+    import_job_rejects,
+    search,
+)
 from dashboard.upload_leads_view import upload_leads_view
 
 
@@ -31,18 +48,31 @@ urlpatterns = [
     # ------------------------------------------------------------------
     # LEADS CRUD / EXPORT
     # ------------------------------------------------------------------
-    path("leads/", views.get_all_leads, name="all_leads"),
+    path("leads/", get_all_leads, name="all_leads"),
+    path("leads/changes/", get_lead_changes, name="lead_changes"),
     path("leads/<int:lead_id>/", update_lead, name="update_lead"),
+    path("leads/export/", export_leads, name="export_leads"),
     path("leads/export-hot/", export_hot_leads, name="export_hot_leads"),
+    path("export-jobs/", create_export_job, name="export_jobs"),
+    path("export-jobs/<int:job_id>/", export_job_status, name="export_job_status"),
+    path("export-jobs/<int:job_id>/download/", download_export_job, name="export_job_download"),
+    path("export-jobs/<int:job_id>/resume/", resume_export_job, name="export_job_resume"),
+    path("import-jobs/", create_import_job, name="import_jobs"),
+    path("import-jobs/<int:job_id>/", import_job_status, name="import_job_status"),
+    path("import-jobs/<int:job_id>/resume/", resume_import_job, name="import_job_resume"),
+    path("import-jobs/<int:job_id>/rejects/", import_job_rejects, name="import_job_rejects"),
+    path("search/", search, name="search"),
 
     # ------------------------------------------------------------------
     # INBOX / MESSAGE THREADS
     # ------------------------------------------------------------------
     path("send-message/", vm.send_message_view, name="send_message"),
+    path("inbox/", get_inbox_summary, name="inbox_summary"),
     path("message-thread/<int:lead_id>/", views.get_message_thread, name="message_thread"),
     path("unread-messages/", views.get_unread_messages, name="unread_messages"),
     path("mark-messages-read/", views.mark_messages_read, name="mark_messages_read"),
     path("clear-new-message/<int:lead_id>/", views.clear_new_message, name="clear_new_message"),
+    path("events/", event_stream, name="event_stream"),
 
     # ------------------------------------------------------------------
     # LIGHTNING‑FAST AI ACTIONS  ⚡️
@@ -0,0 +1,44 @@
+# dashboard/utils/phone.py
+"""
+Phone-number normalisation to E.164.
+
+Every place that matches leads by phone (Twilio webhooks, CSV import,
+legacy merge, dedupe) goes through ``normalize_phone`` so lookups can be an
+exact match on the indexed ``Lead.phone_e164`` column instead of a
+``LIKE '%…'`` scan.
+
+    >>> normalize_phone("(555) 123-4567")
+    '+15551234567'
+    >>> normalize_phone("+1 555.123.4567")
+    '+15551234567'
+    >>> normalize_phone("12") is None
+    True
+"""
+
+import re
+from typing import Optional
+
+from django.conf import settings
+
+DEFAULT_COUNTRY_CODE = getattr(settings, "PHONE_DEFAULT_COUNTRY_CODE", "1")  # NANP
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw: Optional[str]) -> Optional[str]:
+    """Return *raw* as ``+<country><number>``, or None if it isn't a phone number."""
+    if not raw:
+        return None
+
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub("", raw)
+
+    if raw.startswith("+"):
+        # already international – trust the country code (E.164 allows 8-15 digits)
+        return f"+{digits}" if 8 <= len(digits) <= 15 else None
+
+    if len(digits) == 10:
+        return f"+{DEFAULT_COUNTRY_CODE}{digits}"
+    if len(digits) == 11 and digits.startswith(DEFAULT_COUNTRY_CODE):
+        return f"+{digits}"
+    return None
@@ -19,6 +19,7 @@ from rest_framework.response import Response
 from openai import OpenAIError
 
 from .models import Lead, MessageLog
+from .services.message_thread import parse_thread_params, thread_page
 from .tasks import generate_ai_message_task  # updated import
 
 # ------------------------------------------------------------------
@@ -28,23 +29,26 @@ from .tasks import generate_ai_message_task  # updated import
 def dashboard_view(request):
     return HttpResponse("📊 Django backend is running at /api/ — no template needed.")
 
-# ------------------------------------------------------------------
-# LEADS LIST
-# ------------------------------------------------------------------
-@require_http_methods(["GET"])
-def get_all_leads(request):
-    leads = Lead.objects.all()
-    return JsonResponse({"leads": [l.to_dict() for l in leads]})
-
 # ------------------------------------------------------------------
 # MESSAGE THREAD (Smart Inbox right-pane)
 # ------------------------------------------------------------------
 @require_http_methods(["GET"])
 def get_message_thread(request, lead_id: int):
+    """
+    One page of a lead's thread, oldest → newest.
+
+    Query params: before=<id> (older page), after=<id> (poll for new
+    messages), page_size. Without a cursor the latest page is returned.
+    """
+    try:
+        before, after, page_size = parse_thread_params(request.GET)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
     messages = (
-        MessageLog.objects.filter(lead_id=lead_id)
-        .order_by("timestamp")
+        MessageLog.objects.thread(lead_id)
         .values(
+            "id",
             "timestamp",
             "delivery_status",
             from_customer=Case(
@@ -55,7 +59,8 @@ def get_message_thread(request, lead_id: int):
             body=F("content"),
         )
     )
-    return JsonResponse({"messages": list(messages)})
+    rows, has_more = thread_page(messages, before=before, after=after, page_size=page_size)
+    return JsonResponse({"messages": rows, "has_more": has_more})
 
 # ------------------------------------------------------------------
 # MANUAL OUTBOUND SMS
@@ -112,8 +117,7 @@ def toggle_ai_opt_in(request, lead_id: int):
 @require_GET
 def get_unread_messages(request):
     rows = (
-        MessageLog.objects.filter(direction="IN", read=False)
-        .order_by("-timestamp")[:20]
+        MessageLog.objects.unread_inbound()[:20]
         .values(
             "from_number",
             "timestamp",
@@ -125,7 +129,7 @@ def get_unread_messages(request):
 
 @require_POST
 def mark_messages_read(request):
-    MessageLog.objects.filter(direction="IN", read=False).update(read=True)
+    MessageLog.objects.unread_inbound().update(read=True)
     return JsonResponse({"status": "success"})
 
 @require_POST
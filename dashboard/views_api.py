@@ -4,42 +4,163 @@ REST‑style helpers (no DRF serializers to keep it lightweight).
 
 Endpoints
 ─────────
-GET    /api/leads/               – list leads  (add ?hot=true or ?min_score=70)
+GET    /api/leads/               – keyset-paginated list (see get_all_leads)
+GET    /api/leads/changes/       – delta sync: rows + tombstones since a version
+GET    /api/search/?q=…          – ranked full-text search over leads + messages
 PATCH  /api/leads/<id>/          – partial update  (opt‑in, tags, etc.)
 PUT    /api/leads/<id>/          – full update    (name, phones, etc.)
-GET    /api/leads/export-hot/    – CSV of hot leads (score ≥ threshold)
+GET    /api/leads/export/        – streaming CSV, same filters as the list + ?fields=
+GET    /api/leads/export-hot/    – streaming CSV of hot leads (score ≥ threshold)
+POST   /api/export-jobs/         – queue a background gzip CSV / NDJSON export
+GET    /api/export-jobs/<id>/    – job status + progress % + download_url
+POST   /api/import-jobs/         – upload a CSV to import in the background
+GET    /api/import-jobs/<id>/    – import progress, counts and rejects_url
 """
 
-import csv
-import io
-from django.http import JsonResponse, HttpResponse, Http404
+import itertools
+import json
+import os
+import uuid
+from django.db import transaction
+from django.http import FileResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.forms.models import model_to_dict
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
-from dashboard.models import Lead
+from dashboard.models import ExportJob, ImportJob, Lead, LeadTombstone
+from dashboard.services.lead_query import (
+    filter_leads,
+    filters_from_json,
+    paginate,
+    parse_fields,
+    parse_page_size,
+    project_row,
+    values_columns,
+)
+from dashboard.services.lead_export import csv_lines, export_columns, lead_rows
+from dashboard.services.search import MIN_TERM_LENGTH, search_leads
+from dashboard.tasks.export_jobs import is_stale, run_export_job
+from dashboard.tasks.import_jobs import IMPORT_ROOT, run_import_job
 
 
 # ────────────────────────────────────────────────────────────────
-#  LIST  /api/leads/?hot=true
+#  LIST  /api/leads/?cursor=…&fields=id,name,score&min_score=60
 # ────────────────────────────────────────────────────────────────
 @require_http_methods(["GET"])
 def get_all_leads(request):
-    queryset = Lead.objects.all()
+    """
+    Lead list, newest first, in keyset pages:
+    {"leads": [...], "next_cursor": …, "page_size": …}. Follow next_cursor
+    until it is null to read the whole list.
 
-    hot_flag = request.GET.get("hot")
-    min_score = int(request.GET.get("min_score", 80))
-    if hot_flag in ("true", "1"):
-        queryset = queryset.filter(score__gte=min_score)
+    Query params
+    ------------
+    cursor           – opaque token from the previous page's next_cursor
+    page_size        – rows per page (default settings.LEADS_PAGE_SIZE)
+    fields           – comma-separated projection (default: Lead.to_dict keys)
+    filter           – UI tab preset (all, replied, hot, scheduled, paused, not_opted_in)
+    hot / min_score / max_score / stage / opted_in_for_ai / salesperson
+    legacy=1         – unpaginated {"leads": [Lead.to_dict(), …]} payload
+    """
+    try:
+        queryset = filter_leads(Lead.objects.all(), request.GET)
+
+        if request.GET.get("legacy") in ("true", "1"):
+            return JsonResponse({"leads": [l.to_dict() for l in queryset]})
 
-    leads_json = [
-        model_to_dict(
-            lead,
-            exclude=["extra_data", "messages"],  # keep payload lean
+        fields = parse_fields(request.GET.get("fields"))
+        page_size = parse_page_size(request.GET.get("page_size"))
+        rows, next_cursor = paginate(
+            queryset, fields, cursor=request.GET.get("cursor"), page_size=page_size
         )
-        for lead in queryset
-    ]
-    return JsonResponse(leads_json, safe=False, status=200)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse(
+        {"leads": rows, "next_cursor": next_cursor, "page_size": page_size},
+        status=200,
+    )
+
+
+# ────────────────────────────────────────────────────────────────
+#  DELTA SYNC  /api/leads/changes/?since=<version>
+# ────────────────────────────────────────────────────────────────
+@require_http_methods(["GET"])
+def get_lead_changes(request):
+    """
+    Rows whose ``version`` is above *since*, oldest change first, plus the
+    ids of leads deleted in the same window.
+
+    Start with since=0 for a full sync, then poll with the returned
+    ``version``. When ``has_more`` is true call again straight away with
+    ``since=<version>&after_id=<after_id>``.
+    """
+    try:
+        since = int(request.GET.get("since", 0))
+        after_id = request.GET.get("after_id")
+        after_id = int(after_id) if after_id else None
+        fields = parse_fields(request.GET.get("fields"))
+        page_size = parse_page_size(request.GET.get("page_size"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    window = Q(version__gt=since)
+    if after_id is not None:
+        window |= Q(version=since, id__gt=after_id)
+
+    columns = {*values_columns(fields), "id", "version"}
+    rows = list(
+        Lead.objects.filter(window)
+        .order_by("version", "id")
+        .values(*columns)[: page_size + 1]
+    )
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    tombstones = LeadTombstone.objects.filter(version__gt=since)
+    if has_more:
+        tombstones = tombstones.filter(version__lte=rows[-1]["version"])
+    deleted = list(tombstones.values_list("lead_id", "version"))
+
+    versions = [since] + [r["version"] for r in rows] + [v for _, v in deleted]
+    return JsonResponse(
+        {
+            "leads": [project_row(r, fields) for r in rows],
+            "deleted": [lead_id for lead_id, _ in deleted],
+            "version": max(versions),
+            "after_id": rows[-1]["id"] if has_more else None,
+            "has_more": has_more,
+        },
+        status=200,
+    )
+
+
+# ────────────────────────────────────────────────────────────────
+#  SEARCH  /api/search/?q=tahoe+3322&page=2
+# ────────────────────────────────────────────────────────────────
+@require_http_methods(["GET"])
+def search(request):
+    """Ranked lead matches on name/phone/email/VIN/stock# and message text."""
+    query = request.GET.get("q", "").strip()
+    try:
+        page = int(request.GET.get("page", 1))
+        page_size = parse_page_size(request.GET.get("page_size"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    if page < 1:
+        return JsonResponse({"error": "page must be 1 or more"}, status=400)
+    if not any(len(t) >= MIN_TERM_LENGTH for t in query.split()):
+        return JsonResponse(
+            {"error": f"q needs a term of at least {MIN_TERM_LENGTH} characters"}, status=400
+        )
+
+    results, has_more = search_leads(query, limit=page_size, offset=(page - 1) * page_size)
+    return JsonResponse({"results": results, "page": page, "has_more": has_more}, status=200)
 
 
 # ────────────────────────────────────────────────────────────────
@@ -85,47 +206,228 @@ def update_lead(request, lead_id: int):
     return JsonResponse({"error": "No valid fields supplied"}, status=400)
 
 
+# ────────────────────────────────────────────────────────────────
+#  CSV EXPORT  /api/leads/export/?fields=…&filter=…
+# ────────────────────────────────────────────────────────────────
+def _csv_response(fields, rows, filename):
+    response = StreamingHttpResponse(csv_lines(fields, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_http_methods(["GET"])
+def export_leads(request):
+    """
+    Stream every lead matching the list filters as CSV, newest first.
+
+    Accepts the same filters as get_all_leads plus ``fields`` to pick the
+    columns (default: the hot-lead export columns). Memory stays flat no
+    matter how many rows match.
+    """
+    try:
+        fields = export_columns(request.GET.get("fields"))
+        queryset = filter_leads(Lead.objects.all(), request.GET).order_by("-id")
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return _csv_response(fields, lead_rows(queryset, fields), "leads.csv")
+
+
 # ────────────────────────────────────────────────────────────────
 #  CSV EXPORT  /api/leads/export-hot/
 # ────────────────────────────────────────────────────────────────
 @require_http_methods(["GET"])
 def export_hot_leads(request):
-    min_score = int(request.GET.get("min_score", 80))
+    params = request.GET.copy()
+    params["hot"] = "1"
+    params.setdefault("min_score", "80")
+    try:
+        fields = export_columns(request.GET.get("fields"))
+        queryset = filter_leads(Lead.objects.all(), params).order_by("-score", "-id")
+        # filter_leads has validated it; the filename gets the int, never the raw text
+        min_score = int(params["min_score"] or 80)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
 
-    hot_qs = Lead.objects.filter(score__gte=min_score).order_by("-score")
-    if not hot_qs.exists():
+    # peek at the first row instead of a separate exists() query
+    rows = lead_rows(queryset, fields)
+    first = next(rows, None)
+    if first is None:
         return JsonResponse({"error": "No hot leads found."}, status=404)
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(
-        [
-            "id",
-            "name",
-            "cellphone",
-            "email",
-            "vehicle_interest",
-            "score",
-            "created_at",
-        ]
+    return _csv_response(
+        fields,
+        itertools.chain([first], rows),
+        f"hot_leads_score_{min_score}_plus.csv",
     )
 
-    for lead in hot_qs:
-        writer.writerow(
-            [
-                lead.id,
-                lead.name,
-                lead.cellphone,
-                lead.email,
-                lead.vehicle_interest,
-                lead.score,
-                lead.created_at.strftime("%Y-%m-%d %H:%M"),
-            ]
-        )
 
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type="text/csv")
-    response[
-        "Content-Disposition"
-    ] = f'attachment; filename="hot_leads_score_{min_score}_plus.csv"'
-    return response
+# ────────────────────────────────────────────────────────────────
+#  BACKGROUND EXPORT JOBS  /api/export-jobs/
+# ────────────────────────────────────────────────────────────────
+def _job_payload(request, job):
+    done = job.status == ExportJob.Status.DONE
+    return {
+        "id": job.id,
+        "status": job.status,
+        "format": job.format,
+        "progress": job.progress,
+        "processed_rows": job.processed_rows,
+        "total_rows": job.total_rows,
+        "error": job.error or None,
+        "download_url": (
+            request.build_absolute_uri(reverse("export_job_download", args=[job.id]))
+            if done else None
+        ),
+    }
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_export_job(request):
+    """
+    Queue a gzip CSV / NDJSON export of every matching lead.
+
+    JSON body
+    ---------
+    format            – "csv" (default) or "ndjson"
+    fields            – comma-separated or list; default is the hot-lead
+                        export columns for CSV and the Lead.to_dict keys for NDJSON
+    filters           – same keys as the /api/leads/ query string
+    include_messages  – add each lead's message history
+
+    Answers 202 with the job status; poll /api/export-jobs/<id>/.
+    """
+    try:
+        data = json.loads(request.body.decode() or "{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    fmt = data.get("format", ExportJob.Format.CSV)
+    raw_fields = data.get("fields")
+    if isinstance(raw_fields, list):
+        raw_fields = ",".join(raw_fields)
+    filters = data.get("filters") or {}
+    try:
+        if fmt not in ExportJob.Format.values:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if not isinstance(filters, dict):
+            raise ValueError("filters must be an object")
+        filters = filters_from_json(filters)
+        if raw_fields or fmt == ExportJob.Format.CSV:
+            fields = export_columns(raw_fields)
+        else:
+            fields = parse_fields(None)
+        filter_leads(Lead.objects.all(), filters)  # validate only
+    except (TypeError, ValueError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    job = ExportJob.objects.create(
+        format=fmt,
+        fields=fields,
+        filters=filters,
+        include_messages=bool(data.get("include_messages")),
+    )
+    transaction.on_commit(lambda: run_export_job.delay(job.id))
+    return JsonResponse(_job_payload(request, job), status=202)
+
+
+@require_http_methods(["GET"])
+def export_job_status(request, job_id: int):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    return JsonResponse(_job_payload(request, job))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def resume_export_job(request, job_id: int):
+    """Re-queue a failed or stalled export; it continues after its last checkpoint."""
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if job.status == ExportJob.Status.DONE:
+        return JsonResponse({"error": "Export already finished"}, status=409)
+    if job.status == ExportJob.Status.RUNNING and not is_stale(job):
+        return JsonResponse({"error": "Export is still running"}, status=409)
+    transaction.on_commit(lambda: run_export_job.delay(job.id))
+    return JsonResponse(_job_payload(request, job), status=202)
+
+
+@require_http_methods(["GET"])
+def download_export_job(request, job_id: int):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if job.status != ExportJob.Status.DONE:
+        return JsonResponse({"error": f"Export is {job.status}"}, status=409)
+    if not os.path.exists(job.file_path):
+        raise Http404("Export file has been removed")
+
+    return FileResponse(
+        open(job.file_path, "rb"),
+        as_attachment=True,
+        filename=os.path.basename(job.file_path),
+        content_type="application/gzip",
+    )
+
+
+# ────────────────────────────────────────────────────────────────
+#  BACKGROUND IMPORT JOBS  /api/import-jobs/
+# ────────────────────────────────────────────────────────────────
+def _import_payload(request, job):
+    return {
+        "id": job.id,
+        "status": job.status,
+        "file": job.original_name,
+        "progress": job.progress,
+        "processed_rows": job.processed_rows,
+        "total_rows": job.total_rows,
+        "created": job.created_count,
+        "updated": job.updated_count,
+        "failed": job.failed_count,
+        "error": job.error or None,
+        "rejects_url": request.build_absolute_uri(reverse("import_job_rejects", args=[job.id])),
+    }
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_import_job(request):
+    """
+    Store an uploaded CSV (``csv_file`` or ``file``) and import it in the
+    background. Answers 202; poll /api/import-jobs/<id>/.
+    """
+    upload = request.FILES.get("csv_file") or request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"error": "No CSV file received."}, status=400)
+
+    IMPORT_ROOT.mkdir(parents=True, exist_ok=True)
+    path = IMPORT_ROOT / f"{uuid.uuid4().hex}.csv"
+    with open(path, "wb") as fh:
+        for chunk in upload.chunks():
+            fh.write(chunk)
+
+    job = ImportJob.objects.create(original_name=upload.name[:255], file_path=str(path))
+    transaction.on_commit(lambda: run_import_job.delay(job.id))
+    return JsonResponse(_import_payload(request, job), status=202)
+
+
+@require_http_methods(["GET"])
+def import_job_status(request, job_id: int):
+    job = get_object_or_404(ImportJob, pk=job_id)
+    return JsonResponse(_import_payload(request, job))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def resume_import_job(request, job_id: int):
+    """Re-queue a failed or stalled job; it continues after its last checkpoint."""
+    job = get_object_or_404(ImportJob, pk=job_id)
+    if job.status == ImportJob.Status.DONE:
+        return JsonResponse({"error": "Import already finished"}, status=409)
+    transaction.on_commit(lambda: run_import_job.delay(job.id))
+    return JsonResponse(_import_payload(request, job), status=202)
+
+
+@require_http_methods(["GET"])
+def import_job_rejects(request, job_id: int):
+    """Stream the job's rejected rows as CSV: row number, reason."""
+    job = get_object_or_404(ImportJob, pk=job_id)
+    rows = job.rejects.order_by("row").values_list("row", "reason").iterator()
+    return _csv_response(["row", "reason"], rows, f"import_{job.id}_rejects.csv")
@@ -0,0 +1,56 @@
+# dashboard/views_events.py
+"""
+Server-Sent Events stream for the React UI.
+
+Endpoint
+--------
+GET /api/events/   – text/event-stream of dashboard.services.realtime events
+
+Needs the ASGI entrypoint (auto_text_crm.asgi:application); each open tab
+holds one Redis subscription instead of polling the database.
+
+    const es = new EventSource(`${API}/api/events/`);
+    es.addEventListener("message.inbound", (e) => refresh(JSON.parse(e.data)));
+"""
+
+import json
+
+import redis.asyncio as aioredis
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from dashboard.services.realtime import CHANNEL, REDIS_URL
+
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+
+
+async def _event_source():
+    client = aioredis.from_url(REDIS_URL)
+    pubsub = client.pubsub()
+    await pubsub.subscribe(CHANNEL)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            msg = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=KEEPALIVE_SECONDS
+            )
+            if msg is None:
+                # comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+
+            payload = json.loads(msg["data"])
+            yield f"event: {payload['event']}\ndata: {json.dumps(payload['data'])}\n\n"
+    finally:
+        await pubsub.unsubscribe(CHANNEL)
+        await pubsub.aclose()
+        await client.aclose()
+
+
+@require_GET
+async def event_stream(request):
+    response = StreamingHttpResponse(_event_source(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable nginx buffering
+    return response
@@ -1,32 +1,90 @@
 # dashboard/views_inbox.py
-from django.http import JsonResponse, Http404
+from django.db.models import Q
+from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 
-from dashboard.models import MessageLog
+from dashboard.models import Lead, MessageLog
+from dashboard.services.lead_query import decode_cursor, encode_cursor, parse_page_size
+from dashboard.services.message_thread import parse_thread_params, thread_page
+
+INBOX_FIELDS = (
+    "id",
+    "name",
+    "cellphone",
+    "last_message_at",
+    "last_message_snippet",
+    "last_message_direction",
+    "unread_inbound_count",
+    "new_message",
+    "opted_in_for_ai",
+    "ai_active",
+)
+
+
+@require_GET
+def get_inbox_summary(request):
+    """
+    Conversations sorted by last activity, one row per lead with messages.
+
+    Reads only the denormalised Lead.last_message_* / unread_inbound_count
+    columns through lead_inbox_idx – no MessageLog query at all.
+
+    Query params: cursor, page_size, unread=1 (only leads with unread replies)
+    """
+    try:
+        page_size = parse_page_size(request.GET.get("page_size"))
+        qs = Lead.objects.filter(last_message_at__isnull=False)
+
+        cursor = request.GET.get("cursor")
+        if cursor:
+            last_at, pk = decode_cursor(cursor)
+            qs = qs.filter(Q(last_message_at__lt=last_at) | Q(last_message_at=last_at, id__lt=pk))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    if request.GET.get("unread") in ("true", "1"):
+        qs = qs.filter(unread_inbound_count__gt=0)
+
+    rows = list(qs.order_by("-last_message_at", "-id").values(*INBOX_FIELDS)[: page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]["last_message_at"], rows[-1]["id"])
+
+    return JsonResponse({"conversations": rows, "next_cursor": next_cursor})
 
 
 @require_GET
 def get_message_history(request, lead_id: int):
     """
-    JSON list of all MessageLog rows for the given lead, ordered oldest → newest.
+    One page of MessageLog rows for the given lead, ordered oldest → newest.
+
+    Query params: before=<id>, after=<id>, page_size (see
+    dashboard.services.message_thread). Unknown leads get an empty page.
 
-    Example response element:
+    Example response:
     {
-        "id": 17,
-        "content": "Hello!",
-        "source": "Manual",
-        "direction": "OUT",
-        "timestamp": "2025-04-17 16:42",
-        "read": false
+        "messages": [
+            {
+                "id": 17,
+                "content": "Hello!",
+                "source": "Manual",
+                "direction": "OUT",
+                "timestamp": "2025-04-17 16:42",
+                "read": false
+            }
+        ],
+        "has_more": true
     }
     """
-    # quick existence check to return 404 on bad ID
-    if not MessageLog.objects.filter(lead_id=lead_id).exists():
-        raise Http404("Lead not found")
+    try:
+        before, after, page_size = parse_thread_params(request.GET)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
 
     messages = (
-        MessageLog.objects.filter(lead_id=lead_id)
-        .order_by("timestamp")
+        MessageLog.objects.thread(lead_id)
         .values(
             "id",
             "content",
@@ -36,6 +94,7 @@ def get_message_history(request, lead_id: int):
             "read",
         )
     )
+    rows, has_more = thread_page(messages, before=before, after=after, page_size=page_size)
 
     # format timestamp as string to keep the old contract
     data = [
@@ -43,6 +102,6 @@ def get_message_history(request, lead_id: int):
             **m,
             "timestamp": m["timestamp"].strftime("%Y-%m-%d %H:%M"),
         }
-        for m in messages
+        for m in rows
     ]
-    return JsonResponse(data, safe=False)
+    return JsonResponse({"messages": data, "has_more": has_more})
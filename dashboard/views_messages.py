@@ -21,6 +21,8 @@ from django.views.decorators.http import require_POST
 from twilio.rest import Client
 
 from .models import Lead, MessageLog
+from .services.realtime import publish
+from .utils.phone import normalize_phone
 
 logger = logging.getLogger(__name__)
 
@@ -50,10 +52,10 @@ def send_message_view(request):
         tw_msg = client.messages.create(
             body=body,
             from_=os.getenv("TWILIO_PHONE_NUMBER"),
-            to=lead.cellphone,
+            to=lead.phone_e164 or lead.cellphone,
         )
 
-        MessageLog.objects.create(
+        log = MessageLog.objects.create(
             lead=lead,
             content=body,
             direction="OUT",
@@ -63,6 +65,7 @@ def send_message_view(request):
             delivery_status="queued",
             timestamp=timezone.now(),
         )
+        publish("message.outbound", {"lead_id": lead.id, "message_id": log.id, "source": "Manual"})
 
         # keep UI list fresh
         lead.last_texted = timezone.now()
@@ -88,14 +91,21 @@ def twilio_webhook(request):
     if not (from_number and body):
         return HttpResponse(status=400)
 
-    # match by last 10 digits
-    lead = Lead.objects.filter(cellphone__endswith=from_number[-10:]).first()
+    # short codes / unparseable senders can't match a lead (and must not
+    # match one with phone_e164 IS NULL)
+    normalized = normalize_phone(from_number)
+    if not normalized:
+        logger.warning("SMS from unparseable number %s", from_number)
+        return HttpResponse(status=204)
+
+    # exact match on the indexed E.164 column
+    lead = Lead.objects.filter(phone_e164=normalized).first()
     if not lead:
         logger.warning("SMS from unknown number %s", from_number)
         return HttpResponse(status=204)
 
     # log the message
-    MessageLog.objects.create(
+    log = MessageLog.objects.create(
         lead=lead,
         from_number=from_number,
         content=body,
@@ -104,6 +114,7 @@ def twilio_webhook(request):
         read=False,
         timestamp=timezone.now(),
     )
+    publish("message.inbound", {"lead_id": lead.id, "message_id": log.id})
 
     # update lead flags
     lead.new_message = True
@@ -111,7 +122,6 @@ def twilio_webhook(request):
     lead.ai_active = False          # pause future AI
     lead.next_ai_send_at = None
     lead.follow_up_stage = "Replied"
-    lead.last_reply = timezone.now()
     lead.save(
         update_fields=[
             "new_message",
@@ -119,7 +129,6 @@ def twilio_webhook(request):
             "ai_active",
             "next_ai_send_at",
             "follow_up_stage",
-            "last_reply",
         ]
     )
 
@@ -7,8 +7,8 @@ const AutoTextingTab = () => {
 
   useEffect(() => {
     axios
-      .get(`${process.env.REACT_APP_API_URL}/api/leads/`)
-      .then((res) => setLeads(res.data))
+      .get(`${process.env.REACT_APP_API_URL}/api/leads/?legacy=1`)
+      .then((res) => setLeads(res.data.leads))
       .catch((err) => console.error("Error fetching leads:", err));
   }, []);
 
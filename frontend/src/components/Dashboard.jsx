@@ -28,9 +28,9 @@ const UploadPanel = ({ onRefreshLeads }) => {
   }, []);
 
   const fetchLeads = async () => {
-    const { data } = await axios.get(`${API}/api/leads/`);
-    setLeads(data);
-    if (onRefreshLeads) onRefreshLeads(data);
+    const { data } = await axios.get(`${API}/api/leads/?legacy=1`);
+    setLeads(data.leads);
+    if (onRefreshLeads) onRefreshLeads(data.leads);
   };
 
   const handleFileChange = (e) => setSelectedFile(e.target.files[0]);
@@ -13,8 +13,8 @@ export default function LeadList() {
   /* ------------------------------------------------------------ */
   useEffect(() => {
     axios
-      .get(`${API}/api/leads/`)
-      .then((res) => setLeads(res.data))
+      .get(`${API}/api/leads/?legacy=1`)
+      .then((res) => setLeads(res.data.leads))
       .catch((err) => console.error("Lead fetch error:", err));
   }, [API]);
 
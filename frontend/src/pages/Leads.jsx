@@ -5,11 +5,19 @@ import dayjs from "dayjs";
 import relativeTime from "dayjs/plugin/relativeTime";
 import API from "../axios";
 import SmartInbox from "../components/SmartInbox";
+import fetchAllLeads from "../utils/fetchLeads";
 
 dayjs.extend(relativeTime);
 
 const REFRESH_MS = 10_000;
 
+// columns the list renders – the poll asks for nothing else
+const LEAD_FIELDS = [
+  "id", "name", "cellphone", "vehicle_interest", "score", "follow_up_stage",
+  "last_texted", "opted_in_for_ai", "ai_active", "new_message",
+  "appointment_time", "message_status", "next_ai_send_at",
+];
+
 const statusClasses = {
   "Not Started": "bg-gray-200 text-gray-700",
   Generated: "bg-yellow-200 text-yellow-800",
@@ -32,8 +40,7 @@ export default function Leads() {
   const [searchQuery, setSearchQuery] = useState("");
 
   const fetchLeads = useCallback(async () => {
-    const { data } = await API.get(`/api/leads/?filter=${filter}`);
-    setLeads(Array.isArray(data) ? data : data.leads || []);
+    setLeads(await fetchAllLeads({ filter, fields: LEAD_FIELDS }));
   }, [filter]);
 
   useEffect(() => {
@@ -43,7 +43,7 @@ export default function ScheduledMessages() {
   // fetch lead list ---------------------------------------------------
   const load = useCallback(async () => {
     setLoading(true);
-    const { data } = await API.get("/api/leads/?filter=all");
+    const { data } = await API.get("/api/leads/?filter=all&legacy=1");
     const enriched = data.leads.map((l) => ({
       ...l,
       isPending: !l.opted_in_for_ai,
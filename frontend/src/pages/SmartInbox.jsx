@@ -5,6 +5,13 @@ import axios from "../axios";
 import toast from "react-hot-toast";
 import useSound from 'use-sound';
 import notificationSfx from "../assets/notification.mp3";
+import fetchAllLeads from "../utils/fetchLeads";
+
+// columns the inbox renders – the poll asks for nothing else
+const INBOX_FIELDS = [
+  "id", "firstname", "lastname", "cellphone", "score", "last_texted",
+  "new_message", "opted_in_for_ai", "next_ai_send_at", "ai_message",
+];
 
 const SmartInbox = () => {
   const [leads, setLeads] = useState([]);
@@ -17,8 +24,7 @@ const SmartInbox = () => {
 
   const fetchLeads = useCallback(async () => {
     try {
-      const res = await axios.get("/api/leads/");
-      const data = res.data?.leads || [];
+      const data = await fetchAllLeads({ fields: INBOX_FIELDS });
       const unread = data.filter(l => l.new_message).length;
       setLeads(data);
 
@@ -0,0 +1,26 @@
+// frontend/src/utils/fetchLeads.js
+import API from "../axios";
+
+/*
+ * Read every page of GET /api/leads/ by following next_cursor.
+ * Pass `fields` (array) so the list only carries the columns the view renders.
+ */
+const fetchLeads = async ({ fields, pageSize = 500, ...params } = {}) => {
+  const leads = [];
+  let cursor = null;
+  do {
+    const { data } = await API.get("/api/leads/", {
+      params: {
+        ...params,
+        page_size: pageSize,
+        ...(fields ? { fields: fields.join(",") } : {}),
+        ...(cursor ? { cursor } : {}),
+      },
+    });
+    leads.push(...(data.leads || []));
+    cursor = data.next_cursor;
+  } while (cursor);
+  return leads;
+};
+
+export default fetchLeads;
@@ -3,7 +3,11 @@ from .models import Lead
 
 @admin.register(Lead)
 class LeadAdmin(admin.ModelAdmin):
-    list_display = ('name', 'phone', 'vehicle', 'lead_source', 'status', 'created_at')
+    list_display = ('name', 'phone', 'vehicle', 'lead_source', 'status', 'score', 'created_at')
     search_fields = ('name', 'phone', 'vehicle', 'lead_source')
     list_filter = ('status', 'lead_source')
     ordering = ('-created_at',)
+
+    def get_queryset(self, request):
+        # one query for the whole changelist instead of a COUNT per row
+        return super().get_queryset(request).with_score()
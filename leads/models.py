@@ -1,4 +1,26 @@
 from django.db import models
+from django.db.models import Case, Count, Value, When
+
+# message count → bucket (the same thresholds the score property used)
+HOT_MESSAGES = 3
+WARM_MESSAGES = 2
+
+
+class LeadQuerySet(models.QuerySet):
+    def with_score(self):
+        """
+        Annotate ``message_count`` and the HOT/WARM/COLD ``score_bucket`` in
+        the same query, so listing leads doesn't run a COUNT per row.
+        Lead.score reads the annotation when it is there.
+        """
+        return self.annotate(message_count=Count("messages")).annotate(
+            score_bucket=Case(
+                When(message_count__gte=HOT_MESSAGES, then=Value("HOT")),
+                When(message_count=WARM_MESSAGES, then=Value("WARM")),
+                default=Value("COLD"),
+                output_field=models.CharField(),
+            )
+        )
 
 
 class Lead(models.Model):
@@ -18,6 +40,8 @@ class Lead(models.Model):
     # This ensures your AI follow-ups only start AFTER you manually text the lead once
     first_manual_sent = models.BooleanField(default=False)
 
+    objects = LeadQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} - {self.phone}"
 
@@ -26,10 +50,14 @@ class Lead(models.Model):
         """
         Optional scoring logic based on message count.
         Works if Message model has related_name='messages'.
+        Uses the Lead.objects.with_score() annotation when present,
+        otherwise counts this lead's messages (one query).
         """
-        msg_count = self.messages.count()
-        if msg_count >= 3:
+        if hasattr(self, "score_bucket"):
+            return self.score_bucket
+        msg_count = self.message_count if hasattr(self, "message_count") else self.messages.count()
+        if msg_count >= HOT_MESSAGES:
             return "HOT"
-        elif msg_count == 2:
+        elif msg_count == WARM_MESSAGES:
             return "WARM"
         return "COLD"